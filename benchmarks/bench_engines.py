@@ -0,0 +1,66 @@
+"""
+Compare the overhead of the exec and monitoring engines on the README's fun1 example.
+
+Run from the repository root:
+
+    python benchmarks/bench_engines.py [--repeat N]
+
+The monitoring engine is skipped on Python versions without ``sys.monitoring``.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codpulse import Tracker  # noqa: E402
+
+
+def fun1(x, y):
+    m = 1
+    for i in range(x * 100):
+        m = m * 3
+        for j in range(x * 30):
+            m = m + 4
+    return m
+
+
+def best_of(run, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t1 = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - t1)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    baseline = best_of(lambda: fun1(3, 5), args.repeat)
+    rows = [("uninstrumented", baseline)]
+
+    tracker = Tracker(fun1, engine="exec")
+    rows.append(("exec", best_of(lambda: tracker.executable_function(3, 5), args.repeat)))
+
+    if hasattr(sys, "monitoring"):
+        tracker = Tracker(fun1, engine="monitoring")
+
+        def run():
+            with tracker.monitor:
+                tracker.executable_function(3, 5)
+
+        rows.append(("monitoring", best_of(run, args.repeat)))
+    else:
+        print("sys.monitoring is not available, skipping the monitoring engine")
+
+    print(f"{'engine':<16}{'best (ms)':>12}{'overhead':>12}")
+    for name, best in rows:
+        print(f"{name:<16}{best:>12.3f}{best / baseline:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
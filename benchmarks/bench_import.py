@@ -0,0 +1,62 @@
+"""
+Measure the time it takes to import codpulse, and guard it.
+
+Run from the repository root:
+
+    python benchmarks/bench_import.py [--budget-ms 150]
+
+Every measurement imports the package in a fresh interpreter. The script exits with
+status 1 when importing codpulse pulls in pandas or numpy, or when the median import
+time exceeds the budget; the table is only meant to import them when a DataFrame is
+requested.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import codpulse
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in ("numpy", "pandas") if name in sys.modules)
+print(elapsed * 1000, ",".join(heavy))
+"""
+
+
+def measure(repeat):
+    times, heavy = [], set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        times.append(float(output[0]))
+        heavy.update(output[1].split(",") if len(output) > 1 else [])
+    return times, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    times, heavy = measure(args.repeat)
+    median = statistics.median(times)
+    print(f"import codpulse: median {median:.1f} ms, best {min(times):.1f} ms ({args.repeat} runs)")
+    failed = False
+    if heavy:
+        print(f"FAIL: importing codpulse imports {', '.join(sorted(heavy))}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median import time is over the budget of {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
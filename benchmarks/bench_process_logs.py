@@ -0,0 +1,48 @@
+"""
+Measure how process_logs scales with the number of iterations and lines.
+
+Run from the repository root:
+
+    python benchmarks/bench_process_logs.py
+
+Synthetic per-iteration buffers are aggregated for every combination of iteration
+and line counts; the time should grow linearly in both.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codpulse.calibration import Calibration  # noqa: E402
+from codpulse.utils import process_logs  # noqa: E402
+
+
+def synthetic_logs(iterations, n_lines):
+    lines = [f"    line_{i} = {i}" for i in range(n_lines)]
+    parents = [-1] + [i // 2 for i in range(n_lines - 1)]
+    items = []
+    for _ in range(iterations):
+        buffer = []
+        for _ in range(n_lines):
+            total = random.random() * 1e-3
+            buffer += [10.0, total, total / 20, total / 5, 0.0]
+        items.append(buffer)
+    return items, lines, parents
+
+
+def main():
+    calibration = Calibration(50e-9, 200e-9)
+    print(f"{'iterations':>10} {'lines':>6} {'process_logs (ms)':>18}")
+    for n_lines in (30, 300):
+        for iterations in (10, 100, 1000, 10000):
+            items, lines, parents = synthetic_logs(iterations, n_lines)
+            t1 = time.perf_counter()
+            process_logs(items, lines, parents, calibration)
+            elapsed = (time.perf_counter() - t1) * 1000
+            print(f"{iterations:>10} {n_lines:>6} {elapsed:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Measure the overhead of the sampling mode on a CPU-bound function.
+
+Run from the repository root:
+
+    python benchmarks/bench_sampling.py [--interval-ms MS] [--repeat N]
+
+Plain and sampled runs are interleaved and the medians compared, so that drift of
+the machine affects both alike. The target is an overhead below 2%; on a single
+core the sampling thread competes with the profiled one, which adds noise.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codpulse.instrumentation import compile_function  # noqa: E402
+from codpulse.sampling import Sampler  # noqa: E402
+
+
+def cpu_bound(n):
+    total = 0
+    for i in range(n):
+        total += i * i % 7
+    values = sorted(range(n), key=lambda v: -v)
+    return total + values[0]
+
+
+def timed(run):
+    t1 = time.perf_counter()
+    run()
+    return (time.perf_counter() - t1) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interval-ms", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    sampler = Sampler(cpu_bound, compile_function(cpu_bound), args.interval_ms)
+
+    def sampled():
+        with sampler:
+            cpu_bound(args.size)
+
+    plain, with_sampler = [], []
+    for _ in range(args.repeat):
+        plain.append(timed(lambda: cpu_bound(args.size)))
+        with_sampler.append(timed(sampled))
+    plain, with_sampler = statistics.median(plain), statistics.median(with_sampler)
+    print(f"uninstrumented  {plain:10.3f} ms")
+    print(f"sampling        {with_sampler:10.3f} ms  ({sampler.samples} samples)")
+    print(f"overhead        {(with_sampler / plain - 1) * 100:10.2f} %")
+
+
+if __name__ == "__main__":
+    main()
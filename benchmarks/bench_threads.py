@@ -0,0 +1,79 @@
+"""
+Stress the thread-safe Tracker with many threads calling the same function.
+
+Run from the repository root:
+
+    python benchmarks/bench_threads.py [--threads 32] [--calls 200]
+
+Every thread of a thread pool calls a thread-safe tracker `--calls` times. The
+merged report must hold exactly the hits of every call, and every thread must
+appear in the breakdown; the script exits with status 1 otherwise. It also
+prints the time per call next to the same calls made from a single thread, to
+show the contention overhead of the per-thread recording.
+"""
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codpulse import Tracker  # noqa: E402
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        if i % 3 == 0:
+            total += i
+    return total
+
+
+def run(threads, calls, n):
+    tracker = Tracker(work, no_iterations=1, thread_safe=True, correct_overhead=False)
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        for _ in executor.map(lambda _: tracker(n), range(threads * calls)):
+            pass
+    elapsed = time.perf_counter() - start
+    return tracker, elapsed / (threads * calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--n", type=int, default=300)
+    args = parser.parse_args()
+
+    _, single = run(1, args.threads * args.calls, args.n)
+    tracker, pooled = run(args.threads, args.calls, args.n)
+
+    calls = args.threads * args.calls
+    table = tracker.snapshot()
+    breakdown = tracker.snapshot_threads()
+    expected = [calls, calls, args.n * calls, (args.n + 2) // 3 * calls, calls]
+    hits = [round(hits * calls) for hits in table["hits"]]
+    per_thread = sum(len(recorder.calls) for recorder in tracker.recorder.threads.values())
+
+    print(f"calls: {calls}, threads seen: {len(breakdown)}")
+    print(
+        f"time per call: {single * 1e6:.1f} us in 1 thread, "
+        f"{pooled * 1e6:.1f} us in {args.threads} threads ({pooled / single:.2f}x)"
+    )
+    failed = False
+    if hits != expected:
+        print(f"FAIL: merged hits {hits} do not match {expected}")
+        failed = True
+    if len(tracker.recorder.calls) != calls or per_thread != calls:
+        print(f"FAIL: {len(tracker.recorder.calls)} calls recorded, {per_thread} in the breakdown")
+        failed = True
+    if len(breakdown) > args.threads:
+        print(f"FAIL: {len(breakdown)} threads in the breakdown")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Measure the per-call overhead of the production decorator.
+
+Run from the repository root:
+
+    python benchmarks/bench_track.py
+
+A small function is called directly, through `track` with sampling disabled (the
+kill switch), and through `track` sampling 1% and 10% of the calls.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codpulse import track  # noqa: E402
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def per_call(function, number=200000, repeat=5):
+    return min(timeit.repeat(lambda: function(10), number=number, repeat=repeat)) / number
+
+
+def main():
+    disabled = track(work, sample_rate=0.01)
+    disabled.tracking.disable()
+    variants = [
+        ("original", work),
+        ("track, disabled", disabled),
+        ("track, 1% sampled", track(work, sample_rate=0.01)),
+        ("track, 10% sampled", track(work, sample_rate=0.1)),
+    ]
+    baseline = per_call(work)
+    print(f"{'variant':<20} {'ns per call':>12} {'overhead':>9}")
+    for name, function in variants:
+        elapsed = per_call(function)
+        print(f"{name:<20} {elapsed * 1e9:>12.0f} {elapsed / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,8 +15,11 @@ class InternalState:
     ----------
     modified_function_string : str
         The modified function string.
+    analysis_table : ResultTable
+        Table containing the analysis results, as stored.
     analysis_df : pandas DataFrame or None
         DataFrame containing analysis results, or None if analysis hasn't been performed.
+        Built from `analysis_table` on first access, which imports pandas.
 
     Methods
     -------
@@ -69,6 +72,18 @@ class InternalState:
         """
         self.__modified_function_string = value
 
+    @property
+    def analysis_table(self):
+        """
+        Get the analysis results as stored, without converting them to a data frame.
+
+        Returns
+        -------
+        ResultTable or pandas.DataFrame
+            The analysis results.
+        """
+        return self.__analysis_df
+
     @property
     def analysis_df(self):
         """
@@ -79,7 +94,8 @@ class InternalState:
         pandas.DataFrame
             The analysis data frame.
         """
-        return self.__analysis_df
+        value = self.__analysis_df
+        return value.to_pandas() if hasattr(value, "to_pandas") else value
 
     @analysis_df.setter
     def analysis_df(self, value):
@@ -88,8 +104,8 @@ class InternalState:
 
         Parameters
         ----------
-        value : pandas.DataFrame
-            The analysis data frame.
+        value : ResultTable or pandas.DataFrame
+            The analysis results; a `ResultTable` is converted to a data frame lazily.
         """
         self.__analysis_df = value
 
@@ -121,7 +137,7 @@ class InternalState:
         ----------
         i : int
             Index value (must be 1 to set the analysis data frame).
-        value : pandas.DataFrame
+        value : ResultTable or pandas.DataFrame
             The new analysis data frame.
         """
         if i == 1:
@@ -1,5 +1,19 @@
-from .utils import modify_function, process_logs, display_results
+from .utils import process_logs, process_samples, process_stats, display_results, print_table
+from .table import ResultTable
+from .instrumentation import compile_function
+from .recorder import Recorder
+from .monitoring import LineMonitor
+from .hotswap import HotSwap
+from .calltree import CallTree, display_call_tree
+from .sampling import Sampler
+from .calibration import calibrate
+from .parallel import portable_namespace, run_iterations, split_iterations
+from .threads import ThreadRecorder
 from .InternalTrackingState import InternalState
+import concurrent.futures
+import contextlib
+import inspect
+import os
 import time
 
 
@@ -13,8 +27,111 @@ class Tracker(InternalState):
         The function to be tracked.
     namespace : dict, optional
         Additional namespace to provide to the function during execution, by default an empty dictionary.
-    no_iterations : int, optional
-        Number of iterations to run the tracked function, by default 3.
+    no_iterations : int or "auto", optional
+        Number of iterations to run the tracked function, by default 3. With "auto", the
+        iterations go on until the 95% confidence interval of the mean time of every hot line
+        (taking at least 5% of the total) and of the total is within `target_rel_ci` of the
+        mean, or until `max_time_s` run out (see `codpulse.convergence.Convergence`). The table
+        then gets a ``rel_ci(%)`` column, and the header the precision reached and why the
+        iterations stopped.
+    engine : {"exec", "live", "monitoring"}, optional
+        How lines are timed, by default "exec". "exec" runs an instrumented copy of the
+        function in `namespace`; "live" swaps instrumented code into the original function
+        object while the tracker runs (see `codpulse.hotswap.HotSwap`), keeping its real
+        globals, closures and callers; "monitoring" (Python 3.12+) runs the original function
+        and times it through ``sys.monitoring`` line events.
+    max_hits : int, optional
+        With the "monitoring" engine, stop listening to a line once it was hit this many
+        times during a call of the tracker, by default None (never).
+    mode : {"instrument", "sampling"}, optional
+        "instrument" (default) times every line with the selected `engine`. "sampling" runs
+        the original function untouched while a background thread samples its stack, and
+        reports estimated per-line times with confidence intervals.
+    interval_ms : float, optional
+        With ``mode="sampling"``, time between two stack samples in milliseconds, by default 10.0.
+    correct_overhead : bool, optional
+        With the "exec" and "live" engines, calibrate the probe overhead (once per process) and also report
+        per-line and total times with it subtracted, by default True. The overhead is calibrated for the probes
+        the options below add (see `codpulse.calibration.calibrate`). Ignored with `track_memory`, whose probes
+        cost more the more a line allocates.
+    streaming : bool, optional
+        Fold every call into fixed-size running per-line statistics (Welford) instead of keeping
+        the buffer of every iteration, so memory stays constant in `no_iterations`, by default
+        False. Percentile columns are not reported in this mode.
+    workers : int, optional
+        With the "exec" engine, spread the iterations over this many worker processes, by default
+        None (run them in this process). Every worker rebuilds the function from its instrumented
+        source, records its share of the iterations locally and sends back only its per-line
+        results, which are merged into the same table a serial run produces. The namespace and
+        the call arguments must be picklable; modules in the namespace are re-imported.
+    pin_cpus : bool, optional
+        With `workers`, pin every worker to its own CPU (Linux only) to reduce the noise of
+        processes migrating between cores, by default False.
+    concurrency : int, optional
+        For coroutine functions, number of iterations run concurrently on the event loop with
+        ``asyncio.gather``, by default 1 (one after the other).
+    thread_safe : bool, optional
+        Allow the tracker to be called from many threads at once, e.g. the workers of a
+        ``ThreadPoolExecutor``, by default False. Every thread records into buffers of its own,
+        and calls neither reset nor print the results: they accumulate until `report` merges
+        them into one table, and `snapshot_threads` breaks them down by thread.
+    depth : int, optional
+        With the "exec" and "live" engines, also instrument the functions the tracked function
+        calls, and the functions they call, up to this many calls deep, by default None. Callees
+        are found from the source and instrumented in place while the tracker runs (see
+        `codpulse.calltree.CallTree`); the table then gets a ``self_time(in ms)`` column, the
+        time of every line minus the time spent in instrumented callees, and the aggregated
+        call tree is displayed below it.
+    include : list of str, optional
+        Instrument callees whose module or ``module.qualname`` matches one of these ``fnmatch``
+        patterns, e.g. ``["ourpkg.*"]``, at any depth unless `depth` is also given, by default
+        None. Without it, `depth` instruments every callee outside the standard library and
+        installed packages.
+    track_memory : bool, optional
+        With the "exec" and "live" engines, also measure the memory every line allocates with
+        ``tracemalloc``, by default False. The table gets ``mem_net(in KiB)`` and ``mem_blocks``
+        columns, the bytes and ``sys.getallocatedblocks`` blocks a line leaves allocated per call,
+        and ``mem_peak(in KiB)``, the most memory a single execution of the line had allocated
+        above its start. Tracing is started while the tracker runs if it is not already on.
+        Memory probes slow allocations down and add to the times of enclosing lines, so compare
+        times with a run without them.
+    memory_sample_rate : float, optional
+        With `track_memory`, fraction of the line executions whose memory is measured, by default
+        1.0. Lower rates keep the memory probes of large loops cheap; net allocations are scaled
+        up to all executions, peaks are the highest of the sampled ones.
+    histograms : bool, optional
+        With the "exec" and "live" engines, also count every execution of every line in a
+        fixed-size, log-bucketed histogram (see `codpulse.histogram.LineHistograms`), by
+        default False. The table then gets the ``hit_p50``, ``hit_p90`` and ``hit_p99`` of the
+        single-execution times of every line, and a sparkline of every histogram is displayed
+        next to them, so lines that are usually fast but sometimes slow stand out.
+        Histograms of threads and worker processes are merged.
+    cpu_time : bool, optional
+        With the "exec" and "live" engines, also read the CPU time of the calling thread
+        (``time.thread_time_ns``) around every line, by default False. The table then gets
+        ``cpu_time(in ms)``, the CPU time of every line per call, and ``blocked_time(in ms)``,
+        its wall time minus its CPU time: the time the line waited for I/O, a lock, a sleep
+        or the GIL.
+    slow_calls : int, optional
+        With the "exec" and "live" engines, also keep the full line timeline of the
+        `slow_calls` slowest calls, by default None (see `codpulse.timeline.SlowCalls`).
+        Timelines of the other calls are dropped when they finish, and a timeline holds at
+        most the first 100000 line executions of its call, so memory stays bounded.
+        `slow_call` shows which lines of a slow call took longer than usual, and
+        `export_trace` writes the timelines to a Chrome trace file.
+    slow_call_ms : float, optional
+        Keep the timelines of the most recent `slow_calls` calls (100 if not given) that
+        took at least this many milliseconds instead of those of the slowest calls, by
+        default None.
+    warmup : int, optional
+        Calls run before the measured iterations and discarded, by default 0, so cold caches,
+        lazy imports and first-call setup do not skew the means.
+    target_rel_ci : float, optional
+        With ``no_iterations="auto"``, largest half-width of the confidence intervals relative to
+        the means, by default 0.05.
+    max_time_s : float, optional
+        With ``no_iterations="auto"``, time budget of the measured iterations in seconds, by
+        default 10.0.
 
     Attributes
     ----------
@@ -24,13 +141,63 @@ class Tracker(InternalState):
         Number of iterations to run the function.
     namespace : dict
         Namespace for the function's execution environment.
+    instrumented : InstrumentedFunction
+        The compiled, instrumented code of the tracked function and its line table.
+    recorder : Recorder
+        Collects the per-line accumulator buffers written by the executable function.
     executable_function : callable
         The executable version of the tracked function.
+    monitor : LineMonitor, HotSwap, Sampler or contextlib.nullcontext
+        Context that is active while the executable function runs.
+    total_time : list or RunningStats
+        Total execution times (in ms) of the iterations of the current or last call.
+    workers : int or None
+        Number of worker processes the iterations are spread over.
+    thread_safe : bool
+        Whether the tracker records the calls of every thread separately.
+    call_tree : CallTree or None
+        The instrumented callees, with `depth` or `include`.
+    memory : MemoryProbes or None
+        The per-line memory measurements, with `track_memory`.
+    histograms : LineHistograms or None
+        The per-line histograms of the iterations of the last call, with `histograms` (merged
+        from all threads with ``thread_safe=True``, see `merged_histograms`).
+    cpu : CpuTimes or None
+        The per-line CPU times of the iterations of the last call, with `cpu_time`.
+    timeline : SlowCalls or None
+        The timelines of the slowest iterations of the last call, with `slow_calls` or
+        `slow_call_ms`.
+    convergence : Convergence or None
+        The stopping rule and the precision reached, with ``no_iterations="auto"``.
+    is_async : bool
+        Whether the tracked function is a coroutine function; calling the tracker then returns
+        an awaitable.
 
     Methods
     -------
     __call__(*param)
-        Calls the tracked function with specified parameters and analyzes the results.
+        Calls the tracked function with specified parameters and analyzes the results. For
+        coroutine functions, returns an awaitable that does so.
+    acall(*param, **params)
+        Awaits the tracked coroutine function with specified parameters and analyzes the results.
+    report()
+        Merges, stores and displays the results recorded so far by all threads.
+    reset()
+        Forgets the results recorded so far.
+    snapshot_threads()
+        Returns the statistics of the iterations finished so far, by thread.
+    run_parallel(param, params)
+        Runs the iterations in worker processes.
+    snapshot()
+        Returns the statistics of the iterations finished so far.
+    callees()
+        Returns the per-line statistics of every instrumented callee.
+    call_edges()
+        Returns the aggregated calls between instrumented functions.
+    to_pandas()
+        Returns the statistics of the last call as a pandas DataFrame.
+    save(path)
+        Appends the results of the last call to a history file.
     get_executable()
         Generates an executable version of the tracked function.
 
@@ -54,32 +221,694 @@ class Tracker(InternalState):
     This will execute the `fun1` function with the specified parameters and analyze the results over multiple iterations.
     The tracked function's execution times and analysis results will be displayed in a formatted table.
 
+    Coroutine functions are tracked the same way, from a running event loop, and the time of every line
+    is split into the time it held the event loop and the time it was suspended at an ``await``:
+
+    >>> async def handler(delay):
+    ...     await asyncio.sleep(delay)
+    ...     return sum(range(10000))
+
+    >>> t = Tracker(handler, concurrency=10)
+    >>> await t(0.01)
+
     """
 
-    def __init__(self, function_object, namespace={}, no_iterations=3):
+    def __init__(
+        self,
+        function_object,
+        namespace={},
+        no_iterations=3,
+        engine="exec",
+        max_hits=None,
+        mode="instrument",
+        interval_ms=10.0,
+        correct_overhead=True,
+        streaming=False,
+        workers=None,
+        pin_cpus=False,
+        concurrency=1,
+        thread_safe=False,
+        depth=None,
+        include=None,
+        track_memory=False,
+        memory_sample_rate=1.0,
+        histograms=False,
+        cpu_time=False,
+        slow_calls=None,
+        slow_call_ms=None,
+        warmup=0,
+        target_rel_ci=0.05,
+        max_time_s=10.0,
+    ):
         self.function_object = function_object
         self.no_iterations = no_iterations
+        self.warmup = warmup
+        self.mode = mode
+        self.streaming = streaming
+        self.workers = workers
+        self.pin_cpus = pin_cpus
+        self.concurrency = concurrency
+        self.thread_safe = thread_safe
+        self.is_async = inspect.iscoroutinefunction(inspect.unwrap(function_object))
+        self.correct_overhead = (
+            correct_overhead and mode == "instrument" and engine in ("exec", "live") and not track_memory
+        )
         self.namespace = {"time": time}
         self.namespace.update(namespace)
 
-        super().__init__(modify_function(self.function_object))
-        self.executable_function = self.get_executable()
+        timeline = slow_calls is not None or slow_call_ms is not None
+        # the kinds of probes of the instrumented code, which the calibration depends on
+        self._probes = {"histograms": histograms, "cpu": cpu_time, "timeline": timeline}
+        self.instrumented = compile_function(
+            self.function_object,
+            memory=track_memory,
+            histograms=histograms,
+            cpu=cpu_time,
+            timeline=timeline,
+        )
+        n_lines = len(self.instrumented.lines)
+        if thread_safe:
+            self.recorder = ThreadRecorder(n_lines, streaming, histograms)
+        elif streaming:
+            from .stats import StreamingRecorder
+
+            self.recorder = StreamingRecorder(n_lines)
+        else:
+            self.recorder = Recorder(n_lines)
+        self.total_time = []
+        self.memory = None
+        if track_memory:
+            from .memory import MemoryProbes
+
+            self.memory = self.recorder.memory = MemoryProbes(n_lines, memory_sample_rate)
+        self.histograms = None
+        if histograms and not thread_safe:
+            from .histogram import LineHistograms
+
+            self.histograms = self.recorder.histograms = LineHistograms(n_lines)
+        self.cpu = None
+        if cpu_time:
+            from .cputime import CpuTimes
+
+            self.cpu = self.recorder.cpu = CpuTimes(n_lines)
+        self.timeline = None
+        if timeline:
+            from .timeline import SlowCalls
+
+            keep = slow_calls if slow_calls is not None else 100
+            self.timeline = self.recorder.timeline = SlowCalls(keep, slow_call_ms)
+        self.namespace["_cp_recorder"] = self.recorder
+        super().__init__(self.instrumented.source)
+        if mode == "sampling":
+            self.executable_function = self.function_object
+            self.monitor = Sampler(self.function_object, self.instrumented, interval_ms)
+        elif mode != "instrument":
+            raise ValueError(f"unknown mode {mode!r}, expected 'instrument' or 'sampling'")
+        elif engine == "exec":
+            self.executable_function = self.get_executable()
+            self.monitor = contextlib.nullcontext()
+        elif engine == "live":
+            self.executable_function = self.function_object
+            self.monitor = HotSwap(
+                self.function_object, self.recorder, track_memory, histograms, cpu_time, timeline
+            )
+        elif engine == "monitoring":
+            self.executable_function = self.function_object
+            self.monitor = LineMonitor(
+                self.function_object, self.instrumented, self.recorder, max_hits
+            )
+        else:
+            raise ValueError(
+                f"unknown engine {engine!r}, expected 'exec', 'live' or 'monitoring'"
+            )
+        if workers is not None and (mode != "instrument" or engine != "exec"):
+            raise ValueError("workers require mode='instrument' and engine='exec'")
+        if pin_cpus and not hasattr(os, "sched_setaffinity"):
+            raise RuntimeError("pinning workers to CPUs is not supported on this platform")
+        if self.is_async and (workers is not None or isinstance(self.monitor, LineMonitor)):
+            raise ValueError("coroutine functions require engine='exec' or 'live' without workers")
+        if thread_safe and (self.is_async or workers is not None or (mode, engine) != ("instrument", "exec")):
+            raise ValueError(
+                "thread_safe requires a plain function, mode='instrument' and engine='exec' without workers"
+            )
+        if track_memory and (
+            self.is_async or thread_safe or workers is not None or mode != "instrument" or engine not in ("exec", "live")
+        ):
+            raise ValueError(
+                "track_memory requires a plain function, mode='instrument' and engine='exec' or 'live', "
+                "without workers or thread_safe"
+            )
+        if histograms and (mode != "instrument" or engine not in ("exec", "live")):
+            raise ValueError("histograms require mode='instrument' and engine='exec' or 'live'")
+        if cpu_time and (
+            self.is_async or thread_safe or workers is not None or mode != "instrument" or engine not in ("exec", "live")
+        ):
+            raise ValueError(
+                "cpu_time requires a plain function, mode='instrument' and engine='exec' or 'live', "
+                "without workers or thread_safe"
+            )
+        if timeline and (
+            thread_safe or workers is not None or mode != "instrument" or engine not in ("exec", "live")
+        ):
+            raise ValueError(
+                "slow_calls requires mode='instrument' and engine='exec' or 'live', "
+                "without workers or thread_safe"
+            )
+        self.convergence = None
+        if no_iterations == "auto":
+            if mode != "instrument" or workers is not None or thread_safe:
+                raise ValueError(
+                    'no_iterations="auto" requires mode="instrument", without workers or thread_safe'
+                )
+            from .convergence import Convergence
+
+            self.convergence = Convergence(target_rel_ci, max_time_s)
+        elif not isinstance(no_iterations, int) or no_iterations < 1:
+            raise ValueError(f'no_iterations must be a positive integer or "auto", got {no_iterations!r}')
+        if warmup and (workers is not None or thread_safe):
+            raise ValueError("warmup is not supported with workers or thread_safe")
+        self.call_tree = None
+        if depth is not None or include is not None:
+            if mode != "instrument" or engine not in ("exec", "live") or workers is not None or thread_safe:
+                raise ValueError(
+                    "depth and include require mode='instrument' and engine='exec' or 'live', "
+                    "without workers or thread_safe"
+                )
+            if engine == "live":
+                code = self.monitor.instrumented.code
+            else:
+                code = self.executable_function.__code__
+            self.call_tree = CallTree(
+                self.function_object, self.instrumented, code, depth, include, self.namespace
+            )
 
     def __call__(self, *param, **params):
-        items = []
-        total_time = []
-        for i in range(self.no_iterations):
-            t1 = time.time()
-            _ = self.executable_function(*param, **params)
-            t2 = time.time()
-            total_time.append((t2 - t1) * 1000)
-            items.append(_[-1])
-        self[1] = process_logs(items)
+        if self.is_async:
+            return self.acall(*param, **params)
+        if self.thread_safe:
+            for i in range(self.no_iterations):
+                t1 = time.perf_counter()
+                self.executable_function(*param, **params)
+                t2 = time.perf_counter()
+                self.recorder.record_time((t2 - t1) * 1000)
+            return
+        if self.workers is not None:
+            self._start()
+            self.run_parallel(param, params)
+        else:
+            with self._running():
+                for i in range(self.warmup):
+                    self.executable_function(*param, **params)
+                record_time = self._start()
+                for batch in self._batches(1):
+                    t1 = time.perf_counter()
+                    self.executable_function(*param, **params)
+                    t2 = time.perf_counter()
+                    record_time((t2 - t1) * 1000)
+        self._finish()
+
+    async def acall(self, *param, **params):
+        """
+        Await the tracked coroutine function with specified parameters and analyze the results.
+
+        The iterations run in batches of `concurrency` calls gathered on the running event loop.
+        Every call records into its own buffer, so concurrent calls do not mix their timings.
+
+        Parameters
+        ----------
+        *param, **params
+            Arguments of every call.
+        """
+        import asyncio
+
+        async def timed_call():
+            t1 = time.perf_counter()
+            await self.executable_function(*param, **params)
+            t2 = time.perf_counter()
+            record_time((t2 - t1) * 1000)
+
+        with self._running():
+            for i in range(self.warmup):
+                await self.executable_function(*param, **params)
+            record_time = self._start()
+            for batch in self._batches(self.concurrency):
+                await asyncio.gather(*(timed_call() for _ in range(batch)))
+        self._finish()
+
+    def _running(self):
+        """
+        Context that is active while the iterations run: the monitor, the call tree and the
+        memory probes.
+
+        Returns
+        -------
+        contextlib.ExitStack
+            The entered contexts.
+        """
+        stack = contextlib.ExitStack()
+        for context in (self.monitor, self.call_tree, self.memory):
+            if context is not None:
+                stack.enter_context(context)
+        return stack
+
+    def _batches(self, size):
+        """
+        Plan the iterations of a call, in batches run one after the other.
+
+        Parameters
+        ----------
+        size : int
+            Largest batch.
+
+        Yields
+        ------
+        int
+            Number of iterations to run next. With ``no_iterations="auto"``, batches go on
+            until the convergence rule stops them after one has finished.
+        """
+        if self.convergence is None:
+            remaining = self.no_iterations
+            while remaining > 0:
+                batch = min(size, remaining)
+                yield batch
+                remaining -= batch
+            return
+        self.convergence.start()
+        while True:
+            yield size
+            if self.convergence.update(self):
+                return
+
+    def _start(self):
+        """
+        Forget the results of the last call before running the iterations again.
+
+        Returns
+        -------
+        callable
+            Records the total time (in ms) of one iteration.
+        """
+        if self.streaming:
+            from .stats import RunningStats
+
+            self.total_time = RunningStats()
+        else:
+            self.total_time = []
+        self.recorder.reset()
+        if self.call_tree is not None:
+            self.call_tree.reset()
+        if self.memory is not None:
+            self.memory.reset()
+        if self.histograms is not None:
+            self.histograms.reset()
+        if self.cpu is not None:
+            self.cpu.reset()
+        if self.timeline is not None:
+            self.timeline.reset()
+        if self.mode == "sampling":
+            self.monitor.reset()
+        return self.total_time.add if self.streaming else self.total_time.append
+
+    def _finish(self):
+        """
+        Store and display the statistics of the iterations that were run.
+        """
+        self[1] = self.snapshot()
+        if self.convergence is not None:
+            self.convergence.precision = self.convergence.measure(self.analysis_table, self.total_time)
         display_results(
-            self[1], total_time, self.no_iterations, self.function_object.__name__
+            self.analysis_table,
+            self.total_time,
+            self._iterations(),
+            self.function_object.__name__,
+            calibrate(**self._probes) if self.correct_overhead else None,
+            self.convergence,
+            self.merged_histograms(),
+            self.instrumented.parents,
+        )
+        if self.call_tree is not None:
+            display_call_tree(self.call_tree, self._iterations())
+
+    def merged_histograms(self):
+        """
+        Get the per-line histograms of the iterations finished so far, with `histograms`.
+
+        Returns
+        -------
+        LineHistograms or None
+            The histograms, merged from all threads with ``thread_safe=True``; None without
+            `histograms`.
+        """
+        if isinstance(self.recorder, ThreadRecorder):
+            return self.recorder.merged_histograms()
+        return self.histograms
+
+    def _iterations(self):
+        return self.total_time.count if self.streaming else len(self.total_time)
+
+    def callees(self):
+        """
+        Get the per-line statistics of every instrumented callee, with `depth` or `include`.
+
+        Returns
+        -------
+        dict
+            Callee (``module.qualname``) to a `ResultTable` with its hits and times per
+            iteration of the tracked function.
+        """
+        return self.call_tree.tables(self._iterations())
+
+    def call_edges(self):
+        """
+        Get the aggregated calls between instrumented functions, with `depth` or `include`.
+
+        Returns
+        -------
+        ResultTable
+            The calling function and line, the callee, and the number and time of the calls
+            per iteration of the tracked function.
+        """
+        return self.call_tree.edges_table(self._iterations())
+
+    def snapshot(self):
+        """
+        Get the statistics of the iterations finished so far.
+
+        It can be called from another thread while the tracker is running, and does not
+        interrupt the run.
+
+        Returns
+        -------
+        ResultTable
+            The per-line statistics, in the format of `process_logs` (or `process_samples` in
+            sampling mode).
+        """
+        if self.mode == "sampling":
+            return process_samples(
+                list(self.monitor.counts),
+                self.monitor.samples,
+                self.instrumented.lines,
+                list(self.total_time),
+            )
+        return self._process(self.recorder)
+
+    def snapshot_threads(self):
+        """
+        Get the statistics of the iterations finished so far by every thread, with ``thread_safe=True``.
+
+        Returns
+        -------
+        dict
+            Thread name to the per-line statistics of the iterations run in that thread, in the
+            format of `process_logs`.
+        """
+        return {name: self._process(recorder) for name, recorder in list(self.recorder.threads.items())}
+
+    def report(self):
+        """
+        Merge, store and display the results recorded so far by all threads, with ``thread_safe=True``.
+        """
+        self.total_time = self.recorder.total_time
+        self._finish()
+
+    def reset(self):
+        """
+        Forget the results recorded so far, with ``thread_safe=True``.
+        """
+        self.recorder.reset()
+
+    def _process(self, recorder):
+        lines = self.instrumented.lines
+        calibration = calibrate(**self._probes) if self.correct_overhead else None
+        parents = self.instrumented.parents
+        if self.streaming:
+            stats = recorder.stats.copy()
+            table = process_stats(stats, lines, parents, calibration, self.is_async)
+            calls = stats.calls
+        else:
+            calls = list(recorder.calls)
+            table = process_logs(calls, lines, parents, calibration, self.is_async)
+            calls = len(calls)
+        if self.call_tree is not None:
+            self.call_tree.add_self_time(table, self.call_tree.root, calls)
+        if self.memory is not None:
+            for name, values in self.memory.columns(table["hits"]).items():
+                table.add_column(name, values)
+        histograms = recorder.merged_histograms() if isinstance(recorder, ThreadRecorder) else recorder.histograms
+        if histograms is not None:
+            after = "max_hit(in ms)"
+            for name, values in histograms.columns().items():
+                # the middle of the top bucket can lie above the slowest execution
+                values = [min(value, slowest) for value, slowest in zip(values, table[after])]
+                table.add_column(name, values, after=after)
+                after = name
+        if self.cpu is not None:
+            after = "std_time(in ms)"
+            wall, hits = table["mean_time(in ms)"], table["hits"]
+            columns = self.cpu.columns(calls, wall, hits, parents, calibrate(**self._probes))
+            for name, values in columns.items():
+                table.add_column(name, values, after=after)
+                after = name
+        if self.convergence is not None:
+            for name, values in self.convergence.columns(table, calls).items():
+                table.add_column(name, values, after="std_time(in ms)")
+        return table
+
+    def run_parallel(self, param, params):
+        """
+        Run the iterations in worker processes and merge their results into the recorder.
+
+        Parameters
+        ----------
+        param : tuple
+            Positional arguments of every call.
+        params : dict
+            Keyword arguments of every call.
+        """
+        chunks = split_iterations(self.no_iterations, self.workers)
+        cpus = sorted(os.sched_getaffinity(0)) if self.pin_cpus else None
+        namespace = portable_namespace(self.namespace)
+        n_lines = len(self.instrumented.lines)
+        with concurrent.futures.ProcessPoolExecutor(len(chunks)) as executor:
+            futures = [
+                executor.submit(
+                    run_iterations,
+                    self[0],
+                    self.instrumented.name,
+                    namespace,
+                    n_lines,
+                    iterations,
+                    self.streaming,
+                    param,
+                    params,
+                    cpus[i % len(cpus)] if cpus else None,
+                    self.histograms is not None,
+                )
+                for i, iterations in enumerate(chunks)
+            ]
+            for future in futures:
+                results, total_time, histograms = future.result()
+                if histograms is not None:
+                    self.histograms.merge(histograms)
+                if self.streaming:
+                    self.recorder.stats.merge(results)
+                    self.total_time.merge(total_time)
+                else:
+                    self.recorder.calls.extend(results)
+                    self.total_time.extend(total_time)
+
+    def to_pandas(self):
+        """
+        Get the statistics of the last call as a pandas DataFrame, same as ``tracker[1]``.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The per-line statistics.
+        """
+        return self.analysis_df
+
+    def save(self, path):
+        """
+        Append the results of the last call to a history file.
+
+        The file holds the per-line columns, the time of every line in every iteration, a
+        hash of the source and the environment of every saved run; compare two runs with
+        `codpulse.history.diff_runs` or ``python -m codpulse diff``.
+
+        Parameters
+        ----------
+        path : str
+            History file, created if needed.
+
+        Returns
+        -------
+        Run
+            The saved run.
+        """
+        from .history import append_run, capture
+
+        run = capture(self)
+        append_run(path, run)
+        return run
+
+    def sweep(self, arg_factory, sizes, target_size=None):
+        """
+        Run the iterations at a range of input sizes and fit the growth of every line.
+
+        At every size, the tracked function is called with ``*arg_factory(size)`` for the
+        warmup and the iterations of the tracker. The mean time per call of every line and
+        of the total are then fitted to O(1), O(log n), O(n), O(n log n) and O(n^2) (see
+        `codpulse.complexity.ComplexityFit`), so lines that are cheap on test data but grow
+        fast stand out. Lines whose time varies by less than a microsecond over the sizes
+        are O(1); lines that two models fit about equally well are ``"ambiguous"``, which a
+        wider range of sizes or more iterations usually resolves. The times include the probe cost, which grows with the hits of a line
+        like its own time, so it does not change the growth classes but inflates the
+        projections of cheap lines in loops.
+
+        Parameters
+        ----------
+        arg_factory : callable
+            Called with every size, returns the tuple of positional arguments of the calls,
+            e.g. ``lambda n: (n, 5)``.
+        sizes : sequence of int
+            Input sizes, at least three; a wide range, e.g. powers of two, fits best.
+        target_size : int, optional
+            Also project the time of every line to this input size, e.g. the production
+            volume, by default None.
+
+        Returns
+        -------
+        ResultTable
+            The time of every line at every size, its growth class, the coefficient of
+            determination of its fit and, with `target_size`, its projected time. The table
+            is also printed, with the growth and projection of the total in the header.
+        """
+        if self.is_async or self.thread_safe or self.workers is not None or self.mode != "instrument":
+            raise ValueError(
+                "sweep requires a plain function and mode='instrument', without workers or thread_safe"
+            )
+        from .complexity import ComplexityFit
+
+        sizes = list(sizes)
+        rows = []
+        with self._running():
+            for size in sizes:
+                args = tuple(arg_factory(size))
+                for i in range(self.warmup):
+                    self.executable_function(*args)
+                record_time = self._start()
+                for batch in self._batches(1):
+                    t1 = time.perf_counter()
+                    self.executable_function(*args)
+                    t2 = time.perf_counter()
+                    record_time((t2 - t1) * 1000)
+                table = self._process(self.recorder)
+                if self.streaming:
+                    total = float(self.total_time.mean)
+                else:
+                    total = sum(self.total_time) / len(self.total_time)
+                rows.append(list(table["mean_time(in ms)"]) + [total])
+        fit = ComplexityFit(sizes, rows, min_spread=0.001)
+        columns = {"LineNo": table["LineNo"], "line": table["line"]}
+        for size, row in zip(sizes, rows):
+            columns[f"n={size}(in ms)"] = row[:-1]
+        columns["growth"] = fit.labels[:-1]
+        columns["fit_r2"] = fit.r2[:-1]
+        summary = f"total: {fit.labels[-1]}"
+        if target_size is not None:
+            projected = fit.predict(target_size)
+            columns[f"n={target_size}(in ms)"] = projected[:-1]
+            summary += f", projected total at n={target_size}: {projected[-1]:.3f} ms"
+        result = ResultTable(columns)
+        print_table(
+            result,
+            f"|> Function Name: {self.function_object.__name__}, sizes: {sizes}, {summary}",
+        )
+        return result
+
+    def slow_calls(self):
+        """
+        Get the timelines kept of the iterations of the last call, with `slow_calls`.
+
+        Returns
+        -------
+        list of SlowCall
+            The kept iterations, slowest first.
+        """
+        return self.timeline.calls()
+
+    def slow_call(self, rank=0):
+        """
+        Compare the lines of a kept slow iteration with the same lines in a typical iteration.
+
+        Parameters
+        ----------
+        rank : int, optional
+            Position of the iteration in `slow_calls`, by default 0, the slowest.
+
+        Returns
+        -------
+        ResultTable
+            The hits and time of every line in that iteration, its median time over all
+            iterations (its mean with `streaming`), and the difference, ``excess(in ms)``:
+            positive for the lines that made the iteration slow.
+        """
+        call = self.slow_calls()[rank]
+        table = self.analysis_table
+        typical = "p50_time(in ms)" if "p50_time(in ms)" in table.columns else "mean_time(in ms)"
+        hits, totals = call.line_times(len(self.instrumented.lines))
+        times = [total * 1000 for total in totals]
+        return ResultTable(
+            {
+                "LineNo": table["LineNo"],
+                "line": table["line"],
+                "hits": hits,
+                "time(in ms)": times,
+                typical: table[typical],
+                "excess(in ms)": [time - usual for time, usual in zip(times, table[typical])],
+            }
+        )
+
+    def report_slow_call(self, rank=0):
+        """
+        Print `slow_call` of a kept slow iteration.
+
+        Parameters
+        ----------
+        rank : int, optional
+            Position of the iteration in `slow_calls`, by default 0, the slowest.
+        """
+        call = self.slow_calls()[rank]
+        title = (
+            f"|> Function Name: {self.function_object.__name__}, iteration {call.index}: "
+            f"{call.duration * 1000:.3f} ms, slowest #{rank + 1} of {self.timeline.seen}"
+        )
+        print_table(self.slow_call(rank), title)
+
+    def export_trace(self, path):
+        """
+        Write the timelines kept of the iterations of the last call to a Chrome trace file.
+
+        The JSON file opens in ``chrome://tracing``, Perfetto and speedscope; every kept
+        iteration is a track of its own, starting at 0.
+
+        Parameters
+        ----------
+        path : str
+            File to write.
+        """
+        from .timeline import write_trace
+
+        write_trace(
+            path,
+            self.slow_calls(),
+            self.instrumented.lines,
+            self.instrumented.spans,
+            self.function_object.__name__,
         )
 
     def get_executable(self):
         namespace = self.namespace.copy()
-        exec(self[0], namespace)
-        return namespace[self.function_object.__name__]
+        exec(self.instrumented.code, namespace)
+        return namespace[self.instrumented.name]
@@ -1 +1,4 @@
-from .TrackerClass import Tracker
\ No newline at end of file
+from .TrackerClass import Tracker
+from .comparison import compare
+from .production import track, tracked_functions
+from .hotswap import HotSwap, instrument
\ No newline at end of file
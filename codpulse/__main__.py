@@ -0,0 +1,176 @@
+"""
+Command-line interface of codpulse.
+
+    python -m codpulse --func module:qualname [--iterations N] [--save PATH] script.py [args]
+    python -m codpulse --func module:qualname [--iterations N] [--save PATH] -m module [args]
+
+runs a script or module as Python would, with the named functions profiled line by line
+(see `codpulse.runner`), and displays their results when it exits. ``--func`` can be
+repeated; a bare ``qualname`` names a function of the script or module itself.
+
+    python -m codpulse diff OLD [NEW] [--name NAME] [--alpha 0.01] [--threshold 0.05]
+
+compares the last run in the history file NEW with the last run of the same function
+in OLD, or the last run in OLD with the run before it of the same function and label
+when NEW is omitted, and exits with status 1 when a line or the total got significantly
+slower.
+
+    python -m codpulse collect [NAME ...] [--unlink]
+
+merges and displays the statistics that the worker processes of a server published with
+``@codpulse.track(shared=True)`` (see `codpulse.shared`), for the named functions
+(``module.qualname``, ``qualname`` or segment name) or every function found.
+"""
+import argparse
+import os
+import sys
+
+
+def diff_command(args):
+    from .history import diff_runs, display_diff, load_history
+
+    if args.new is None or os.path.abspath(args.new) == os.path.abspath(args.old):
+        runs = load_history(args.old, args.name)
+        if not runs:
+            sys.exit(f"codpulse diff: no run found in {args.old}")
+        new = runs[-1]
+        # the runs of other functions or callers saved to the same file are not comparable
+        runs = [run for run in runs if run.name == new.name and run.label == new.label]
+        if len(runs) < 2:
+            of = new.name if new.label is None else f"{new.name} ({new.label})"
+            sys.exit(f"codpulse diff: {args.old} holds fewer than two runs of {of} to compare")
+        old = runs[-2]
+    else:
+        new_runs = load_history(args.new, args.name)
+        if not new_runs:
+            sys.exit(f"codpulse diff: no run found in {args.new}")
+        new = new_runs[-1]
+        old_runs = load_history(args.old, new.name)
+        if not old_runs:
+            sys.exit(f"codpulse diff: no run of {new.name} found in {args.old}")
+        old = old_runs[-1]
+    diff = diff_runs(old, new, args.alpha, args.threshold)
+    display_diff(diff, old, new)
+    return 1 if "slower" in diff["status"] else 0
+
+
+def collect_command(args):
+    from .shared import Segment, find, report, segments
+
+    names = args.names or segments()
+    if not names:
+        sys.exit("codpulse collect: no shared statistics found")
+    for name in names:
+        try:
+            name = find(name)
+        except FileNotFoundError as error:
+            sys.exit(f"codpulse collect: {error}")
+        report(name)
+        if args.unlink:
+            segment = Segment(name)
+            segment.unlink()
+            segment.close()
+    return 0
+
+
+# options of the profiler that take a value, to find where the program and its arguments start
+_VALUE_OPTIONS = ("--func", "--iterations", "--save")
+
+
+def _split_program(argv):
+    options = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "-m":
+            return options, argv[i : i + 2], argv[i + 2 :]
+        if not arg.startswith("-"):
+            return options, [arg], argv[i + 1 :]
+        options.append(arg)
+        if arg in _VALUE_OPTIONS and i + 1 < len(argv):
+            options.append(argv[i + 1])
+            i += 1
+        i += 1
+    return options, [], []
+
+
+def run_command(argv):
+    from .runner import main_module_name, parse_target, run
+
+    options, program, args = _split_program(argv)
+    parser = argparse.ArgumentParser(
+        prog="python -m codpulse",
+        usage="%(prog)s --func module:qualname [--iterations N] [--save PATH] (script.py | -m module) [args]"
+        "\n       %(prog)s diff OLD [NEW] [--name NAME] [--alpha 0.01] [--threshold 0.05]"
+        "\n       %(prog)s collect [NAME ...] [--unlink]",
+        description="Run a script or module with the named functions profiled line by line.",
+    )
+    parser.add_argument(
+        "--func",
+        action="append",
+        required=True,
+        metavar="module:qualname",
+        help="function to profile, can be repeated; a bare qualname is looked up in the script or module",
+    )
+    parser.add_argument("--iterations", type=int, default=1, help="times every call is run (default: 1)")
+    parser.add_argument("--save", metavar="PATH", help="append the results to this history file instead of printing them")
+    parser.add_argument("-m", dest="module", help="run a module, like python -m")
+    parser.add_argument("script", nargs="?", help="script to run")
+    parsed = parser.parse_args(options + program)
+    if (parsed.script is None) == (parsed.module is None):
+        parser.error("give either a script or -m module")
+    if parsed.iterations < 1:
+        parser.error("--iterations must be at least 1")
+    if parsed.script is not None and not os.path.isfile(parsed.script):
+        parser.error(f"can't open file {parsed.script!r}")
+    try:
+        main_module = "__main__" if parsed.module is None else main_module_name(parsed.module)
+    except ImportError as error:
+        parser.error(str(error))
+    try:
+        targets = [parse_target(spec, main_module, parsed.iterations) for spec in parsed.func]
+    except ValueError as error:
+        parser.error(str(error))
+    return run(targets, parsed.script, parsed.module, args, parsed.save)
+
+
+def main(argv=None):
+    """
+    Run the command line interface.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        Arguments, by default ``sys.argv[1:]``.
+
+    Returns
+    -------
+    int
+        Exit status.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] not in (["diff"], ["collect"]):
+        return run_command(argv)
+    parser = argparse.ArgumentParser(prog="python -m codpulse")
+    commands = parser.add_subparsers(dest="command", required=True)
+    diff = commands.add_parser("diff", help="compare two saved runs line by line")
+    diff.add_argument("old", help="history file with the baseline run")
+    diff.add_argument("new", nargs="?", help="history file with the run to check (default: OLD)")
+    diff.add_argument("--name", help="function to compare (module.qualname or qualname)")
+    diff.add_argument("--alpha", type=float, default=0.01, help="significance level (default: 0.01)")
+    diff.add_argument(
+        "--threshold", type=float, default=0.05, help="smallest relative change flagged (default: 0.05)"
+    )
+    diff.set_defaults(handler=diff_command)
+    collect = commands.add_parser("collect", help="merge the statistics of all worker processes")
+    collect.add_argument(
+        "names", nargs="*", metavar="NAME", help="function (module.qualname or qualname) or segment (default: all)"
+    )
+    collect.add_argument("--unlink", action="store_true", help="delete the shared statistics after displaying them")
+    collect.set_defaults(handler=collect_command)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+class Awaited:
+    """
+    Awaitable wrapper that adds the time its coroutine spends suspended to a buffer slot.
+
+    Awaiting the wrapper drives the wrapped awaitable and times every suspension,
+    from the moment it yields to the event loop until the event loop resumes it.
+    Time the awaited coroutine spends running is not counted, so the slot holds
+    exactly the time the awaiting statement did not occupy the event loop.
+
+    Parameters
+    ----------
+    awaitable : awaitable
+        The awaited object.
+    buffer : list of float
+        Per-call buffer of the awaiting function.
+    index : int
+        Slot of `buffer` the suspended time is added to.
+    clock : callable
+        Clock read around the suspensions.
+    """
+
+    __slots__ = ("awaitable", "buffer", "index", "clock")
+
+    def __init__(self, awaitable, buffer, index, clock):
+        self.awaitable = awaitable
+        self.buffer = buffer
+        self.index = index
+        self.clock = clock
+
+    def __await__(self):
+        iterator = self.awaitable.__await__()
+        buffer, index, clock = self.buffer, self.index, self.clock
+        send, error = None, None
+        while True:
+            try:
+                if error is None:
+                    signal = iterator.send(send)
+                else:
+                    signal = iterator.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            start = clock()
+            try:
+                send, error = (yield signal), None
+            except GeneratorExit:
+                iterator.close()
+                raise
+            except BaseException as exception:
+                send, error = None, exception
+            finally:
+                buffer[index] += clock() - start
+
+
+class AwaitedIterator:
+    """
+    Asynchronous iterator wrapper that times the suspensions of ``async for``.
+
+    Parameters
+    ----------
+    iterable : asynchronous iterable
+        The iterated object.
+    buffer : list of float
+        Per-call buffer of the iterating function.
+    index : int
+        Slot of `buffer` the suspended time is added to.
+    clock : callable
+        Clock read around the suspensions.
+    """
+
+    __slots__ = ("iterator", "buffer", "index", "clock")
+
+    def __init__(self, iterable, buffer, index, clock):
+        self.iterator = iterable.__aiter__()
+        self.buffer = buffer
+        self.index = index
+        self.clock = clock
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return Awaited(self.iterator.__anext__(), self.buffer, self.index, self.clock)
+
+
+class AwaitedContext:
+    """
+    Asynchronous context manager wrapper that times the suspensions of ``async with``.
+
+    Parameters
+    ----------
+    manager : asynchronous context manager
+        The managed object.
+    buffer : list of float
+        Per-call buffer of the function.
+    index : int
+        Slot of `buffer` the suspended time is added to.
+    clock : callable
+        Clock read around the suspensions.
+    """
+
+    __slots__ = ("manager", "buffer", "index", "clock")
+
+    def __init__(self, manager, buffer, index, clock):
+        self.manager = manager
+        self.buffer = buffer
+        self.index = index
+        self.clock = clock
+
+    def __aenter__(self):
+        return Awaited(self.manager.__aenter__(), self.buffer, self.index, self.clock)
+
+    def __aexit__(self, *exc_info):
+        return Awaited(self.manager.__aexit__(*exc_info), self.buffer, self.index, self.clock)
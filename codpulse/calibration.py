@@ -0,0 +1,117 @@
+import collections
+import statistics
+from .instrumentation import compile_function
+from .recorder import Recorder, STRIDE, HITS, TOTAL
+
+Calibration = collections.namedtuple(
+    "Calibration", ["inner", "outer", "cpu_inner", "cpu_outer"], defaults=(0.0, 0.0)
+)
+Calibration.__doc__ = """
+Cost of the timing probes of the exec engine, in seconds.
+
+Every kind of instrumented code (see `calibrate`) has a calibration of its own.
+
+Attributes
+----------
+inner : float
+    Time a probe adds to the measured time of the statement it wraps, per hit.
+outer : float
+    Time a probe adds to the measured time of every statement enclosing the one it
+    wraps, per hit of the wrapped statement.
+cpu_inner : float
+    CPU time a probe adds to the measured CPU time of the statement it wraps, per hit,
+    for code with CPU-time probes; 0 otherwise.
+cpu_outer : float
+    CPU time a probe adds to the measured CPU time of every statement enclosing the one
+    it wraps, per hit of the wrapped statement, for code with CPU-time probes; 0
+    otherwise.
+"""
+
+_calibrations = {}  # kinds of probes -> Calibration
+
+
+def _empty_loop(n):
+    for _ in range(n):
+        pass
+
+
+def calibrate(iterations=20000, repeat=7, force=False, histograms=False, cpu=False, timeline=False):
+    """
+    Measure the overhead of the timing probes, once per process and kind of probes.
+
+    Parameters
+    ----------
+    iterations : int, optional
+        Number of probed empty statements per measurement, by default 20000.
+    repeat : int, optional
+        Number of measurements; the median is kept, by default 7.
+    force : bool, optional
+        Measure again even if a calibration is cached, by default False.
+    histograms : bool, optional
+        Measure the probes of code instrumented with ``histograms=True``, which also
+        count every execution in a histogram, by default False.
+    cpu : bool, optional
+        Measure the probes of code instrumented with ``cpu=True``, which also read the
+        CPU clock of the thread, and their CPU time, by default False.
+    timeline : bool, optional
+        Measure the probes of code instrumented with ``timeline=True``, which also
+        append every execution to the timeline of the call, by default False.
+
+    Returns
+    -------
+    Calibration
+        The probe overhead, cached for the lifetime of the process.
+
+    Notes
+    -----
+    An instrumented loop over ``pass`` is timed. The time recorded for ``pass``
+    itself is pure probe cost (`Calibration.inner`); the time the loop header
+    records on top of the same loop run uninstrumented is the cost every probed
+    statement adds to the statements enclosing it (`Calibration.outer`). The CPU
+    times of CPU-time probes are derived the same way from the CPU times of the lines.
+    """
+    key = (histograms, cpu, timeline)
+    if key in _calibrations and not force:
+        return _calibrations[key]
+
+    instrumented = compile_function(_empty_loop, histograms=histograms, cpu=cpu, timeline=timeline)
+    recorder = Recorder(len(instrumented.lines))
+    if histograms:
+        from .histogram import LineHistograms
+
+        recorder.histograms = LineHistograms(len(instrumented.lines))
+    if cpu:
+        from .cputime import CpuTimes
+
+        recorder.cpu = CpuTimes(len(instrumented.lines))
+    if timeline:
+        from .timeline import SlowCalls
+
+        # every execution of the loop is appended, as in a call below the limit
+        recorder.timeline = SlowCalls(1, max_executions=2 * iterations)
+    namespace = {"_cp_recorder": recorder}
+    exec(instrumented.code, namespace)
+    probed_loop = namespace[instrumented.name]
+    loop, body = 0, 1  # line ids of "for" and "pass"
+
+    inner, outer, cpu_inner, cpu_outer = [], [], [], []
+    for _ in range(repeat):
+        if cpu:
+            recorder.cpu.reset()
+            cpu_start = recorder.cpu.clock()
+        start = recorder.clock()
+        _empty_loop(iterations)
+        plain = recorder.clock() - start
+        if cpu:
+            plain_cpu = (recorder.cpu.clock() - cpu_start) * 1e-9
+        probed_loop(iterations)
+        buffer = recorder.drain()[-1]
+        hits = buffer[body * STRIDE + HITS]
+        inner.append(buffer[body * STRIDE + TOTAL] / hits)
+        outer.append((buffer[loop * STRIDE + TOTAL] - plain) / hits)
+        if cpu:
+            cpu_inner.append(recorder.cpu.buffer[body] * 1e-9 / hits)
+            cpu_outer.append((recorder.cpu.buffer[loop] * 1e-9 - plain_cpu) / hits)
+    costs = [inner, outer] + ([cpu_inner, cpu_outer] if cpu else [])
+    _calibrations[key] = Calibration(*(max(statistics.median(cost), 0.0) for cost in costs))
+    return _calibrations[key]
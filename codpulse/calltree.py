@@ -0,0 +1,440 @@
+import fnmatch
+import inspect
+import os
+import sys
+import sysconfig
+import types
+from .hotswap import HotSwap, live_function
+from .instrumentation import compile_function, line_ids
+from .recorder import Recorder, STRIDE, HITS, TOTAL, MIN, MAX
+from .table import ResultTable
+
+
+def function_key(function):
+    """
+    Identify a function by its module and qualified name.
+
+    Parameters
+    ----------
+    function : function
+        The function.
+
+    Returns
+    -------
+    str
+        ``module.qualname``.
+    """
+    return f"{function.__module__}.{function.__qualname__}"
+
+
+def _owner(function):
+    parts = function.__qualname__.split(".")[:-1]
+    if not parts or "<locals>" in parts:
+        return None
+    owner = function.__globals__.get(parts[0])
+    for part in parts[1:]:
+        owner = getattr(owner, part, None)
+    return owner if isinstance(owner, type) else None
+
+
+def resolve_call(function, name, namespace=None):
+    """
+    Find the Python function a dotted call name of a function refers to.
+
+    Parameters
+    ----------
+    function : function
+        The calling function.
+    name : str
+        Dotted name of the call, as in `InstrumentedFunction.calls`.
+    namespace : dict, optional
+        Names the caller sees in front of its globals, by default None.
+
+    Returns
+    -------
+    function or None
+        The called function, or None when it cannot be determined without running the
+        caller. The head of the name is looked up in the closure, then the globals, and
+        ``self``/``cls`` stand for the class that owns a method; attributes are only
+        followed through modules and classes. Calling a class resolves to its ``__init__``.
+    """
+    head, *attributes = name.split(".")
+    code = function.__code__
+    if head in code.co_freevars:
+        try:
+            target = function.__closure__[code.co_freevars.index(head)].cell_contents
+        except ValueError:
+            return None
+    elif namespace is not None and head in namespace:
+        target = namespace[head]
+    elif head in function.__globals__:
+        target = function.__globals__[head]
+    elif head in ("self", "cls") and code.co_argcount and code.co_varnames[0] == head:
+        target = _owner(function)
+    else:
+        return None
+    for attribute in attributes:
+        if not isinstance(target, (type, types.ModuleType)):
+            return None
+        try:
+            target = inspect.getattr_static(target, attribute)
+        except AttributeError:
+            return None
+    if isinstance(target, type):
+        target = inspect.getattr_static(target, "__init__", None)
+    try:
+        return live_function(target)
+    except TypeError:
+        return None
+
+
+def _library_paths():
+    paths = sysconfig.get_paths()
+    names = ("stdlib", "platstdlib", "purelib", "platlib")
+    roots = {os.path.abspath(paths[name]) for name in names if name in paths}
+    roots.add(os.path.dirname(os.path.abspath(__file__)))
+    return tuple(os.path.join(root, "") for root in roots)
+
+
+class CallRecorder(Recorder):
+    """
+    Recorder of an instrumented callee of a `CallTree`.
+
+    All calls of the callee accumulate into one buffer, so recording costs nothing on
+    top of the probes; the buffer holds per-line hits and times summed over every call
+    since the last `reset`. When a call finishes, its duration is charged to the line of
+    the nearest instrumented caller on the stack.
+
+    Parameters
+    ----------
+    n_lines : int
+        Number of probed lines of the callee.
+    tree : CallTree
+        Call tree the calls are recorded in.
+    key : str
+        Key of the callee (see `function_key`).
+
+    Attributes
+    ----------
+    buffer : list of float
+        Per-line buffer accumulated over all calls.
+    """
+
+    def __init__(self, n_lines, tree, key):
+        super().__init__(n_lines)
+        self.tree = tree
+        self.key = key
+        self.buffer = self._template[:]
+        self._starts = {}  # id of the running frame -> start time
+
+    def enter(self, generator=False):
+        self._starts[id(sys._getframe(1))] = self.clock()
+        return self.buffer
+
+    def exit(self, buffer):
+        frame = sys._getframe(1)
+        start = self._starts.pop(id(frame), None)
+        if start is not None:
+            self.tree.record(frame.f_back, self.key, self.clock() - start)
+
+    def reset(self):
+        """
+        Zero the accumulated buffer.
+        """
+        self.buffer[:] = self._template
+        self._starts.clear()
+
+
+class CallTree:
+    """
+    Instrument the callees of a function and aggregate the time spent in them.
+
+    Callees are found statically from the calls in the source of the function (see
+    `resolve_call`), then from the calls of those callees, breadth first. Every callee
+    is instrumented once, however many callers it has, and swapped in place while the
+    tree is active (see `codpulse.hotswap.HotSwap`), so all its call sites are profiled.
+    The compiled code comes from the shared cache of `compile_function`.
+
+    Parameters
+    ----------
+    function : callable
+        The root function.
+    instrumented : InstrumentedFunction
+        Line table of the root function.
+    code : code
+        Code object that runs when the instrumented root function is called.
+    depth : int, optional
+        Instrument callees up to this many calls below the root, by default None (no
+        limit, requires `include`).
+    include : list of str, optional
+        Only instrument functions whose module or ``module.qualname`` matches one of these
+        ``fnmatch`` patterns, e.g. ``"ourpkg.*"``, by default None: every function outside
+        the standard library and installed packages.
+    namespace : dict, optional
+        Names the root function sees in front of its globals, by default None.
+
+    Attributes
+    ----------
+    root : str
+        Key of the root function.
+    callees : dict
+        Key to the `HotSwap` of every instrumented callee, in discovery order.
+    edges : dict
+        ``(caller key, caller line id, callee key)`` to ``[calls, total time in seconds]``.
+
+    Notes
+    -----
+    Calls of a callee that is called recursively are charged to every level, and calls
+    that run concurrently in several threads can lose updates.
+    """
+
+    max_frames = 8  # frames searched upwards for an instrumented caller
+
+    def __init__(self, function, instrumented, code, depth=None, include=None, namespace=None):
+        if depth is None and include is None:
+            raise ValueError("a call tree needs a depth or include patterns")
+        function = live_function(function)
+        self.root = function_key(function)
+        self.depth = depth
+        self.include = include
+        self.callees = {}
+        self.edges = {}
+        self.lines = {self.root: instrumented.lines}
+        self.parents = {self.root: instrumented.parents}
+        self._codes = {code: (self.root, line_ids(instrumented.spans))}
+        self._library = _library_paths()
+        self._discover(function, instrumented, namespace)
+
+    def _selected(self, function):
+        if self.include is not None:
+            key = function_key(function)
+            return any(
+                fnmatch.fnmatch(function.__module__, pattern) or fnmatch.fnmatch(key, pattern)
+                for pattern in self.include
+            )
+        filename = function.__code__.co_filename
+        return not filename.startswith("<") and not os.path.abspath(filename).startswith(self._library)
+
+    def _discover(self, root, instrumented, namespace):
+        seen = {root}
+        queue = [(root, instrumented, 0)]
+        while queue:
+            function, instrumented, level = queue.pop(0)
+            if self.depth is not None and level >= self.depth:
+                continue
+            for name in instrumented.calls:
+                callee = resolve_call(function, name, namespace if function is root else None)
+                if callee is None or callee in seen or not self._selected(callee):
+                    continue
+                seen.add(callee)
+                try:
+                    callee_instrumented = compile_function(callee, live=True)
+                except (OSError, TypeError, SyntaxError):
+                    continue  # no source, lambda, ...
+                key = function_key(callee)
+                recorder = CallRecorder(len(callee_instrumented.lines), self, key)
+                self.callees[key] = HotSwap(callee, recorder)
+                self.lines[key] = callee_instrumented.lines
+                self.parents[key] = callee_instrumented.parents
+                self._codes[callee_instrumented.code] = (key, line_ids(callee_instrumented.spans))
+                queue.append((callee, callee_instrumented, level + 1))
+
+    def __enter__(self):
+        for swap in self.callees.values():
+            swap.swap()
+        return self
+
+    def __exit__(self, *exc_info):
+        for swap in self.callees.values():
+            swap.restore()
+
+    def record(self, frame, callee, elapsed):
+        """
+        Charge a finished call to the line of its nearest instrumented caller.
+
+        Parameters
+        ----------
+        frame : frame
+            Frame the call returned to.
+        callee : str
+            Key of the called function.
+        elapsed : float
+            Duration of the call, in seconds.
+        """
+        for _ in range(self.max_frames):
+            if frame is None:
+                return
+            caller = self._codes.get(frame.f_code)
+            if caller is not None:
+                break
+            frame = frame.f_back
+        else:
+            return
+        key, ids = caller
+        edge = (key, ids.get(frame.f_lineno, -1), callee)
+        totals = self.edges.get(edge)
+        if totals is None:
+            self.edges[edge] = [1, elapsed]
+        else:
+            totals[0] += 1
+            totals[1] += elapsed
+
+    def reset(self):
+        """
+        Forget the calls recorded so far.
+        """
+        for swap in self.callees.values():
+            swap.recorder.reset()
+        self.edges.clear()
+
+    def callee_time(self, key):
+        """
+        Time spent in instrumented callees by every line of a function, nested lines included.
+
+        Parameters
+        ----------
+        key : str
+            Key of the function.
+
+        Returns
+        -------
+        list of float
+            Seconds per line id, summed over all recorded calls.
+        """
+        parents = self.parents[key]
+        times = [0.0] * len(parents)
+        for (caller, line_id, _), (_, total) in list(self.edges.items()):
+            if caller == key and line_id >= 0:
+                times[line_id] += total
+        # parents have lower ids than their children
+        for line_id in range(len(parents) - 1, -1, -1):
+            if parents[line_id] >= 0:
+                times[parents[line_id]] += times[line_id]
+        return times
+
+    def add_self_time(self, table, key, iterations):
+        """
+        Add a ``self_time(in ms)`` column, the mean time minus the time spent in callees.
+
+        Parameters
+        ----------
+        table : ResultTable
+            Per-line statistics of the function with a ``mean_time(in ms)`` column.
+        key : str
+            Key of the function.
+        iterations : int
+            Number of iterations the mean time is per.
+        """
+        callee_time = self.callee_time(key)
+        self_time = [
+            mean - callee * 1000 / max(iterations, 1)
+            for mean, callee in zip(table["mean_time(in ms)"], callee_time)
+        ]
+        table.add_column("self_time(in ms)", self_time, after="mean_time(in ms)")
+
+    def tables(self, iterations):
+        """
+        Per-line statistics of every instrumented callee.
+
+        Parameters
+        ----------
+        iterations : int
+            Number of iterations of the root function; hits and times are reported per
+            iteration.
+
+        Returns
+        -------
+        dict
+            Callee key to a `ResultTable` with the hits, mean (cumulative) time, self time,
+            and fastest and slowest single execution of every line.
+        """
+        iterations = max(iterations, 1)
+        tables = {}
+        for key, swap in self.callees.items():
+            buffer = swap.recorder.buffer
+            hits, mean, fastest, slowest = [], [], [], []
+            for line_id in range(len(self.lines[key])):
+                base = line_id * STRIDE
+                ran = buffer[base + HITS] > 0
+                hits.append(buffer[base + HITS] / iterations)
+                mean.append(buffer[base + TOTAL] * 1000 / iterations if ran else float("nan"))
+                fastest.append(buffer[base + MIN] * 1000 if ran else float("nan"))
+                slowest.append(buffer[base + MAX] * 1000 if ran else float("nan"))
+            table = ResultTable(
+                {
+                    "LineNo": range(len(hits)),
+                    "line": self.lines[key],
+                    "hits": hits,
+                    "mean_time(in ms)": mean,
+                    "min_hit(in ms)": fastest,
+                    "max_hit(in ms)": slowest,
+                }
+            )
+            self.add_self_time(table, key, iterations)
+            tables[key] = table
+        return tables
+
+    def edges_table(self, iterations):
+        """
+        Aggregated calls between instrumented functions, slowest first.
+
+        Parameters
+        ----------
+        iterations : int
+            Number of iterations of the root function; calls and times are reported per
+            iteration.
+
+        Returns
+        -------
+        ResultTable
+            One row per calling line and callee, with the number of calls and their total
+            time.
+        """
+        iterations = max(iterations, 1)
+        edges = sorted(self.edges.items(), key=lambda item: -item[1][1])
+        return ResultTable(
+            {
+                "caller": [caller for (caller, _, _), _ in edges],
+                "LineNo": [line_id for (_, line_id, _), _ in edges],
+                "line": [
+                    self.lines[caller][line_id].strip() if line_id >= 0 else ""
+                    for (caller, line_id, _), _ in edges
+                ],
+                "callee": [callee for (_, _, callee), _ in edges],
+                "calls": [calls / iterations for _, (calls, _) in edges],
+                "time(in ms)": [total * 1000 / iterations for _, (_, total) in edges],
+            }
+        )
+
+
+def display_call_tree(tree, iterations, left_padding=2):
+    """
+    Print the aggregated call tree below the root function.
+
+    Parameters
+    ----------
+    tree : CallTree
+        The call tree.
+    iterations : int
+        Number of iterations of the root function; calls and times are printed per
+        iteration.
+    left_padding : int, optional
+        Indentation of the output, by default 2.
+    """
+    iterations = max(iterations, 1)
+    children = {}
+    for (caller, line_id, callee), (calls, total) in list(tree.edges.items()):
+        children.setdefault(caller, []).append((line_id, callee, calls, total))
+
+    def show(key, depth, path):
+        for line_id, callee, calls, total in sorted(children.get(key, []), key=lambda c: -c[3]):
+            line = tree.lines[key][line_id].strip() if line_id >= 0 else "?"
+            print(
+                f"{' ' * left_padding}|{'  ' * depth} LineNo {line_id} `{line}` -> {callee}: "
+                f"{round(calls / iterations, 3)} calls, {round(total * 1000 / iterations, 3)} ms"
+            )
+            if callee not in path:
+                show(callee, depth + 1, path | {callee})
+
+    print(f"{' ' * left_padding}|> Call tree of {tree.root}, per iteration:")
+    show(tree.root, 1, {tree.root})
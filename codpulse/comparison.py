@@ -0,0 +1,212 @@
+import collections
+import random
+import time
+from .TrackerClass import Tracker
+from .history import _compare, match_lines
+from .recorder import STRIDE, TOTAL
+from .significance import welch_test
+from .table import ResultTable
+from .utils import print_table
+
+Comparison = collections.namedtuple("Comparison", ["speedup", "low", "high", "table"])
+Comparison.__doc__ = """
+Result of `compare`.
+
+Attributes
+----------
+speedup : float
+    Mean time of the first function divided by the mean time of the second one; above 1
+    when the second one is faster.
+low, high : float
+    Bounds of the bootstrap confidence interval of `speedup`.
+table : ResultTable
+    The lines of both functions side by side (see `compare`).
+"""
+
+
+def bootstrap_ratio(a, b, confidence=0.95, resamples=2000, seed=None):
+    """
+    Bootstrap confidence interval of the ratio of the means of paired samples.
+
+    The pairs are resampled together, so noise both samples share, such as a slower
+    machine for a while, cancels out of the ratio.
+
+    Parameters
+    ----------
+    a, b : sequence of float
+        Paired samples of the same length.
+    confidence : float, optional
+        Confidence level, by default 0.95.
+    resamples : int, optional
+        Number of bootstrap resamples, by default 2000.
+    seed : int, optional
+        Seed of the resampling, by default None.
+
+    Returns
+    -------
+    tuple of float
+        The ratio of the means of `a` and `b`, and the bounds of its percentile interval.
+    """
+    import numpy as np
+
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    picks = np.random.default_rng(seed).integers(0, len(a), (resamples, len(a)))
+    ratios = a[picks].mean(axis=1) / b[picks].mean(axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(ratios, [tail, 100 - tail])
+    return float(a.mean() / b.mean()), float(low), float(high)
+
+
+def compare(
+    fn_a,
+    fn_b,
+    args=(),
+    kwargs=None,
+    iterations=30,
+    namespace={},
+    warmup=1,
+    confidence=0.95,
+    alpha=0.01,
+    threshold=0.05,
+    seed=None,
+):
+    """
+    Compare two implementations of a function, with their calls interleaved.
+
+    Every iteration calls both functions as they are, to measure the speedup, and their
+    instrumented copies, to measure their lines, in a random order. Runs minutes apart
+    see different thermal throttling, frequency scaling and neighbours; interleaved calls
+    see the same. The speedup is the ratio of the mean times of the uninstrumented calls,
+    so the probes of a version with more lines do not bias it, with a paired bootstrap
+    confidence interval (see `bootstrap_ratio`).
+
+    The lines of both versions are matched by their source text (see
+    `codpulse.history.match_lines`); lines only one version has are listed on their own.
+
+    Parameters
+    ----------
+    fn_a, fn_b : callable
+        The current and the new implementation; plain functions taking the same arguments.
+    args : tuple, optional
+        Positional arguments of every call, by default none.
+    kwargs : dict, optional
+        Keyword arguments of every call, by default none.
+    iterations : int, optional
+        Number of iterations, by default 30.
+    namespace : dict, optional
+        Additional namespace of the instrumented copies (see `Tracker`), by default empty.
+    warmup : int, optional
+        Calls of every function and copy run first and discarded, by default 1.
+    confidence : float, optional
+        Confidence level of the speedup interval, by default 0.95.
+    alpha : float, optional
+        Significance level of the Welch t-tests of the lines, by default 0.01.
+    threshold : float, optional
+        Smallest relative change of a line that is flagged, by default 0.05.
+    seed : int, optional
+        Seed of the call order and the bootstrap, by default None.
+
+    Returns
+    -------
+    Comparison
+        The speedup with its interval and the table of the lines, also printed. The table
+        has one row for the total, timed on the uninstrumented calls, whose line ids
+        ``b_LineNo`` and ``a_LineNo`` are -1, and one per line: its line ids in both
+        versions (None in the version it is missing from), the mean times per call of the
+        instrumented copies, the speedup of the line, the p-value of the Welch t-test of
+        the line and a status, ``"faster"``, ``"slower"``, ``"only a"``, ``"only b"`` or
+        empty when the change is not significant. The status of the total is the verdict
+        of the speedup interval, the one printed in the header, and its p-value is NaN.
+
+    Examples
+    --------
+    >>> result = codpulse.compare(parse, parse_fast, (document,), iterations=50)
+    >>> result.speedup, result.low, result.high
+    """
+    kwargs = kwargs or {}
+    trackers = [Tracker(fn, namespace, no_iterations=iterations) for fn in (fn_a, fn_b)]
+    if any(tracker.is_async for tracker in trackers):
+        raise ValueError("compare requires plain functions")
+    calls = [
+        (0, fn_a),
+        (1, fn_b),
+        (0, trackers[0].executable_function),
+        (1, trackers[1].executable_function),
+    ]
+    for _, function in calls:
+        for i in range(warmup):
+            function(*args, **kwargs)
+    plain = ([], [])
+    rng = random.Random(seed)
+    for tracker in trackers:
+        tracker._start()
+    for i in range(iterations):
+        rng.shuffle(calls)
+        for side, function in calls:
+            t1 = time.perf_counter()
+            function(*args, **kwargs)
+            t2 = time.perf_counter()
+            if function is fn_a or function is fn_b:
+                plain[side].append((t2 - t1) * 1000)
+            else:
+                trackers[side].total_time.append((t2 - t1) * 1000)
+    speedup, low, high = bootstrap_ratio(*plain, confidence, seed=seed)
+
+    tables = []
+    for tracker in trackers:
+        tracker[1] = tracker._process(tracker.recorder)
+        tables.append(tracker.analysis_table)
+    rows = {
+        "b_LineNo": [],
+        "line": [],
+        "a_LineNo": [],
+        "a_time(in ms)": [],
+        "b_time(in ms)": [],
+        "speedup": [],
+        "p_value": [],
+        "status": [],
+    }
+
+    def add(b_id, text, a_id, a_time, b_time, p, status):
+        rows["b_LineNo"].append(b_id)
+        rows["line"].append(text)
+        rows["a_LineNo"].append(a_id)
+        rows["a_time(in ms)"].append(a_time)
+        rows["b_time(in ms)"].append(b_time)
+        rows["speedup"].append(a_time / b_time if a_time == a_time and b_time else float("nan"))
+        rows["p_value"].append(p)
+        rows["status"].append(status)
+
+    # the total is judged by the speedup interval alone, so the header and its row agree
+    status = "faster" if low > 1 else "slower" if high < 1 else ""
+    a_mean, b_mean = sum(plain[0]) / iterations, sum(plain[1]) / iterations
+    nan = float("nan")
+    add(-1, "<total>", -1, a_mean, b_mean, nan, status)
+    lines = [tracker.instrumented.lines for tracker in trackers]
+    samples = [
+        [
+            [buffer[line_id * STRIDE + TOTAL] * 1000 for buffer in tracker.recorder.calls]
+            for line_id in range(len(line_text))
+        ]
+        for tracker, line_text in zip(trackers, lines)
+    ]
+    means = [table["mean_time(in ms)"] for table in tables]
+    for a_id, b_id in match_lines(*lines):
+        if b_id is None:
+            add(None, lines[0][a_id], a_id, means[0][a_id], nan, nan, "only a")
+        elif a_id is None:
+            add(b_id, lines[1][b_id], None, nan, means[1][b_id], nan, "only b")
+        else:
+            a_time, b_time = means[0][a_id], means[1][b_id]
+            p = welch_test(samples[0][a_id], samples[1][b_id])[1]
+            add(b_id, lines[1][b_id], a_id, a_time, b_time, p, _compare(a_time, b_time, p, alpha, threshold))
+    table = ResultTable(rows)
+
+    percent = round(confidence * 100)
+    verdict = status or "not significantly different"
+    print_table(
+        table,
+        f"|> {fn_a.__name__} vs {fn_b.__name__}, #iter: {iterations}, speedup: {speedup:.3f}x "
+        f"({percent}% CI {low:.3f}-{high:.3f}), {fn_b.__name__} is {verdict}",
+    )
+    return Comparison(speedup, low, high, table)
@@ -0,0 +1,121 @@
+import math
+
+MODELS = (
+    ("O(1)", lambda n: 0.0 * n),
+    ("O(log n)", lambda n: math.log(n)),
+    ("O(n)", lambda n: n),
+    ("O(n log n)", lambda n: n * math.log(n)),
+    ("O(n^2)", lambda n: n * n),
+)
+
+
+class ComplexityFit:
+    """
+    Growth classes fitted to the times of several lines over a range of input sizes.
+
+    Every line is fitted to ``a + b * f(n)`` for every `f` of `MODELS` by least squares on
+    relative residuals, ``(a + b * f(n) - t) / t``, all lines at once, so the short times
+    of the small sizes weigh as much as the long ones of the large sizes. A line gets the
+    model with the smallest residuals among those with a growing ``b``, unless that model
+    explains less than `min_r2` of the variation of its times, or its times vary by less
+    than `min_spread`. The line is then noise around a constant: O(1). When the residuals
+    of another model are less than `margin` times those of the best one, the sizes do not
+    tell the two apart and the line is ``"ambiguous"``.
+
+    Parameters
+    ----------
+    sizes : sequence of float
+        The input sizes, at least three, all positive.
+    times : sequence of sequence of float
+        Time of every line (columns) at every size (rows).
+    min_r2 : float, optional
+        Smallest coefficient of determination of a growing model, by default 0.8.
+    min_spread : float, optional
+        Smallest difference between the longest and shortest time of a growing line, in
+        the unit of `times`, by default 0.0.
+    margin : float, optional
+        Smallest ratio of the residuals of the second best model to those of the best
+        one, by default 2.0.
+
+    Attributes
+    ----------
+    labels : list of str
+        Growth class of every line, e.g. ``"O(n log n)"``, or ``"ambiguous"``.
+    r2 : list of float
+        Coefficient of determination of the best model of every line, on relative
+        residuals; NaN for O(1) lines.
+    coefficients : list of tuple of float
+        Constant and factor ``(a, b)`` of the best model of every line.
+
+    Examples
+    --------
+    >>> fit = ComplexityFit([10, 100, 1000], [[1.0, 0.5], [10.0, 0.5], [100.0, 0.5]])
+    >>> fit.labels
+    ['O(n)', 'O(1)']
+    >>> round(fit.predict(10_000)[0], 3)
+    1000.0
+    """
+
+    def __init__(self, sizes, times, min_r2=0.8, min_spread=0.0, margin=2.0):
+        import numpy as np
+
+        sizes = np.asarray(sizes, dtype=float)
+        times = np.asarray(times, dtype=float).reshape(len(sizes), -1)
+        if len(sizes) < 3 or (sizes <= 0).any():
+            raise ValueError("a complexity fit needs at least three positive sizes")
+        times = np.nan_to_num(times)
+        # times that are zero would get an infinite weight
+        scale = np.maximum(np.abs(times), np.abs(times).max(axis=0) * 1e-3 + 1e-12)
+        weights = scale ** -2.0
+        w0 = weights.sum(axis=0)
+        wy = (weights * times).sum(axis=0)
+        mean = wy / w0
+        total = (weights * (times - mean) ** 2).sum(axis=0)
+        n_models, n_lines = len(MODELS), times.shape[1]
+        residuals = np.full((n_models, n_lines), np.inf)
+        coefficients = np.zeros((n_models, 2, n_lines))
+        coefficients[0, 0] = mean
+        residuals[0] = total
+        for m, (_, model) in enumerate(MODELS[1:], 1):
+            x = np.array([model(n) for n in sizes])[:, None]
+            # normal equations of the weighted fit, solved for every line at once
+            wx = (weights * x).sum(axis=0)
+            wxx = (weights * x * x).sum(axis=0)
+            wxy = (weights * x * times).sum(axis=0)
+            det = w0 * wxx - wx ** 2
+            with np.errstate(divide="ignore", invalid="ignore"):
+                a = (wxx * wy - wx * wxy) / det
+                b = (w0 * wxy - wx * wy) / det
+            error = (weights * (a + b * x - times) ** 2).sum(axis=0)
+            residuals[m] = np.where(b > 0, error, np.inf)
+            coefficients[m] = np.nan_to_num(np.array([a, b]))
+        ranked = np.sort(residuals, axis=0)
+        best = residuals.argmin(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = np.where(total > 0, 1 - ranked[0] / total, np.nan)
+            clear = ranked[1] >= margin * ranked[0]
+        spread = times.max(axis=0) - times.min(axis=0)
+        best = np.where((r2 >= min_r2) & (spread >= min_spread), best, 0)
+        self.labels = [MODELS[m][0] if m == 0 or ok else "ambiguous" for m, ok in zip(best, clear)]
+        self.r2 = [float(value) if m else float("nan") for value, m in zip(r2, best)]
+        self.coefficients = [
+            (float(coefficients[m, 0, line]), float(coefficients[m, 1, line]))
+            for line, m in enumerate(best)
+        ]
+        self._models = [MODELS[m][1] for m in best]
+
+    def predict(self, size):
+        """
+        Projected time of every line at an input size.
+
+        Parameters
+        ----------
+        size : float
+            The input size, positive.
+
+        Returns
+        -------
+        list of float
+            Projected time of every line, in the unit of the fitted times.
+        """
+        return [a + b * model(size) for (a, b), model in zip(self.coefficients, self._models)]
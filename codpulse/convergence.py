@@ -0,0 +1,167 @@
+import math
+import time
+from .significance import t_critical
+
+
+def relative_ci(mean, std, count, confidence=0.95):
+    """
+    Half-width of the Student t confidence interval of a mean, relative to the mean.
+
+    Parameters
+    ----------
+    mean, std : float
+        Sample mean and sample standard deviation.
+    count : int
+        Number of values.
+    confidence : float, optional
+        Confidence level, by default 0.95.
+
+    Returns
+    -------
+    float
+        The relative half-width, NaN with fewer than two values or a mean that is not
+        positive.
+
+    Examples
+    --------
+    >>> round(relative_ci(10.0, 1.0, 10), 4)
+    0.0715
+    """
+    if count < 2 or not mean > 0 or not math.isfinite(std):
+        return float("nan")
+    return t_critical(count - 1, confidence) * std / math.sqrt(count) / mean
+
+
+class Convergence:
+    """
+    Stopping rule of ``Tracker(..., no_iterations="auto")``.
+
+    The iterations go on until the confidence interval of the mean time of every hot
+    line, and of the total, is within `target_rel_ci` of the mean, or until `max_time_s`
+    have passed. Hot lines are those taking at least `hot_fraction` of the mean total time;
+    cheaper lines are too noisy to wait for and matter little. The precision is checked
+    after `min_iterations`, then every time the number of iterations grew by a tenth, so
+    checking stays cheap next to the iterations.
+
+    Parameters
+    ----------
+    target_rel_ci : float, optional
+        Largest half-width of the 95% confidence intervals, relative to the means, by
+        default 0.05.
+    max_time_s : float, optional
+        Time budget of the iterations in seconds, by default 10.0.
+    min_iterations : int, optional
+        Iterations run before the precision is first checked, by default 5.
+    hot_fraction : float, optional
+        Share of the mean total time from which a line counts as hot, by default 0.05.
+
+    Attributes
+    ----------
+    precision : float
+        Largest relative half-width of the hot lines and the total at the last check.
+    reason : str or None
+        Why the iterations stopped: "converged" or "time budget".
+    elapsed : float
+        Seconds spent since `start`, at the last update.
+    """
+
+    def __init__(self, target_rel_ci=0.05, max_time_s=10.0, min_iterations=5, hot_fraction=0.05):
+        self.target_rel_ci = target_rel_ci
+        self.max_time_s = max_time_s
+        self.min_iterations = min_iterations
+        self.hot_fraction = hot_fraction
+        self.start()
+
+    def start(self):
+        """
+        Start the time budget and forget the last checks.
+        """
+        self.precision = float("nan")
+        self.reason = None
+        self.elapsed = 0.0
+        self._started = time.perf_counter()
+        self._next_check = self.min_iterations
+
+    def update(self, tracker):
+        """
+        Decide whether the iterations run so far by a tracker are enough.
+
+        Parameters
+        ----------
+        tracker : Tracker
+            The running tracker, after an iteration or a batch of them.
+
+        Returns
+        -------
+        bool
+            True to stop.
+        """
+        self.elapsed = time.perf_counter() - self._started
+        iterations = tracker._iterations()
+        if iterations >= self._next_check:
+            self._next_check = iterations + max(1, iterations // 10)
+            self.precision = self.measure(tracker._process(tracker.recorder), tracker.total_time)
+            if self.precision <= self.target_rel_ci:
+                self.reason = "converged"
+                return True
+        if self.elapsed >= self.max_time_s:
+            self.reason = "time budget"
+            return True
+        return False
+
+    def measure(self, table, total_time):
+        """
+        Largest relative half-width of the confidence intervals of the hot lines and the total.
+
+        Parameters
+        ----------
+        table : ResultTable
+            Per-line statistics, with mean and standard deviation columns.
+        total_time : list or RunningStats
+            Total time of every iteration, in ms.
+
+        Returns
+        -------
+        float
+            The precision, NaN with fewer than two iterations.
+        """
+        if hasattr(total_time, "std"):
+            mean, std, count = float(total_time.mean), float(total_time.std), total_time.count
+        else:
+            count = len(total_time)
+            mean = sum(total_time) / count if count else float("nan")
+            std = (
+                math.sqrt(sum((x - mean) ** 2 for x in total_time) / (count - 1))
+                if count > 1
+                else float("nan")
+            )
+        precisions = [relative_ci(mean, std, count)]
+        for line_mean, line_std in zip(table["mean_time(in ms)"], table["std_time(in ms)"]):
+            if line_mean >= self.hot_fraction * mean:
+                precisions.append(relative_ci(line_mean, line_std, count))
+        precisions = [precision for precision in precisions if precision == precision]
+        return max(precisions) if precisions else float("nan")
+
+    def columns(self, table, iterations):
+        """
+        Relative precision of the mean time of every line.
+
+        Parameters
+        ----------
+        table : ResultTable
+            Per-line statistics, with mean and standard deviation columns.
+        iterations : int
+            Number of iterations the statistics are over.
+
+        Returns
+        -------
+        dict
+            ``rel_ci(%)``, the half-width of the 95% confidence interval of every line's
+            mean time in percent of the mean.
+        """
+        return {
+            "rel_ci(%)": [
+                relative_ci(mean, std, iterations) * 100
+                for mean, std in zip(table["mean_time(in ms)"], table["std_time(in ms)"])
+            ]
+        }
@@ -0,0 +1,83 @@
+import array
+import time
+
+
+class CpuTimes:
+    """
+    CPU time of every line of an instrumented function (see ``cpu_time``).
+
+    The CPU probes read `time.thread_time_ns` before and after every statement, inside
+    its wall-clock probes, and add the difference to the slot of its line id. The
+    clock and the slots are integers, nanoseconds in an ``array('q')``, so the probes
+    do no float arithmetic. Like the memory measurements, the CPU times of all calls
+    accumulate in one buffer.
+
+    The wall time of a line minus its CPU time is the time its thread was blocked:
+    waiting for I/O, a lock, a sleep or the GIL. Reading the CPU clock is a system call,
+    much slower than reading the wall clock, and only part of it falls between the two
+    readings of a line; left alone, the rest would show up as blocked time of every
+    cheap line. Both are therefore corrected for the cost of the probes of the line and
+    of the lines nested in it (see `codpulse.calibration.calibrate`).
+
+    Parameters
+    ----------
+    n_lines : int
+        Number of probed lines of the instrumented function.
+
+    Attributes
+    ----------
+    buffer : array.array
+        CPU time of every line id summed over all calls, in ns.
+    clock : callable
+        Clock read by the probes.
+    """
+
+    clock = staticmethod(time.thread_time_ns)
+
+    def __init__(self, n_lines):
+        self.n_lines = n_lines
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the CPU times recorded so far.
+        """
+        self.buffer = array.array("q", bytes(8 * self.n_lines))
+
+    def columns(self, calls, wall, hits, parents, calibration):
+        """
+        Per-line CPU time columns of a result table.
+
+        Parameters
+        ----------
+        calls : int
+            Number of calls the CPU times were recorded over.
+        wall : sequence of float
+            Mean wall time of every line per call, in ms.
+        hits : sequence of float
+            Mean number of executions of every line per call.
+        parents : sequence of int
+            Line id of the statement enclosing every line, or -1.
+        calibration : Calibration
+            Cost of the probes, calibrated with ``cpu=True``.
+
+        Returns
+        -------
+        dict
+            ``cpu_time(in ms)``, the mean CPU time of every line per call, and
+            ``blocked_time(in ms)``, its wall time minus its CPU time, both without the
+            probes and at least 0.
+        """
+        import numpy as np
+        from .utils import ancestor_matrix
+
+        hits = np.asarray(hits, dtype=float)
+        nested = hits @ ancestor_matrix(parents)
+        cpu = np.full(self.n_lines, np.nan)
+        if calls:
+            cpu = np.asarray(self.buffer, dtype=float) / calls / 1e6
+        # a line includes its own probes and, through its nested lines, theirs
+        cpu = np.clip(cpu - (hits * calibration.cpu_inner + nested * calibration.cpu_outer) * 1000, 0.0, None)
+        wall = np.asarray(wall, dtype=float) - (hits * calibration.inner + nested * calibration.outer) * 1000
+        blocked = np.clip(wall - cpu, 0.0, None)
+        return {"cpu_time(in ms)": cpu.tolist(), "blocked_time(in ms)": blocked.tolist()}
@@ -0,0 +1,224 @@
+SUB_BITS = 4  # every power of two is split into 2 ** SUB_BITS buckets, ~3% relative error
+MAX_BITS = 44  # executions of 2 ** 44 ns (about 4.9 hours) and longer share the last bucket
+BUCKETS = ((MAX_BITS - SUB_BITS) << SUB_BITS) + (1 << SUB_BITS)
+_SPARKS = " ▁▂▃▄▅▆▇█"
+
+
+def bucket_index(ns):
+    """
+    Index of the histogram bucket of a duration.
+
+    Durations below ``2 ** (SUB_BITS + 1)`` ns get a bucket each; above, every power of
+    two is split into ``2 ** SUB_BITS`` buckets of equal width, as in HDR histograms.
+
+    Parameters
+    ----------
+    ns : int
+        Duration in nanoseconds, not negative.
+
+    Returns
+    -------
+    int
+        The bucket, below `BUCKETS`.
+    """
+    shift = ns.bit_length() - SUB_BITS - 1
+    if shift <= 0:
+        return ns
+    return min((shift << SUB_BITS) + (ns >> shift), BUCKETS - 1)
+
+
+def bucket_bounds(index):
+    """
+    Durations a histogram bucket holds.
+
+    Parameters
+    ----------
+    index : int
+        The bucket.
+
+    Returns
+    -------
+    tuple of int
+        Smallest duration of the bucket and smallest duration of the next one, in ns.
+    """
+    if index < 2 << SUB_BITS:
+        return index, index + 1
+    shift = (index >> SUB_BITS) - 1
+    low = (index - (shift << SUB_BITS)) << shift
+    return low, low + (1 << shift)
+
+
+class LineHistograms:
+    """
+    Log-bucketed histograms of the single-execution times of every line.
+
+    Every line has `BUCKETS` counters, whatever the number of executions, and recording
+    an execution is a constant-time bucket lookup (see `bucket_index`). Histograms of
+    the same function recorded in other iterations, threads or processes are combined
+    with `merge`.
+
+    Parameters
+    ----------
+    n_lines : int
+        Number of probed lines of the instrumented function.
+
+    Attributes
+    ----------
+    counts : list of int
+        Flat counters, ``BUCKETS`` per line id.
+
+    Examples
+    --------
+    >>> histograms = LineHistograms(1)
+    >>> for seconds in (1e-5, 1e-5, 1e-5, 5e-2):
+    ...     histograms.record(0, seconds)
+    >>> round(histograms.percentile(0, 50) * 1e6), round(histograms.percentile(0, 99) * 1e3, 1)
+    (10, 49.3)
+    """
+
+    def __init__(self, n_lines):
+        self.n_lines = n_lines
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the executions recorded so far.
+        """
+        self.counts = [0] * (self.n_lines * BUCKETS)
+
+    def record(self, line_id, seconds):
+        """
+        Count one execution of a line; called by the histogram probes.
+
+        Parameters
+        ----------
+        line_id : int
+            The line.
+        seconds : float
+            Time of the execution.
+        """
+        # bucket_index, inlined
+        ns = int(seconds * 1e9)
+        shift = ns.bit_length() - SUB_BITS - 1
+        if shift > 0:
+            ns = (shift << SUB_BITS) + (ns >> shift)
+            if ns >= BUCKETS:
+                ns = BUCKETS - 1
+        self.counts[line_id * BUCKETS + ns] += 1
+
+    def merge(self, other):
+        """
+        Add the executions of other histograms of the same function to these ones.
+
+        Parameters
+        ----------
+        other : LineHistograms
+            Histograms recorded elsewhere, e.g. in another thread or worker process.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def line(self, line_id):
+        """
+        Counters of a line.
+
+        Parameters
+        ----------
+        line_id : int
+            The line.
+
+        Returns
+        -------
+        list of int
+            Executions in every bucket.
+        """
+        return self.counts[line_id * BUCKETS : (line_id + 1) * BUCKETS]
+
+    def percentile(self, line_id, q):
+        """
+        Percentile of the execution times of a line.
+
+        Parameters
+        ----------
+        line_id : int
+            The line.
+        q : float
+            Percentile, between 0 and 100.
+
+        Returns
+        -------
+        float
+            Middle of the bucket holding the percentile, in seconds; NaN if the line never
+            ran.
+        """
+        counts = self.line(line_id)
+        total = sum(counts)
+        if not total:
+            return float("nan")
+        rank = max(q / 100 * total, 1)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return (low + high - 1) / 2 * 1e-9
+        return float("nan")
+
+    def columns(self, percentiles=(50, 90, 99)):
+        """
+        Percentiles of the single-execution times of every line.
+
+        Parameters
+        ----------
+        percentiles : sequence of float, optional
+            Percentiles to report, by default 50, 90 and 99.
+
+        Returns
+        -------
+        dict
+            ``hit_p<q>(in ms)`` for every percentile, one value per line.
+        """
+        return {
+            f"hit_p{q}(in ms)": [self.percentile(line_id, q) * 1000 for line_id in range(self.n_lines)]
+            for q in percentiles
+        }
+
+    def sparklines(self, width=12):
+        """
+        Render the histogram of every line as a short string of block characters.
+
+        All lines share one logarithmic time axis, from the fastest to the slowest
+        execution of any line, so the strings can be compared down a table column.
+
+        Parameters
+        ----------
+        width : int, optional
+            Most characters per line, by default 12. Every character covers at least one
+            power of two.
+
+        Returns
+        -------
+        list of str
+            One string per line; empty for lines that never ran.
+        """
+        octaves = [[0] * (MAX_BITS + 1) for _ in range(self.n_lines)]
+        used = set()
+        for line_id in range(self.n_lines):
+            for index, count in enumerate(self.line(line_id)):
+                if count:
+                    octave = bucket_bounds(index)[0].bit_length()
+                    octaves[line_id][octave] += count
+                    used.add(octave)
+        if not used:
+            return [""] * self.n_lines
+        first, last = min(used), max(used)
+        step = -(-(last - first + 1) // width)
+        lines = []
+        for counts in octaves:
+            bins = [sum(counts[i : i + step]) for i in range(first, last + 1, step)]
+            peak = max(bins)
+            lines.append(
+                "".join(_SPARKS[-(-count * (len(_SPARKS) - 1) // peak)] for count in bins)
+                if peak
+                else ""
+            )
+        return lines
@@ -0,0 +1,490 @@
+import array
+import difflib
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from .instrumentation import ENGINE_VERSION
+from .recorder import STRIDE, HITS, TOTAL
+from .significance import welch_from_stats, welch_test
+from .table import ResultTable
+
+MAGIC = b"CPRN"
+FORMAT_VERSION = 1
+_RECORD = struct.Struct("<4sHHIQ")  # magic, format version, reserved, header size, body size
+_ITEM = 8  # every array is float64, little-endian
+
+
+def environment():
+    """
+    Describe the machine and interpreter a run is recorded on.
+
+    Returns
+    -------
+    dict
+        Python version and implementation, platform, machine, host name, CPU count and
+        the codpulse engine version.
+    """
+    import platform
+    import socket
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "host": socket.gethostname(),
+        "cpus": os.cpu_count(),
+        "engine": ENGINE_VERSION,
+    }
+
+
+def source_hash(lines):
+    """
+    Hash the source text of the probed lines of a function.
+
+    Parameters
+    ----------
+    lines : sequence of str
+        Source text of every probed line.
+
+    Returns
+    -------
+    str
+        Hex digest.
+    """
+    return hashlib.sha256("\n".join(lines).encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class Run:
+    """
+    Per-line results of one `Tracker` call, as stored in a history file.
+
+    Numeric data is kept in columns of float64: one value per line for every column of
+    the result table, the total time of every iteration, and the time of every line in
+    every iteration. Runs loaded with `load_history` read these columns straight from
+    the memory-mapped file.
+
+    Parameters
+    ----------
+    header : dict
+        Metadata and, under ``"arrays"``, the position of every array in `body`.
+    body : memoryview
+        Little-endian float64 data of the arrays.
+
+    Attributes
+    ----------
+    name : str
+        Qualified name of the tracked function.
+    lines : list of str
+        Source text of every probed line.
+    iterations : int
+        Number of iterations of the run.
+    created : float
+        Time the run was recorded, in seconds since the epoch.
+    source_hash : str
+        Hash of `lines` (see `source_hash`).
+    environment : dict
+        Machine and interpreter of the run (see `environment`).
+    columns : list of str
+        Names of the per-line columns.
+    label : str or None
+        What recorded the run, e.g. the id of a test (see `capture`).
+    """
+
+    def __init__(self, header, body):
+        self.header = header
+        self.name = header["name"]
+        self.lines = header["lines"]
+        self.iterations = header["iterations"]
+        self.created = header["created"]
+        self.source_hash = header["source_hash"]
+        self.environment = header["environment"]
+        self.columns = header["columns"]
+        self.label = header.get("label")
+        self._body = body
+
+    def __repr__(self):
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+        return f"Run({self.name!r}, created={created!r}, iterations={self.iterations}, lines={len(self.lines)})"
+
+    def _array(self, key):
+        position = self.header["arrays"].get(key)
+        if position is None:
+            return None
+        offset, length = position
+        view = self._body[offset : offset + length * _ITEM]
+        if sys.byteorder == "little":
+            return view.cast("d")
+        values = array.array("d", view)
+        values.byteswap()
+        return values
+
+    def column(self, name):
+        """
+        Get a per-line column.
+
+        Parameters
+        ----------
+        name : str
+            Column name, e.g. ``"mean_time(in ms)"``.
+
+        Returns
+        -------
+        sequence of float
+            One value per line.
+        """
+        if name not in self.columns:
+            raise KeyError(name)
+        return self._array(f"column:{name}")
+
+    @property
+    def total_time(self):
+        """
+        Total time of every iteration, in ms, or None if only its statistics were kept.
+
+        Returns
+        -------
+        sequence of float or None
+        """
+        return self._array("total_time")
+
+    @property
+    def total_stats(self):
+        """
+        Mean and standard deviation of the total time of an iteration, in ms.
+
+        Returns
+        -------
+        tuple of float
+        """
+        return self.header["total_mean"], self.header["total_std"]
+
+    def samples(self, line_id):
+        """
+        Time of a line in every iteration, in ms, NaN in iterations that did not run it.
+
+        Parameters
+        ----------
+        line_id : int
+            Line id.
+
+        Returns
+        -------
+        sequence of float or None
+            One value per iteration, or None when the run kept no per-iteration times
+            (streaming and sampling runs).
+        """
+        values = self._array("samples")
+        if values is None:
+            return None
+        return values[line_id * self.iterations : (line_id + 1) * self.iterations]
+
+    def table(self):
+        """
+        Get the per-line columns as a table, in the format of the run's result table.
+
+        Returns
+        -------
+        ResultTable
+        """
+        columns = {"LineNo": range(len(self.lines)), "line": self.lines}
+        for name in self.columns:
+            columns[name] = list(self.column(name))
+        return ResultTable(columns)
+
+
+def capture(tracker, label=None):
+    """
+    Build a `Run` from the results of the last call of a tracker.
+
+    Parameters
+    ----------
+    tracker : Tracker
+        A tracker that was called at least once.
+    label : str, optional
+        Tells apart runs of the same function recorded by different callers, e.g. tests
+        calling it with different arguments, by default None.
+
+    Returns
+    -------
+    Run
+        The run, not yet stored.
+    """
+    table = getattr(tracker, "analysis_table", None)
+    if table is None:
+        raise ValueError("the tracker has no results yet, call it first")
+    lines = list(tracker.instrumented.lines)
+    arrays = {}
+    for name in table.columns[2:]:
+        arrays[f"column:{name}"] = [float(value) for value in table[name]]
+    total_time = tracker.total_time
+    iterations = tracker._iterations()
+    if hasattr(total_time, "std"):
+        total_mean, total_std = float(total_time.mean), float(total_time.std)
+    else:
+        total_time = [float(value) for value in total_time]
+        arrays["total_time"] = total_time
+        total_mean = sum(total_time) / iterations if iterations else float("nan")
+        total_std = (
+            math.sqrt(sum((x - total_mean) ** 2 for x in total_time) / (iterations - 1))
+            if iterations > 1
+            else float("nan")
+        )
+    calls = list(tracker.recorder.calls) if tracker.mode == "instrument" and not tracker.streaming else None
+    # the samples of a line are stored by iteration, which takes one buffer per iteration
+    if calls and len(calls) == iterations:
+        samples = []
+        for line_id in range(len(lines)):
+            base = line_id * STRIDE
+            samples.extend(
+                buffer[base + TOTAL] * 1000 if buffer[base + HITS] else float("nan")
+                for buffer in calls
+            )
+        arrays["samples"] = samples
+    header = {
+        "name": f"{tracker.function_object.__module__}.{tracker.function_object.__qualname__}",
+        "lines": lines,
+        "iterations": iterations,
+        "created": time.time(),
+        "source_hash": source_hash(lines),
+        "environment": environment(),
+        "columns": table.columns[2:],
+        "total_mean": total_mean,
+        "total_std": total_std,
+    }
+    if label is not None:
+        header["label"] = label
+    return _build(header, arrays)
+
+
+def _build(header, arrays):
+    body = array.array("d")
+    positions = {}
+    for key, values in arrays.items():
+        positions[key] = (len(body) * _ITEM, len(values))
+        body.extend(values)
+    if sys.byteorder != "little":
+        body.byteswap()
+    header = dict(header, arrays=positions)
+    return Run(header, memoryview(body.tobytes()))
+
+
+def _encode(run):
+    header = json.dumps(run.header, allow_nan=True, separators=(",", ":")).encode("utf-8")
+    # pad the header so the arrays start on an 8-byte boundary
+    header += b" " * (-(_RECORD.size + len(header)) % _ITEM)
+    body = bytes(run._body)
+    return _RECORD.pack(MAGIC, FORMAT_VERSION, 0, len(header), len(body)) + header + body
+
+
+def append_run(path, run):
+    """
+    Append a run to a history file, creating it if needed.
+
+    Parameters
+    ----------
+    path : str
+        History file.
+    run : Run
+        The run to store.
+    """
+    with open(path, "ab") as f:
+        f.write(_encode(run))
+
+
+def load_history(path, name=None):
+    """
+    Load the runs of a history file.
+
+    The file is memory-mapped, and only the metadata of every run is parsed: the
+    columns of a run are read from the mapping when they are used.
+
+    Parameters
+    ----------
+    path : str
+        History file written by `append_run` or `Tracker.save`.
+    name : str, optional
+        Only return the runs of this function (``module.qualname``, or just the qualified
+        name), by default all runs.
+
+    Returns
+    -------
+    list of Run
+        The runs, oldest first.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a codpulse history or is truncated.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(data)
+    runs, offset = [], 0
+    while offset < len(view):
+        if len(view) - offset < _RECORD.size:
+            raise ValueError(f"{path}: truncated record at byte {offset}")
+        magic, version, _, header_size, body_size = _RECORD.unpack_from(view, offset)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a codpulse history (bad record at byte {offset})")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path}: record format {version} is newer than this codpulse")
+        start = offset + _RECORD.size
+        end = start + header_size + body_size
+        if end > len(view):
+            raise ValueError(f"{path}: truncated record at byte {offset}")
+        header = json.loads(bytes(view[start : start + header_size]))
+        if name is None or header["name"] == name or header["name"].endswith(f".{name}"):
+            runs.append(Run(header, view[start + header_size : end]))
+        offset = end
+    return runs
+
+
+def match_lines(old_lines, new_lines):
+    """
+    Pair the lines of two versions of a function by their source text.
+
+    Parameters
+    ----------
+    old_lines, new_lines : sequence of str
+        Source text of the probed lines of both versions.
+
+    Returns
+    -------
+    list of tuple
+        ``(old line id, new line id)`` pairs in source order, with None on the side
+        where a line was added or removed.
+    """
+    old_text = [line.strip() for line in old_lines]
+    new_text = [line.strip() for line in new_lines]
+    matcher = difflib.SequenceMatcher(None, old_text, new_text, autojunk=False)
+    pairs = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            pairs.extend(zip(range(i1, i2), range(j1, j2)))
+        else:
+            pairs.extend((i, None) for i in range(i1, i2))
+            pairs.extend((None, j) for j in range(j1, j2))
+    return pairs
+
+
+def _compare(old_mean, new_mean, p, alpha, threshold):
+    if not (old_mean == old_mean and new_mean == new_mean) or p != p or p >= alpha:
+        return ""
+    if new_mean > old_mean * (1 + threshold):
+        return "slower"
+    if new_mean < old_mean * (1 - threshold):
+        return "faster"
+    return ""
+
+
+def diff_runs(old, new, alpha=0.01, threshold=0.05):
+    """
+    Compare two runs line by line.
+
+    Lines are matched by their source text, so lines that moved because code was added
+    or removed above them are still compared. The times of matched lines are compared
+    with Welch's t-test, on the per-iteration times of both runs when they were kept and
+    on the mean and standard deviation of every line otherwise.
+
+    Parameters
+    ----------
+    old, new : Run
+        The baseline and the run to check.
+    alpha : float, optional
+        Significance level, by default 0.01.
+    threshold : float, optional
+        Smallest relative change of the mean time that is flagged, by default 0.05.
+
+    Returns
+    -------
+    ResultTable
+        One row for the total time (``LineNo`` -1) and one per line: the line ids in both
+        runs (-1 for added and removed lines), the mean times, the relative change in
+        percent, the p-value and a status, ``"slower"``, ``"faster"``, ``"added"``,
+        ``"removed"`` or empty when the change is not significant.
+    """
+    rows = {
+        "LineNo": [],
+        "line": [],
+        "old_LineNo": [],
+        "old_time(in ms)": [],
+        "new_time(in ms)": [],
+        "change(%)": [],
+        "p_value": [],
+        "status": [],
+    }
+
+    def add(line_id, text, old_id, old_mean, new_mean, p, status):
+        rows["LineNo"].append(line_id)
+        rows["line"].append(text)
+        rows["old_LineNo"].append(old_id)
+        rows["old_time(in ms)"].append(old_mean)
+        rows["new_time(in ms)"].append(new_mean)
+        change = (new_mean / old_mean - 1) * 100 if old_mean == old_mean and old_mean else float("nan")
+        rows["change(%)"].append(change)
+        rows["p_value"].append(p)
+        rows["status"].append(status)
+
+    old_total, new_total = old.total_time, new.total_time
+    if old_total is not None and new_total is not None:
+        _, p = welch_test(old_total, new_total)
+    else:
+        _, p = welch_from_stats(*old.total_stats, old.iterations, *new.total_stats, new.iterations)
+    old_mean, new_mean = old.total_stats[0], new.total_stats[0]
+    add(-1, "<total>", -1, old_mean, new_mean, p, _compare(old_mean, new_mean, p, alpha, threshold))
+
+    old_means, new_means = old.column("mean_time(in ms)"), new.column("mean_time(in ms)")
+    old_std = old.column("std_time(in ms)") if "std_time(in ms)" in old.columns else None
+    new_std = new.column("std_time(in ms)") if "std_time(in ms)" in new.columns else None
+    nan = float("nan")
+    for old_id, new_id in match_lines(old.lines, new.lines):
+        if new_id is None:
+            add(-1, old.lines[old_id], old_id, old_means[old_id], nan, nan, "removed")
+            continue
+        if old_id is None:
+            add(new_id, new.lines[new_id], -1, nan, new_means[new_id], nan, "added")
+            continue
+        old_samples, new_samples = old.samples(old_id), new.samples(new_id)
+        if old_samples is not None and new_samples is not None:
+            _, p = welch_test(old_samples, new_samples)
+        elif old_std is not None and new_std is not None:
+            _, p = welch_from_stats(
+                old_means[old_id], old_std[old_id], old.iterations,
+                new_means[new_id], new_std[new_id], new.iterations,
+            )
+        else:
+            p = nan
+        old_mean, new_mean = old_means[old_id], new_means[new_id]
+        add(new_id, new.lines[new_id], old_id, old_mean, new_mean, p, _compare(old_mean, new_mean, p, alpha, threshold))
+    return ResultTable(rows)
+
+
+def display_diff(diff, old, new):
+    """
+    Print the comparison of two runs.
+
+    Parameters
+    ----------
+    diff : ResultTable
+        The result of `diff_runs`.
+    old, new : Run
+        The compared runs.
+    """
+    from .utils import print_table
+
+    slower = sum(status == "slower" for status in diff["status"])
+    header = (
+        f"|> Function Name: {new.name}, #iter: {old.iterations} -> {new.iterations}, "
+        f"significant slowdowns: {slower}"
+    )
+    if old.source_hash != new.source_hash:
+        header += ", source changed"
+    print_table(diff, header)
@@ -0,0 +1,195 @@
+import inspect
+from .instrumentation import compile_function
+from .threads import ThreadRecorder
+from .utils import display_results, process_stats
+
+_active = {}  # function -> HotSwap currently instrumenting it
+
+
+def live_function(target):
+    """
+    Find the function object whose code runs when a callable is called.
+
+    Parameters
+    ----------
+    target : callable
+        A function, bound method, ``staticmethod``, ``classmethod`` or ``property``
+        (its getter is used), possibly wrapped with ``functools.wraps``.
+
+    Returns
+    -------
+    function
+        The innermost plain function.
+
+    Raises
+    ------
+    TypeError
+        If no function with a ``__code__`` is found, e.g. for builtins.
+    """
+    if isinstance(target, property):
+        target = target.fget
+    target = getattr(target, "__func__", target)
+    target = inspect.unwrap(target)
+    if not hasattr(target, "__code__"):
+        raise TypeError(f"cannot instrument {target!r}: it has no Python code")
+    return target
+
+
+class HotSwap:
+    """
+    Instrument a live function in place by replacing its ``__code__``.
+
+    The function object itself is kept: every existing reference, bound method, call
+    site and decorator wrapper runs the instrumented code while the swap is active,
+    with the function's real globals, closure cells and defaults, and no proxy in the
+    call path. The recorder is published in the function's module globals under a
+    name unique to the function (see `InstrumentedFunction.recorder`), so the probes
+    look it up at the normal global-lookup speed.
+
+    Parameters
+    ----------
+    target : callable
+        The function or method to instrument (see `live_function`).
+    recorder : Recorder, optional
+        Receives the buffer of every call, by default a `ThreadRecorder` with running
+        statistics, safe to use from any number of threads.
+    memory : bool, optional
+        Also insert memory probes, by default False; the recorder then needs a
+        ``memory`` attribute (see `codpulse.memory.MemoryProbes`).
+    histograms : bool, optional
+        Also insert histogram probes, by default False; the recorder then needs a
+        ``histograms`` attribute (see `codpulse.histogram.LineHistograms`).
+    cpu : bool, optional
+        Also insert CPU-time probes, by default False; the recorder then needs a
+        ``cpu`` attribute (see `codpulse.cputime.CpuTimes`).
+    timeline : bool, optional
+        Also insert timeline probes, by default False; the recorder then needs a
+        ``timeline`` attribute (see `codpulse.timeline.SlowCalls`).
+
+    Attributes
+    ----------
+    function : function
+        The instrumented function object.
+    instrumented : InstrumentedFunction
+        The replacement code and line table.
+    recorder : Recorder
+        Receives the buffer of every call.
+    active : bool
+        Whether the instrumented code is currently swapped in.
+
+    Notes
+    -----
+    Calls that are already running when the code is swapped, in either direction,
+    finish with the code they started with. The recorder global is therefore left in
+    the module after `restore`.
+
+    Examples
+    --------
+    >>> with HotSwap(Parser.parse) as swap:
+    ...     run_workload()
+    >>> swap.report()
+    """
+
+    def __init__(
+        self, target, recorder=None, memory=False, histograms=False, cpu=False, timeline=False
+    ):
+        self.function = live_function(target)
+        self.instrumented = compile_function(
+            self.function,
+            live=True,
+            memory=memory,
+            histograms=histograms,
+            cpu=cpu,
+            timeline=timeline,
+        )
+        if recorder is None:
+            recorder = ThreadRecorder(len(self.instrumented.lines), streaming=True)
+        self.recorder = recorder
+        self.active = False
+        self._original = None
+
+    def swap(self):
+        """
+        Swap the instrumented code in.
+
+        Raises
+        ------
+        RuntimeError
+            If the function is already instrumented by another swap.
+        """
+        if _active.setdefault(self.function, self) is not self:
+            raise RuntimeError(f"{self.function.__qualname__} is already instrumented")
+        if self.active:
+            return
+        self._original = self.function.__code__
+        self.function.__globals__[self.instrumented.recorder] = self.recorder
+        self.function.__code__ = self.instrumented.code
+        self.active = True
+
+    def restore(self):
+        """
+        Swap the original code back in.
+        """
+        if not self.active:
+            return
+        self.function.__code__ = self._original
+        self.active = False
+        del _active[self.function]
+
+    def __enter__(self):
+        self.swap()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.restore()
+
+    def snapshot(self):
+        """
+        Get the statistics of the calls recorded so far, with the default recorder.
+
+        Returns
+        -------
+        ResultTable
+            The per-line statistics, in the format of `process_stats`.
+        """
+        return process_stats(
+            self.recorder.stats,
+            self.instrumented.lines,
+            self.instrumented.parents,
+            split_await=inspect.iscoroutinefunction(self.function),
+        )
+
+    def report(self):
+        """
+        Display the statistics of the calls recorded so far, with the default recorder.
+        """
+        stats = self.recorder.stats
+        display_results(self.snapshot(), None, stats.calls, self.function.__qualname__)
+
+
+def instrument(target, recorder=None):
+    """
+    Instrument a live function or method in place until `HotSwap.restore` is called.
+
+    Parameters
+    ----------
+    target : callable
+        The function or method to instrument (see `live_function`).
+    recorder : Recorder, optional
+        Receives the buffer of every call (see `HotSwap`).
+
+    Returns
+    -------
+    HotSwap
+        The active swap.
+
+    Examples
+    --------
+    >>> swap = instrument(Parser.parse)
+    >>> run_workload()
+    >>> swap.restore()
+    >>> swap.report()
+    """
+    swap = HotSwap(target, recorder)
+    swap.swap()
+    return swap
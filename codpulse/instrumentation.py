@@ -0,0 +1,784 @@
+import ast
+import collections
+import hashlib
+import inspect
+import marshal
+import os
+import sys
+import textwrap
+from .recorder import STRIDE, HITS, TOTAL, MIN, MAX, AWAIT
+
+ENGINE_VERSION = 9
+
+InstrumentedFunction = collections.namedtuple(
+    "InstrumentedFunction",
+    ["name", "code", "source", "lines", "spans", "parents", "recorder", "calls"],
+    defaults=("_cp_recorder", ()),
+)
+InstrumentedFunction.__doc__ = """
+Result of instrumenting a function.
+
+Attributes
+----------
+name : str
+    Name of the instrumented function.
+code : code
+    Module-level code object; executing it defines the instrumented function. The
+    function expects a `codpulse.recorder.Recorder` under the global name
+    `recorder`. For live code (see `compile_function`), the code object of the
+    function itself, ready to replace the original's ``__code__``.
+source : str
+    Source representation of the instrumented function.
+lines : tuple of str
+    Source text of every probed statement, indexed by line id.
+spans : tuple of (int, int)
+    First and last line number, in the function's file, of every probed statement.
+parents : tuple of int
+    Line id of the compound statement enclosing every probed statement, or -1 for
+    statements at the top of the function body. Parents always have lower ids than
+    their children.
+recorder : str
+    Global name the instrumented code looks the recorder up under.
+calls : tuple of str
+    Dotted names (``helper``, ``module.helper``, ``self.method``) of the functions the
+    function calls directly, sorted.
+"""
+
+_memory_cache = {}
+_code_index = {}  # (original code object, live, memory, histograms, cpu, timeline) -> cache key, skips inspect.getsource on re-wraps
+
+
+class ProbeInserter(ast.NodeTransformer):
+    """
+    AST transformer that wraps every statement of a function with timing probes.
+
+    Each statement of the function body (including statements nested in
+    ``for``/``while``/``if``/``with``/``try``/``match`` blocks) gets a line id and
+    is wrapped so that its hit count, cumulative, minimum and maximum time are
+    accumulated in the per-call buffer obtained from the recorder (see
+    `codpulse.recorder`). Compound statements are timed inclusively, so the header
+    of a loop reports the time of the whole loop. The probes are closed in a
+    ``finally`` clause, so statements that raise, ``return``, ``break`` or
+    ``continue`` are counted and timed as well, and so are the statements they
+    leave.
+
+    CPython allows at most 20 statically nested blocks per function, and every
+    ``try`` of a probe is one. Functions nesting loops, ``with`` and ``try``
+    statements so deeply that the probes exceed the limit are instrumented with
+    ``guard=False``: probes are closed after the statement instead, and
+    ``return``, ``break`` and ``continue`` close the probes of the statements they
+    jump out of before leaving them, but statements left by an exception are not
+    recorded.
+
+    Nested function and class definitions are timed as single statements; their
+    bodies are left untouched.
+
+    In coroutine functions, every ``await`` expression, ``async for`` iterable and
+    ``async with`` context manager of a statement is wrapped (see
+    `codpulse.awaiting`) so the time the statement spends suspended is also
+    accumulated, apart from the time it runs.
+
+    With ``memory=True``, every statement is also wrapped with memory probes, which
+    call ``enter`` and ``exit`` of the `codpulse.memory.MemoryProbes` found as the
+    ``memory`` attribute of the recorder; they run outside the timing probes of the
+    statement itself.
+
+    With ``histograms=True``, the time of every execution of a statement is also
+    counted in the `codpulse.histogram.LineHistograms` found as the ``histograms``
+    attribute of the recorder.
+
+    With ``cpu=True``, every statement is also wrapped with CPU-time probes, which read
+    the integer ``clock`` of the `codpulse.cputime.CpuTimes` found as the ``cpu``
+    attribute of the recorder and add the nanoseconds to its ``buffer``; they run
+    inside the timing probes of the statement, so its CPU time never exceeds its time.
+
+    With ``timeline=True``, the line id, start and time of every execution of a
+    statement are also appended to a per-call ``array('d')`` obtained from ``begin``
+    of the `codpulse.timeline.SlowCalls` found as the ``timeline`` attribute of the
+    recorder, until the array reaches its ``limit`` length, and the array is handed to
+    its ``end`` when the call finishes.
+
+    Parameters
+    ----------
+    source_lines : list of str
+        Lines of the (dedented) source the tree was parsed from, used to record
+        the text of every probed statement.
+    recorder : str, optional
+        Global name of the recorder in the instrumented code, by default
+        ``"_cp_recorder"``.
+    memory : bool, optional
+        Insert memory probes, by default False.
+    histograms : bool, optional
+        Insert histogram probes, by default False.
+    cpu : bool, optional
+        Insert CPU-time probes, by default False.
+    timeline : bool, optional
+        Insert timeline probes, by default False.
+    guard : bool, optional
+        Close the probes in ``finally`` clauses, by default True.
+
+    Attributes
+    ----------
+    lines : list of str
+        Source text of every probed statement, indexed by line id.
+    spans : list of (int, int)
+        First and last line number of every probed statement in the parsed source.
+    parents : list of int
+        Line id of the enclosing compound statement of every probed statement, or -1.
+    """
+
+    _loops = (ast.For, ast.AsyncFor, ast.While)
+    _definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+    def __init__(
+        self,
+        source_lines,
+        recorder="_cp_recorder",
+        memory=False,
+        histograms=False,
+        cpu=False,
+        timeline=False,
+        guard=True,
+    ):
+        self.source_lines = source_lines
+        self.recorder = recorder
+        self.memory = memory
+        self.histograms = histograms
+        self.cpu = cpu
+        self.timeline = timeline
+        self.guard = guard
+        self.lines = []
+        self.spans = []
+        self.parents = []
+        self._root = None
+        self._async = False
+        self._stack = []  # [line_id, is_loop_body] of enclosing compound statements
+
+    def visit(self, node):
+        if self._root is not None and isinstance(node, ast.stmt):
+            return self._probe(node)
+        return super().visit(node)
+
+    def visit_FunctionDef(self, node):
+        self._root = node
+        node.decorator_list = []
+        body = node.body
+        docstring = []
+        if (
+            body
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            docstring, body = body[:1], body[1:]
+        body = self._visit_list(body) or [ast.Pass()]
+        enter = _method(self.recorder, "enter")
+        if _is_generator(node):
+            # a suspended generator does not run, so calls made meanwhile are not nested in it
+            enter.args.append(ast.Constant(True))
+        prologue = [
+            _assign("_cp_b", enter),
+            _assign("_cp_clock", ast.Attribute(_name(self.recorder), "clock", ast.Load())),
+        ]
+        if self.memory:
+            probes = ast.Attribute(_name(self.recorder), "memory", ast.Load())
+            prologue += [
+                _assign("_cp_menter", ast.Attribute(probes, "enter", ast.Load())),
+                _assign("_cp_mexit", ast.Attribute(probes, "exit", ast.Load())),
+            ]
+        if self.histograms:
+            histograms = ast.Attribute(_name(self.recorder), "histograms", ast.Load())
+            prologue.append(_assign("_cp_hist", ast.Attribute(histograms, "record", ast.Load())))
+        if self.cpu:
+            times = ast.Attribute(_name(self.recorder), "cpu", ast.Load())
+            prologue += [
+                _assign("_cp_cpu", ast.Attribute(times, "clock", ast.Load())),
+                _assign("_cp_cb", ast.Attribute(times, "buffer", ast.Load())),
+            ]
+        epilogue = [ast.Expr(_method(self.recorder, "exit", _name("_cp_b")))]
+        if self.timeline:
+            timeline = ast.Attribute(_name(self.recorder), "timeline", ast.Load())
+            begin = ast.Call(ast.Attribute(timeline, "begin", ast.Load()), [], [])
+            end = ast.Call(ast.Attribute(timeline, "end", ast.Load()), [_name("_cp_ev")], [])
+            prologue += [
+                _assign("_cp_ev", begin),
+                _assign("_cp_evx", ast.Attribute(_name("_cp_ev"), "extend", ast.Load())),
+                _assign("_cp_evn", ast.Attribute(_name("_cp_ev"), "__len__", ast.Load())),
+                _assign("_cp_evmax", ast.Attribute(timeline, "limit", ast.Load())),
+            ]
+            epilogue.insert(0, ast.Expr(end))
+        wrapped = ast.Try(body, [], [], epilogue)
+        new = [ast.copy_location(n, node) for n in prologue + [wrapped]]
+        node.body = docstring + new
+        return node
+
+    def visit_AsyncFunctionDef(self, node):
+        self._async = True
+        return self.visit_FunctionDef(node)
+
+    def _visit_list(self, statements):
+        new = []
+        for item in statements:
+            value = self.visit(item)
+            if value is None:
+                continue
+            elif isinstance(value, ast.AST):
+                new.append(value)
+            else:
+                new.extend(value)
+        return new
+
+    def _probe(self, node):
+        if isinstance(node, (ast.Global, ast.Nonlocal)):
+            return node
+        line_id = len(self.lines)
+        self.lines.append(self.source_lines[node.lineno - 1].rstrip())
+        self.spans.append((node.lineno, node.end_lineno))
+        self.parents.append(self._stack[-1][0] if self._stack else -1)
+        if self._async and not isinstance(node, self._definitions):
+            self._time_awaits(node, line_id)
+        start = [_assign(_time_name(line_id), _call("_cp_clock"))]
+        if self.cpu:
+            start.append(_assign(_cpu_name(line_id), _call("_cp_cpu")))
+
+        if self.guard:
+            if not isinstance(node, self._definitions):
+                self._visit_children(node, line_id)
+            # the enclosing statements close their own probes when a jump or an exception leaves them
+            new = start + [ast.Try([node], [], [], self._close(line_id))]
+        elif isinstance(node, ast.Return):
+            value = node.value if node.value is not None else ast.Constant(None)
+            new = start + [_assign("_cp_return", value)] + self._close(line_id)
+            for j, _ in reversed(self._stack):
+                new += self._close(j)
+            new.append(ast.Return(_name("_cp_return")))
+        elif isinstance(node, (ast.Break, ast.Continue)):
+            new = start + self._close(line_id)
+            for j, is_loop_body in reversed(self._stack):
+                if is_loop_body:
+                    break
+                new += self._close(j)
+            new.append(node)
+        else:
+            if not isinstance(node, self._definitions):
+                self._visit_children(node, line_id)
+            new = start + [node] + self._close(line_id)
+        if self.memory:
+            new.insert(0, _assign(_memory_name(line_id), _call("_cp_menter")))
+        return [ast.copy_location(n, node) for n in new]
+
+    def _visit_children(self, node, line_id):
+        is_loop = isinstance(node, self._loops)
+        self._stack.append([line_id, False])
+        for field, value in ast.iter_fields(node):
+            self._stack[-1][1] = is_loop and field == "body"
+            if not isinstance(value, list):
+                continue
+            if value and isinstance(value[0], ast.stmt):
+                value[:] = self._visit_list(value)
+            else:
+                # except handlers and match cases hold statement lists of their own
+                for item in value:
+                    if isinstance(item, (ast.excepthandler, ast.match_case)):
+                        item.body = self._visit_list(item.body)
+        self._stack.pop()
+
+    def _time_awaits(self, node, line_id):
+        index = ast.Constant(line_id * STRIDE + AWAIT)
+        AwaitTimer(index, self.recorder).generic_visit(node)
+        if isinstance(node, ast.AsyncFor):
+            node.iter = _method(self.recorder, "aiter", node.iter, _name("_cp_b"), index)
+        elif isinstance(node, ast.AsyncWith):
+            for item in node.items:
+                item.context_expr = _method(
+                    self.recorder, "acontext", item.context_expr, _name("_cp_b"), index
+                )
+
+    def _close(self, line_id):
+        base = line_id * STRIDE
+        elapsed = ast.BinOp(_call("_cp_clock"), ast.Sub(), _name(_time_name(line_id)))
+        d = _name("_cp_d")
+        close = []
+        if self.cpu:
+            # _cp_cb[line_id] += _cp_cpu() - _cp_c{line_id}
+            cpu = ast.BinOp(_call("_cp_cpu"), ast.Sub(), _name(_cpu_name(line_id)))
+            slot = ast.Subscript(_name("_cp_cb"), ast.Constant(line_id), ast.Store())
+            close.append(ast.AugAssign(slot, ast.Add(), cpu))
+        close += [
+            _assign("_cp_d", elapsed),
+            ast.AugAssign(_slot(base + HITS, ast.Store()), ast.Add(), ast.Constant(1.0)),
+            ast.AugAssign(_slot(base + TOTAL, ast.Store()), ast.Add(), d),
+            _update_if(d, ast.Lt(), base + MIN),
+            _update_if(d, ast.Gt(), base + MAX),
+        ]
+        if self.timeline:
+            # if _cp_evn() < _cp_evmax: _cp_evx((line_id, _cp_t{line_id}, _cp_d))
+            event = ast.Tuple([ast.Constant(line_id), _name(_time_name(line_id)), d], ast.Load())
+            room = ast.Compare(_call("_cp_evn"), [ast.Lt()], [_name("_cp_evmax")])
+            close.append(ast.If(room, [ast.Expr(_call("_cp_evx", event))], []))
+        if self.histograms:
+            close.append(ast.Expr(_call("_cp_hist", ast.Constant(line_id), d)))
+        if self.memory:
+            probe = _call("_cp_mexit", ast.Constant(line_id), _name(_memory_name(line_id)))
+            close.append(ast.Expr(probe))
+        return close
+
+
+class AwaitTimer(ast.NodeTransformer):
+    """
+    AST transformer that times the ``await`` expressions of a single statement.
+
+    ``await x`` becomes ``await _cp_recorder.awaited(x, _cp_b, index)``. Nested
+    statements are left alone, they are probed on their own.
+
+    Parameters
+    ----------
+    index : ast.Constant
+        Buffer slot the suspended time of the statement is accumulated in.
+    recorder : str, optional
+        Global name of the recorder, by default ``"_cp_recorder"``.
+    """
+
+    def __init__(self, index, recorder="_cp_recorder"):
+        self.index = index
+        self.recorder = recorder
+
+    def visit(self, node):
+        if isinstance(node, ast.stmt):
+            return node
+        return super().visit(node)
+
+    def visit_Await(self, node):
+        self.generic_visit(node)
+        wrapped = _method(self.recorder, "awaited", node.value, _name("_cp_b"), self.index)
+        return ast.copy_location(ast.Await(wrapped), node)
+
+
+def _name(identifier):
+    return ast.Name(identifier, ast.Load())
+
+
+def _assign(identifier, value):
+    return ast.Assign([ast.Name(identifier, ast.Store())], value)
+
+
+def _call(identifier, *args):
+    return ast.Call(_name(identifier), list(args), [])
+
+
+def _method(identifier, attribute, *args):
+    return ast.Call(ast.Attribute(_name(identifier), attribute, ast.Load()), list(args), [])
+
+
+def _slot(index, ctx):
+    return ast.Subscript(_name("_cp_b"), ast.Constant(index), ctx)
+
+
+def _update_if(value, op, index):
+    # if _cp_d < _cp_b[index]: _cp_b[index] = _cp_d
+    store = ast.Assign([_slot(index, ast.Store())], value)
+    return ast.If(ast.Compare(value, [op], [_slot(index, ast.Load())]), [store], [])
+
+
+def _time_name(line_id):
+    return f"_cp_t{line_id}"
+
+
+def _memory_name(line_id):
+    return f"_cp_m{line_id}"
+
+
+def _cpu_name(line_id):
+    return f"_cp_c{line_id}"
+
+
+def instrument_source(
+    source,
+    first_lineno=1,
+    filename="<codpulse>",
+    live=None,
+    memory=False,
+    histograms=False,
+    cpu=False,
+    timeline=False,
+):
+    """
+    Instrument the source of a single function definition.
+
+    Parameters
+    ----------
+    source : str
+        Source code of the function, as returned by ``inspect.getsource``. It may be
+        indented (methods, nested functions) and decorated.
+    first_lineno : int, optional
+        Line number of the first source line in ``filename``, by default 1.
+    filename : str, optional
+        File name recorded in the code object, by default ``"<codpulse>"``.
+    live : code, optional
+        Code object of the original function, by default None. When given, the result
+        holds a code object that can replace ``live`` as the ``__code__`` of the original
+        function: it has the same free variables and qualified name, mangles private
+        names like the class that owns the function, and looks the recorder up under a
+        global name unique to the function.
+    memory : bool, optional
+        Also insert memory probes (see `ProbeInserter`), by default False.
+    histograms : bool, optional
+        Also insert histogram probes (see `ProbeInserter`), by default False.
+    cpu : bool, optional
+        Also insert CPU-time probes (see `ProbeInserter`), by default False.
+    timeline : bool, optional
+        Also insert timeline probes (see `ProbeInserter`), by default False.
+
+    Returns
+    -------
+    InstrumentedFunction
+        The compiled code object together with the instrumented source and line table.
+
+    Raises
+    ------
+    TypeError
+        If the source does not hold a function definition, or cannot be compiled into a
+        replacement for `live`.
+    """
+    source = textwrap.dedent(source)
+    tree = ast.parse(source)
+    if not tree.body or not isinstance(
+        tree.body[0], (ast.FunctionDef, ast.AsyncFunctionDef)
+    ):
+        raise TypeError("codpulse can only instrument functions defined with def")
+    recorder = "_cp_recorder" if live is None else _live_recorder_name(live)
+    calls = _called_names(tree.body[0])
+    for guard in (True, False):
+        if not guard:
+            tree = ast.parse(source)
+        inserter = ProbeInserter(
+            source.split("\n"), recorder, memory, histograms, cpu, timeline, guard
+        )
+        function = inserter.visit(tree.body[0])
+        module = _live_factory(function, live) if live is not None else ast.Module([function], [])
+        module = ast.fix_missing_locations(module)
+        ast.increment_lineno(module, first_lineno - 1)
+        try:
+            code = compile(module, filename, "exec")
+            break
+        except SyntaxError as error:
+            # too many statically nested blocks (see `ProbeInserter`)
+            if not guard or "nested blocks" not in str(error):
+                raise
+    if live is not None:
+        code = _find_code(code, function.name)
+        if hasattr(code, "co_qualname"):
+            code = code.replace(co_qualname=live.co_qualname)
+        if code.co_freevars != live.co_freevars:
+            raise TypeError(
+                f"instrumented code of {function.name} has free variables {code.co_freevars}, "
+                f"expected {live.co_freevars}"
+            )
+    offset = first_lineno - 1
+    return InstrumentedFunction(
+        function.name,
+        code,
+        ast.unparse(function),
+        tuple(inserter.lines),
+        tuple((first + offset, last + offset) for first, last in inserter.spans),
+        tuple(inserter.parents),
+        recorder,
+        calls,
+    )
+
+
+def _is_generator(function):
+    # whether the function itself yields, not one of its nested definitions
+    pending = list(function.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, (ast.Yield, ast.YieldFrom)):
+            return True
+        pending.extend(ast.iter_child_nodes(node))
+    return False
+
+
+def _called_names(function):
+    # dotted names of the calls made by the function itself, not by nested definitions
+    names = set()
+    pending = list(function.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, ast.Call):
+            parts, func = [], node.func
+            while isinstance(func, ast.Attribute):
+                parts.append(func.attr)
+                func = func.value
+            if isinstance(func, ast.Name):
+                names.add(".".join([func.id] + parts[::-1]))
+        pending.extend(ast.iter_child_nodes(node))
+    return tuple(sorted(names))
+
+
+def _live_recorder_name(code):
+    qualname = getattr(code, "co_qualname", code.co_name)
+    identity = f"{code.co_filename}:{code.co_firstlineno}:{qualname}"
+    return f"_cp_recorder_{hashlib.sha256(identity.encode('utf-8', 'surrogatepass')).hexdigest()[:12]}"
+
+
+def _owner_class(qualname):
+    # nearest enclosing class in a qualified name such as "A.method.<locals>.inner"
+    parts = qualname.split(".")[:-1]
+    while parts and parts[-1] == "<locals>":
+        parts = parts[:-2]
+    return parts[-1] if parts else None
+
+
+def _live_factory(function, code):
+    # def _cp_factory():
+    #     global <function>          # unless it is nested in a class or function
+    #     <free variables> = None   # so the function closes over them
+    #     class <Owner>:            # for name mangling and the __class__ cell
+    #         <function>
+    names = [name for name in code.co_freevars if name != "__class__"]
+    owner = _owner_class(getattr(code, "co_qualname", code.co_name))
+    if owner is None and "__class__" in code.co_freevars:
+        owner = "_cp_owner"
+    template = "def _cp_factory():\n"
+    if owner is None and function.name not in code.co_freevars:
+        # a recursive function refers to itself as a global, not as a local of the factory
+        template += f"    global {function.name}\n"
+    if names:
+        template += f"    {' = '.join(names)} = None\n"
+    template += f"    class {owner}:\n        pass\n" if owner else "    pass\n"
+    tree = ast.parse(template)
+    holder = tree.body[0].body[-1] if owner else tree.body[0]
+    holder.body[-1] = function
+    return tree
+
+
+def _find_code(code, name):
+    pending = list(code.co_consts)
+    while pending:
+        const = pending.pop(0)
+        if not hasattr(const, "co_consts"):
+            continue
+        if const.co_name == name:
+            return const
+        pending.extend(const.co_consts)
+    raise TypeError(f"no code object named {name!r}")
+
+
+def line_ids(spans):
+    """
+    Map every source line number to the innermost probed statement that contains it.
+
+    Parameters
+    ----------
+    spans : sequence of (int, int)
+        First and last line number of every probed statement, indexed by line id
+        (see `codpulse.instrumentation.InstrumentedFunction`).
+
+    Returns
+    -------
+    dict
+        Line number to line id.
+    """
+    mapping = {}
+    # statements are numbered in pre-order, so inner statements overwrite outer ones
+    for line_id, (first, last) in enumerate(spans):
+        for lineno in range(first, last + 1):
+            mapping[lineno] = line_id
+    return mapping
+
+
+def cache_dir():
+    """
+    Directory of the on-disk code cache.
+
+    Returns
+    -------
+    str or None
+        ``$CODPULSE_CACHE_DIR`` if set, otherwise ``codpulse`` under the user cache
+        directory. ``None`` when the variable is set to an empty string, which
+        disables the on-disk cache.
+    """
+    path = os.environ.get("CODPULSE_CACHE_DIR")
+    if path is not None:
+        return path or None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "codpulse")
+
+
+def cache_key(source, code, variant=""):
+    """
+    Compute the cache key of a function from its source and bytecode.
+
+    Parameters
+    ----------
+    source : str
+        Source code of the function.
+    code : code
+        Code object of the original function.
+    variant : str, optional
+        Distinguishes differently compiled results of the same function, by default "".
+
+    Returns
+    -------
+    str
+        Hex digest identifying the instrumented code object.
+    """
+    digest = hashlib.sha256()
+    for part in (
+        str(ENGINE_VERSION),
+        variant,
+        sys.implementation.cache_tag or "",
+        code.co_filename,
+        str(code.co_firstlineno),
+        source,
+    ):
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    digest.update(code.co_code)
+    return digest.hexdigest()
+
+
+def _load(path):
+    try:
+        with open(path, "rb") as f:
+            return InstrumentedFunction(*marshal.load(f))
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _store(path, instrumented):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            marshal.dump(tuple(instrumented), f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def compile_function(
+    function_object,
+    cache=True,
+    live=False,
+    memory=False,
+    histograms=False,
+    cpu=False,
+    timeline=False,
+):
+    """
+    Instrument a function and compile it, reusing cached code objects when possible.
+
+    Parameters
+    ----------
+    function_object : callable
+        The function to be instrumented. Wrappers created with ``functools.wraps``
+        are unwrapped first.
+    cache : bool, optional
+        Whether to look up and store the result in the in-process and on-disk
+        caches, by default True.
+    live : bool, optional
+        Compile a replacement for the function's own ``__code__`` (see
+        `instrument_source`) instead of a module that defines a copy of it, by
+        default False.
+    memory : bool, optional
+        Also insert memory probes (see `ProbeInserter`), by default False.
+    histograms : bool, optional
+        Also insert histogram probes (see `ProbeInserter`), by default False.
+    cpu : bool, optional
+        Also insert CPU-time probes (see `ProbeInserter`), by default False.
+    timeline : bool, optional
+        Also insert timeline probes (see `ProbeInserter`), by default False.
+
+    Returns
+    -------
+    InstrumentedFunction
+        The compiled code object together with the instrumented source and line table.
+
+    Notes
+    -----
+    Cache entries are keyed by the hash of the function's source and ``co_code``
+    (see `cache_key`), so re-wrapping the same function, or wrapping it again in a
+    new process, skips parsing and compiling.
+    """
+    function_object = inspect.unwrap(function_object)
+    code = function_object.__code__
+    index = (code, live, memory, histograms, cpu, timeline)
+    if cache and index in _code_index:
+        return _memory_cache[_code_index[index]]
+    source = inspect.getsource(function_object)
+    live_code = code if live else None
+    if not cache:
+        return instrument_source(
+            source,
+            code.co_firstlineno,
+            code.co_filename,
+            live_code,
+            memory,
+            histograms,
+            cpu,
+            timeline,
+        )
+
+    variant = (
+        ("live" if live else "")
+        + ("+memory" if memory else "")
+        + ("+histograms" if histograms else "")
+        + ("+cpu" if cpu else "")
+        + ("+timeline" if timeline else "")
+    )
+    key = cache_key(source, code, variant)
+    _code_index[index] = key
+    instrumented = _memory_cache.get(key)
+    if instrumented is not None:
+        return instrumented
+    directory = cache_dir()
+    path = os.path.join(directory, f"{key}.cpc") if directory else None
+    if path is not None:
+        instrumented = _load(path)
+    if instrumented is None:
+        instrumented = instrument_source(
+            source,
+            code.co_firstlineno,
+            code.co_filename,
+            live_code,
+            memory,
+            histograms,
+            cpu,
+            timeline,
+        )
+        if path is not None:
+            _store(path, instrumented)
+    _memory_cache[key] = instrumented
+    return instrumented
+
+
+def clear_cache(disk=False):
+    """
+    Drop cached code objects.
+
+    Parameters
+    ----------
+    disk : bool, optional
+        Also delete the files of the on-disk cache, by default False.
+    """
+    _memory_cache.clear()
+    _code_index.clear()
+    directory = cache_dir()
+    if not disk or directory is None or not os.path.isdir(directory):
+        return
+    for entry in os.listdir(directory):
+        if entry.endswith(".cpc"):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
@@ -0,0 +1,155 @@
+import inspect
+import sys
+from .instrumentation import line_ids
+from .recorder import STRIDE, HITS, TOTAL, MIN, MAX
+
+
+class LineMonitor:
+    """
+    Profile a function through ``sys.monitoring`` (PEP 669) without rewriting it.
+
+    While the monitor is active, LINE events of the function's own code object are
+    timed: the time between two events is charged to the statement of the first
+    one, and the time of every statement is then added to the statements enclosing
+    it, so compound statements are reported inclusively like with the exec engine.
+    The original function runs with its real globals and closures, and every call
+    writes a buffer in the same layout as an instrumented function (see
+    `codpulse.recorder.Recorder`), so the results go through `process_logs`
+    unchanged.
+
+    Parameters
+    ----------
+    function_object : callable
+        The function to be profiled.
+    instrumented : InstrumentedFunction
+        Line table of the function, as returned by `compile_function`.
+    recorder : Recorder
+        Receives the buffer of every finished call.
+    max_hits : int, optional
+        Stop listening to a line once it was hit this many times while the monitor
+        is active, by default None (never). The time of later executions of such a
+        line is then charged to the statement executed before it.
+
+    Notes
+    -----
+    Requires Python 3.12 or newer. Hits count the line events of a statement, so
+    the header of a loop is hit once per iteration. A compound statement without
+    line events of its own gets the hits of its first nested statement, and the
+    mean time of its executions as its fastest and slowest one. Calls that run
+    concurrently in several threads or generators are not supported.
+
+    The monitor uses the ``sys.monitoring`` tool id of profilers, which cProfile and
+    other profilers also use on Python 3.12+; only one of them can run at a time.
+
+    Examples
+    --------
+    >>> monitor = LineMonitor(fun1, compile_function(fun1), recorder)
+    >>> with monitor:
+    ...     fun1(3, 5)
+    """
+
+    tool_id = getattr(getattr(sys, "monitoring", None), "PROFILER_ID", 2)
+
+    def __init__(self, function_object, instrumented, recorder, max_hits=None):
+        if not hasattr(sys, "monitoring"):
+            raise RuntimeError("the monitoring engine requires Python 3.12 or newer")
+        self.code = inspect.unwrap(function_object).__code__
+        self.generator = bool(
+            self.code.co_flags & (inspect.CO_GENERATOR | inspect.CO_ASYNC_GENERATOR)
+        )
+        self.recorder = recorder
+        self.parents = instrumented.parents
+        self.max_hits = max_hits
+        self.line_ids = line_ids(instrumented.spans)
+        self._frames = []  # [buffer, line_id, start] of every active call
+        self._hits = [0] * len(instrumented.lines)
+
+    def __enter__(self):
+        monitoring = sys.monitoring
+        events = monitoring.events
+        owner = monitoring.get_tool(self.tool_id)
+        if owner is not None:
+            raise RuntimeError(
+                f"the sys.monitoring profiler id is in use by {owner!r}; "
+                "stop that profiler or use engine='exec'"
+            )
+        monitoring.use_tool_id(self.tool_id, "codpulse")
+        monitoring.register_callback(self.tool_id, events.PY_START, self._on_start)
+        monitoring.register_callback(self.tool_id, events.LINE, self._on_line)
+        monitoring.register_callback(self.tool_id, events.PY_RETURN, self._on_return)
+        monitoring.register_callback(self.tool_id, events.PY_UNWIND, self._on_unwind)
+        monitoring.set_local_events(
+            self.tool_id, self.code, events.PY_START | events.LINE | events.PY_RETURN
+        )
+        monitoring.set_events(self.tool_id, events.PY_UNWIND)
+        monitoring.restart_events()
+        self._hits = [0] * len(self._hits)
+        return self
+
+    def __exit__(self, *exc_info):
+        monitoring = sys.monitoring
+        monitoring.set_local_events(self.tool_id, self.code, 0)
+        monitoring.set_events(self.tool_id, 0)
+        for event in ("PY_START", "LINE", "PY_RETURN", "PY_UNWIND"):
+            monitoring.register_callback(
+                self.tool_id, getattr(monitoring.events, event), None
+            )
+        monitoring.free_tool_id(self.tool_id)
+        self._frames.clear()
+
+    def _on_start(self, code, offset):
+        self._frames.append([self.recorder.enter(self.generator), -1, 0.0])
+
+    def _on_line(self, code, line_number):
+        now = self.recorder.clock()
+        frame = self._frames[-1]
+        line_id = self.line_ids.get(line_number, -1)
+        if line_id < 0 or line_id == frame[1]:
+            return
+        self._charge(frame, now)
+        frame[1] = line_id
+        self._hits[line_id] += 1
+        disable = self.max_hits is not None and self._hits[line_id] >= self.max_hits
+        frame[2] = self.recorder.clock()
+        if disable:
+            return sys.monitoring.DISABLE
+
+    def _on_return(self, code, offset, value):
+        self._finish(self.recorder.clock())
+
+    def _on_unwind(self, code, offset, exception):
+        if code is self.code:
+            self._finish(self.recorder.clock())
+
+    def _charge(self, frame, now):
+        buffer, line_id, start = frame
+        if line_id < 0:
+            return
+        d = now - start
+        base = line_id * STRIDE
+        buffer[base + HITS] += 1.0
+        buffer[base + TOTAL] += d
+        if d < buffer[base + MIN]:
+            buffer[base + MIN] = d
+        if d > buffer[base + MAX]:
+            buffer[base + MAX] = d
+
+    def _finish(self, now):
+        frame = self._frames.pop()
+        self._charge(frame, now)
+        buffer = frame[0]
+        for line_id in range(len(self.parents) - 1, -1, -1):
+            base = line_id * STRIDE
+            total = buffer[base + TOTAL]
+            if buffer[base + HITS] == 0.0 and total > 0.0:
+                # a header without line events of its own runs as often as its first statement
+                child = line_id + 1
+                hits = 1.0
+                if child < len(self.parents) and self.parents[child] == line_id:
+                    hits = buffer[child * STRIDE + HITS] or 1.0
+                buffer[base + HITS] = hits
+                buffer[base + MIN] = buffer[base + MAX] = total / hits
+            parent = self.parents[line_id]
+            if parent >= 0:
+                buffer[parent * STRIDE + TOTAL] += total
+        self.recorder.exit(buffer)
@@ -0,0 +1,131 @@
+import importlib
+import os
+import time
+import types
+from .recorder import Recorder
+
+
+class ModuleRef:
+    """
+    Picklable stand-in for a module of a namespace sent to a worker process.
+
+    Parameters
+    ----------
+    name : str
+        Import name of the module.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+
+def portable_namespace(namespace):
+    """
+    Prepare a namespace to be sent to worker processes.
+
+    Parameters
+    ----------
+    namespace : dict
+        Globals of the instrumented function.
+
+    Returns
+    -------
+    dict
+        A copy of the namespace without the recorder, in which modules, which
+        cannot be pickled, are replaced by `ModuleRef` and re-imported by the worker.
+    """
+    return {
+        key: ModuleRef(value.__name__) if isinstance(value, types.ModuleType) else value
+        for key, value in namespace.items()
+        if key != "_cp_recorder"
+    }
+
+
+def split_iterations(iterations, workers):
+    """
+    Split a number of iterations into near-equal chunks, one per worker.
+
+    Parameters
+    ----------
+    iterations : int
+        Total number of iterations.
+    workers : int
+        Number of workers.
+
+    Returns
+    -------
+    list of int
+        Non-empty chunk sizes that sum to `iterations`.
+    """
+    chunk, extra = divmod(iterations, workers)
+    sizes = [chunk + (i < extra) for i in range(workers)]
+    return [size for size in sizes if size > 0]
+
+
+def run_iterations(
+    source, name, namespace, n_lines, iterations, streaming, args, kwargs, cpu=None, histograms=False
+):
+    """
+    Run an instrumented function for a number of iterations in a worker process.
+
+    The function is rebuilt from its instrumented source and its calls are recorded
+    locally, so only the per-line results travel back to the parent process.
+
+    Parameters
+    ----------
+    source : str
+        Source of the instrumented function (see `InstrumentedFunction.source`).
+    name : str
+        Name of the instrumented function.
+    namespace : dict
+        Globals of the function, as returned by `portable_namespace`.
+    n_lines : int
+        Number of probed lines of the function.
+    iterations : int
+        Number of calls to record.
+    streaming : bool
+        Fold the calls into `LineStats` instead of returning the buffer of every call.
+    args : tuple
+        Positional arguments of every call.
+    kwargs : dict
+        Keyword arguments of every call.
+    cpu : int, optional
+        Pin the worker process to this CPU before running, by default None.
+    histograms : bool, optional
+        Whether the source has histogram probes, by default False.
+
+    Returns
+    -------
+    tuple
+        The per-line results, a `LineStats` when `streaming` or else the list of call
+        buffers, the total times (in ms) of the calls, as a `RunningStats` when
+        `streaming` or else a list, and the `LineHistograms` of the calls, or None
+        without `histograms`.
+    """
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    if streaming:
+        from .stats import RunningStats, StreamingRecorder
+
+        recorder, total_time = StreamingRecorder(n_lines), RunningStats()
+        record_time = total_time.add
+    else:
+        recorder, total_time = Recorder(n_lines), []
+        record_time = total_time.append
+    namespace = {
+        key: importlib.import_module(value.name) if isinstance(value, ModuleRef) else value
+        for key, value in namespace.items()
+    }
+    if histograms:
+        from .histogram import LineHistograms
+
+        recorder.histograms = LineHistograms(n_lines)
+    namespace["_cp_recorder"] = recorder
+    exec(compile(source, "<codpulse>", "exec"), namespace)
+    function = namespace[name]
+    for _ in range(iterations):
+        t1 = time.perf_counter()
+        function(*args, **kwargs)
+        t2 = time.perf_counter()
+        record_time((t2 - t1) * 1000)
+    return (recorder.stats if streaming else recorder.calls), total_time, recorder.histograms
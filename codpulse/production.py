@@ -0,0 +1,389 @@
+import functools
+import inspect
+import os
+import threading
+import time
+import types
+import warnings
+from .instrumentation import compile_function
+from .threads import ThreadRecorder
+from .utils import display_results, process_stats
+
+_registry = {}
+
+
+class LiveNamespace(dict):
+    """
+    Globals of an instrumented copy that fall back to the live globals of the original.
+
+    Names missing from the namespace itself are looked up in `base` on every access,
+    so the copy sees later assignments to its module's globals, e.g. functions
+    defined after it.
+
+    Parameters
+    ----------
+    base : dict
+        Globals of the original function.
+    values : dict
+        Names that take precedence over `base`.
+    """
+
+    def __init__(self, base, values):
+        super().__init__(values)
+        self.base = base
+
+    def __missing__(self, key):
+        return self.base[key]
+
+
+class TrackedFunction:
+    """
+    Sampling state and statistics of a function decorated with `track`.
+
+    Parameters
+    ----------
+    function : callable
+        The original function.
+    sample_rate : float
+        Fraction of the calls that run the instrumented copy.
+    namespace : dict, optional
+        Names the instrumented copy sees in front of the function's globals.
+    shared : bool, optional
+        Also publish the statistics of this process to a shared memory segment, where they
+        are merged with those of the other processes (see `codpulse.shared`), by default
+        False.
+
+    Attributes
+    ----------
+    function : callable
+        The original function.
+    period : int
+        One call in `period` is sampled.
+    enabled : bool
+        Whether calls are sampled at all; while False every call goes straight to the
+        original function.
+    recorder : ThreadRecorder or None
+        Statistics of the sampled calls, by thread, once the first call was sampled.
+    segment : Segment or None
+        The shared memory segment of the function, with `shared`, once the first call was
+        sampled.
+    publish_interval : float
+        Least time between two writes of the statistics to `segment` by sampled calls, in
+        seconds (see `publish`).
+    """
+
+    publish_interval = 1.0
+
+    def __init__(self, function, sample_rate, namespace=None, shared=False):
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate!r}")
+        self.function = function
+        self.period = max(1, round(1 / sample_rate))
+        self.countdown = self.period
+        self.enabled = True
+        self.namespace = namespace or {}
+        self.is_async = inspect.iscoroutinefunction(function)
+        self.instrumented = None
+        self.recorder = None
+        self.executable = None
+        self.shared = shared
+        self.segment = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._publishing = threading.Lock()
+        self._published = None  # time.monotonic() of the last publish
+        if shared:
+            try:
+                import fcntl  # noqa: F401
+            except ImportError:
+                raise RuntimeError("shared statistics are not supported on this platform") from None
+
+    def enable(self):
+        """
+        Start sampling calls again.
+        """
+        self.countdown = self.period
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop sampling calls; the statistics recorded so far are kept.
+        """
+        self.enabled = False
+
+    def sample(self, args, kwargs):
+        """
+        Run one call through the instrumented copy and record it.
+
+        Parameters
+        ----------
+        args : tuple
+            Positional arguments of the call.
+        kwargs : dict
+            Keyword arguments of the call.
+
+        Returns
+        -------
+        object
+            The return value of the call.
+        """
+        self.countdown = self.period
+        if self.executable is None and not self._build():
+            return self.function(*args, **kwargs)
+        if self._pid != os.getpid():
+            # a forked worker starts from its own calls, not those of its parent
+            self._pid = os.getpid()
+            self.recorder.reset()
+            self._publishing = threading.Lock()
+            self._published = None
+            if self.segment is not None:
+                self._publish_at_exit()
+        if self.recorder.running():
+            # a call sampled inside a sampled call is part of it, and not timed again
+            return self.executable(*args, **kwargs)
+        if self.is_async:
+            return self._timed(self.executable(*args, **kwargs))
+        t1 = time.perf_counter()
+        try:
+            return self.executable(*args, **kwargs)
+        finally:
+            self._record((time.perf_counter() - t1) * 1000)
+
+    async def _timed(self, coroutine):
+        t1 = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            self._record((time.perf_counter() - t1) * 1000)
+
+    def _record(self, total_time):
+        self.recorder.record_time(total_time)
+        if self.segment is not None and (
+            self._published is None or time.monotonic() - self._published >= self.publish_interval
+        ):
+            self.publish()
+
+    def publish(self):
+        """
+        Write the statistics of this process to the shared memory segment, with `shared`.
+
+        Merging the statistics of all threads takes their locks, so sampled calls publish
+        at most once every `publish_interval` seconds, and the process publishes once more
+        when it exits. A single thread writes at a time: the call does nothing while
+        another thread publishes, or before the first sampled call of the process.
+        """
+        segment = self.segment
+        if segment is None or self._pid != os.getpid() or not self._publishing.acquire(blocking=False):
+            return
+        try:
+            self._published = time.monotonic()
+            if not segment.publish(self.recorder.stats, self.recorder.total_time):
+                warnings.warn(
+                    f"every slot of the segment of {self.function.__qualname__} is taken, "
+                    "statistics of this process are not shared",
+                    RuntimeWarning,
+                )
+                self.segment = None
+        finally:
+            self._publishing.release()
+
+    def _publish_at_exit(self):
+        # finalizers run at interpreter exit and, unlike atexit, in multiprocessing workers,
+        # which clear them when they start
+        from multiprocessing import util
+
+        util.Finalize(None, self.publish, exitpriority=0)
+
+    def _build(self):
+        with self._lock:
+            if self.executable is not None:
+                return True
+            try:
+                self._compile()
+            except Exception as error:
+                # the decorated function must keep working whatever the instrumentation makes of it
+                warnings.warn(
+                    f"codpulse cannot instrument {self.function.__qualname__}, sampling disabled: {error}",
+                    RuntimeWarning,
+                )
+                self.enabled = False
+                return False
+            return True
+
+    def _compile(self):
+        # the copy runs live code (see `codpulse.instrumentation.instrument_source`) in a new
+        # function object sharing the globals, closure cells and __class__ cell of the original
+        function = inspect.unwrap(self.function)
+        instrumented = compile_function(function, live=True)
+        recorder = ThreadRecorder(len(instrumented.lines), streaming=True)
+        # a HotSwap of the same function publishes its recorder under the name of the live code
+        global_name = f"{instrumented.recorder}_tracked"
+        code = instrumented.code
+        code = code.replace(
+            co_names=tuple(global_name if name == instrumented.recorder else name for name in code.co_names)
+        )
+        function.__globals__[global_name] = recorder
+        namespace = function.__globals__
+        if self.namespace:
+            namespace = LiveNamespace(function.__globals__, self.namespace)
+        # recursive calls go through the decorated function, not the copy
+        executable = types.FunctionType(
+            code, namespace, function.__name__, function.__defaults__, function.__closure__
+        )
+        executable.__kwdefaults__ = function.__kwdefaults__
+        if self.shared:
+            from .shared import Segment, segment_name
+
+            name = f"{self.function.__module__}.{self.function.__qualname__}"
+            metadata = {
+                "name": name,
+                "lines": list(instrumented.lines),
+                "parents": list(instrumented.parents),
+                "is_async": self.is_async,
+            }
+            self.segment = Segment(segment_name(name, instrumented.lines), metadata)
+            self._publish_at_exit()
+        self.instrumented, self.recorder = instrumented, recorder
+        self.executable = executable
+
+    def snapshot(self):
+        """
+        Get the statistics of the calls sampled so far.
+
+        Returns
+        -------
+        ResultTable or None
+            The per-line statistics, in the format of `process_stats`, or None before the
+            first sampled call.
+        """
+        if self.recorder is None:
+            return None
+        return process_stats(
+            self.recorder.stats,
+            self.instrumented.lines,
+            self.instrumented.parents,
+            split_await=self.is_async,
+        )
+
+    def report(self):
+        """
+        Display the statistics of the calls sampled so far.
+        """
+        table = self.snapshot()
+        if table is None:
+            print(f"{self.function.__qualname__}: no call sampled yet")
+            return
+        total_time = self.recorder.total_time
+        display_results(table, total_time, total_time.count, self.function.__qualname__)
+
+    def reset(self):
+        """
+        Forget the statistics recorded so far.
+        """
+        if self.recorder is not None:
+            self.recorder.reset()
+
+
+def track(function=None, *, sample_rate=0.01, namespace=None, shared=False):
+    """
+    Decorator that profiles a sampled fraction of the calls of a function in production.
+
+    Most calls go straight to the original function. Every ``1 / sample_rate``-th call
+    runs an instrumented copy instead, built on the first sampled call, and its per-line
+    times are folded into running statistics of the calling thread. Every call returns
+    the real return value of the function.
+
+    Parameters
+    ----------
+    function : callable, optional
+        The function to decorate, when used as ``@track`` without arguments.
+    sample_rate : float, optional
+        Fraction of the calls to profile, by default 0.01.
+    namespace : dict, optional
+        Names the instrumented copy sees in front of the function's globals, by default
+        None. The copy shares the globals, closure cells and ``__class__`` cell of the
+        function, so ``nonlocal``, ``super()`` and private names behave as in the original.
+        If the copy cannot be built, sampling is disabled with a warning and every call
+        runs the original.
+    shared : bool, optional
+        Also merge the statistics across processes, by default False. Every process, e.g.
+        every worker of a prefork server, writes its statistics to a slot of its own in a
+        shared memory segment named after the function and its source, at most once a second
+        while calls are sampled and when it exits; `codpulse.shared.report` or ``python -m
+        codpulse collect`` merges the slots at any time, without interrupting the workers.
+
+    Returns
+    -------
+    callable
+        The decorated function, a coroutine function when `function` is one. Its
+        ``tracking`` attribute is the `TrackedFunction` with the statistics and the kill
+        switch.
+
+    Notes
+    -----
+    While sampling is disabled (``f.tracking.disable()``), a call costs one attribute
+    check on top of calling the original. With the environment variable
+    ``CODPULSE_DISABLE`` set, `track` returns the function undecorated, with a disabled
+    `TrackedFunction` as its ``tracking`` attribute: its statistics stay empty and
+    ``enable()`` does not start sampling.
+
+    Examples
+    --------
+    >>> @track(sample_rate=0.01)
+    ... def handler(request):
+    ...     ...
+
+    >>> handler.tracking.report()
+    >>> tracked_functions()["module.handler"].snapshot()
+    """
+
+    def decorate(function):
+        if os.environ.get("CODPULSE_DISABLE"):
+            # the function runs undecorated, but code reading its statistics keeps working
+            tracking = TrackedFunction(function, sample_rate, namespace)
+            tracking.enabled = False
+            function.tracking = tracking
+            _registry[f"{function.__module__}.{function.__qualname__}"] = tracking
+            return function
+        tracking = TrackedFunction(function, sample_rate, namespace, shared)
+
+        if tracking.is_async:
+            # frameworks tell handlers apart with inspect.iscoroutinefunction
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                if tracking.enabled:
+                    tracking.countdown -= 1
+                    if tracking.countdown <= 0:
+                        return await tracking.sample(args, kwargs)
+                return await function(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if tracking.enabled:
+                    tracking.countdown -= 1
+                    if tracking.countdown <= 0:
+                        return tracking.sample(args, kwargs)
+                return function(*args, **kwargs)
+
+        wrapper.tracking = tracking
+        _registry[f"{function.__module__}.{function.__qualname__}"] = tracking
+        return wrapper
+
+    if function is not None:
+        return decorate(function)
+    return decorate
+
+
+def tracked_functions():
+    """
+    Get the functions decorated with `track` in this process.
+
+    Returns
+    -------
+    dict
+        Qualified name (``module.qualname``) to the `TrackedFunction` of every decorated
+        function.
+    """
+    return dict(_registry)
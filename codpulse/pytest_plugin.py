@@ -0,0 +1,217 @@
+"""
+pytest plugin that fails tests whose lines got slower than a stored baseline.
+
+Enable it with ``-p codpulse.pytest_plugin`` or ``pytest_plugins = ["codpulse.pytest_plugin"]``
+in a ``conftest.py``. A test marked with
+
+    @pytest.mark.codepulse(baseline="baselines/parse.cpr", iterations=20)
+    def test_parse(document):
+        ...
+
+is run `iterations` times under a `Tracker` (with the "live" engine, so fixtures, globals
+and closures work as usual). The time of every line in every iteration, and the total, are
+compared to the last run of the same test and function in the baseline history file (see
+`codpulse.history`) with a one-sided Mann-Whitney U test. The test fails with the list of
+the lines that got significantly slower. The ``codepulse`` fixture does the same for a
+function called from a test, and returns what the function returned:
+
+    @pytest.mark.codepulse(baseline="baselines/parse.cpr")
+    def test_parse_hot_path(codepulse, document):
+        assert codepulse(parse, document)
+
+A missing baseline is created from the current run. ``--codepulse-update`` appends the
+current runs to their baselines instead of comparing them, and ``--codepulse-skip`` runs
+marked tests once, without profiling.
+"""
+import functools
+import inspect
+import os
+import pytest
+from .history import append_run, capture, load_history, match_lines
+from .significance import mann_whitney_u
+
+DEFAULTS = {"iterations": 20, "alpha": 0.01, "threshold": 0.05, "min_ms": 0.01}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("codpulse", "line-level performance regression gates")
+    group.addoption(
+        "--codepulse-update",
+        action="store_true",
+        help="append the runs of tests marked codepulse to their baselines instead of comparing them",
+    )
+    group.addoption(
+        "--codepulse-skip",
+        action="store_true",
+        help="run tests marked codepulse once, without profiling them",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "codepulse(baseline, iterations=20, alpha=0.01, threshold=0.05, min_ms=0.01): profile the test line by line "
+        "and fail when lines got significantly slower than in the baseline history file",
+    )
+
+
+def _options(item):
+    marker = item.get_closest_marker("codepulse")
+    if marker is None:
+        return None
+    options = dict(DEFAULTS)
+    if marker.args:
+        options["baseline"] = marker.args[0]
+    options.update(marker.kwargs)
+    if "baseline" not in options:
+        raise pytest.UsageError(f"{item.nodeid}: the codepulse marker needs a baseline file")
+    baseline = options["baseline"]
+    if not os.path.isabs(baseline):
+        options["baseline"] = os.path.join(os.path.dirname(str(item.fspath)), baseline)
+    return options
+
+
+def regressions(old, new, alpha=0.01, threshold=0.05, min_ms=0.01):
+    """
+    Find the lines of a run that are significantly slower than in a baseline run.
+
+    Lines are matched by their source text (see `codpulse.history.match_lines`). A line
+    regressed when its per-iteration times are greater than the baseline's by a one-sided
+    Mann-Whitney U test at level `alpha`, and its median time grew by more than
+    `threshold` and by more than `min_ms`, so lines that take a few microseconds do not
+    fail on noise.
+
+    Parameters
+    ----------
+    old, new : Run
+        The baseline and the current run; both need per-iteration times.
+    alpha : float, optional
+        Significance level, by default 0.01.
+    threshold : float, optional
+        Smallest relative growth of the median that counts, by default 0.05.
+    min_ms : float, optional
+        Smallest absolute growth of the median that counts, in ms, by default 0.01.
+
+    Returns
+    -------
+    list of tuple
+        ``(line id, source text, baseline median, current median, p-value)`` of every
+        regressed line, in ms, with line id -1 for the total time.
+    """
+    found = []
+
+    def check(line_id, text, before, after):
+        before = sorted(x for x in before if x == x)
+        after = sorted(x for x in after if x == x)
+        if not before or not after:
+            return
+        old_median, new_median = _median(before), _median(after)
+        if new_median <= old_median * (1 + threshold) or new_median - old_median <= min_ms:
+            return
+        _, p = mann_whitney_u(before, after, "greater")
+        if p < alpha:
+            found.append((line_id, text, old_median, new_median, p))
+
+    if old.total_time is not None and new.total_time is not None:
+        check(-1, "<total>", old.total_time, new.total_time)
+    for old_id, new_id in match_lines(old.lines, new.lines):
+        if old_id is None or new_id is None:
+            continue
+        before, after = old.samples(old_id), new.samples(new_id)
+        if before is not None and after is not None:
+            check(new_id, new.lines[new_id].strip(), before, after)
+    return found
+
+
+def _median(values):
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def gate(tracker, options, config, test_id):
+    """
+    Compare the last call of a tracker to its baseline and fail the test on regressions.
+
+    Parameters
+    ----------
+    tracker : Tracker
+        Tracker of the profiled function, after its call.
+    options : dict
+        Options of the ``codepulse`` marker.
+    config : pytest.Config
+        Configuration of the test session.
+    test_id : str
+        Node id of the test; runs are labelled with it, so tests profiling the same
+        function with different inputs have baselines of their own.
+    """
+    run = capture(tracker, test_id)
+    path = options["baseline"]
+    baseline = load_history(path, run.name) if os.path.exists(path) else []
+    baseline = [old for old in baseline if old.label == test_id]
+    if config.getoption("codepulse_update") or not baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        append_run(path, run)
+        return
+    found = regressions(baseline[-1], run, options["alpha"], options["threshold"], options["min_ms"])
+    if found:
+        lines = "\n".join(
+            f"  {'total' if line_id < 0 else f'LineNo {line_id}'} `{text}`: "
+            f"{old:.3f} ms -> {new:.3f} ms ({(new / old - 1) * 100 if old else float('inf'):+.1f}%), p={p:.2g}"
+            for line_id, text, old, new, p in found
+        )
+        pytest.fail(f"{run.name} got slower than its baseline {path}:\n{lines}", pytrace=False)
+
+
+def _profile(function, options, config, test_id, args, kwargs):
+    from .TrackerClass import Tracker
+
+    last = {}
+
+    # the tracker swaps the code of the wrapped function, the wrapper only keeps the result
+    @functools.wraps(function)
+    def keep_result(*args, **kwargs):
+        last["result"] = function(*args, **kwargs)
+        return last["result"]
+
+    tracker = Tracker(keep_result, no_iterations=options["iterations"], engine="live")
+    tracker(*args, **kwargs)
+    gate(tracker, options, config, test_id)
+    return last.get("result")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    options = _options(pyfuncitem)
+    if options is None or "codepulse" in pyfuncitem.fixturenames:
+        return None
+    function = pyfuncitem.obj
+    if inspect.iscoroutinefunction(function) or pyfuncitem.config.getoption("codepulse_skip"):
+        return None
+    kwargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    _profile(function, options, pyfuncitem.config, pyfuncitem.nodeid, (), kwargs)
+    return True
+
+
+@pytest.fixture
+def codepulse(request):
+    """
+    Profile a function called from the test and compare it to the test's baseline.
+
+    Returns
+    -------
+    callable
+        ``codepulse(function, *args, **kwargs)`` runs the function under a `Tracker` with
+        the options of the test's ``codepulse`` marker, fails the test when lines got
+        slower than in the baseline, and returns what the function returned (in its last
+        iteration).
+    """
+    options = _options(request.node)
+    if options is None:
+        raise pytest.UsageError(f"{request.node.nodeid}: the codepulse fixture needs a codepulse marker")
+
+    def check(function, *args, **kwargs):
+        if request.config.getoption("codepulse_skip"):
+            return function(*args, **kwargs)
+        return _profile(function, options, request.config, request.node.nodeid, args, kwargs)
+
+    return check
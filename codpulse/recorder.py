@@ -0,0 +1,199 @@
+import contextvars
+import time
+from .awaiting import Awaited, AwaitedContext, AwaitedIterator
+
+FIELDS = ("hits", "total", "min", "max", "await")
+STRIDE = len(FIELDS)
+HITS, TOTAL, MIN, MAX, AWAIT = range(STRIDE)
+
+
+class Recorder:
+    """
+    Runtime that instrumented functions write their per-line measurements to.
+
+    Every call of an instrumented function gets a flat, preallocated buffer from
+    `enter`, holding ``STRIDE`` slots per line id: hit count, cumulative time,
+    minimum and maximum time of a single execution, and the time the statement
+    spent suspended at its own ``await`` expressions in coroutine functions (all
+    times in seconds). The buffer is handed back to `exit` when the call finishes.
+
+    A call made while another call of the same function runs in the same thread or
+    asyncio task, i.e. a recursive call, is merged into the buffer of the outermost
+    call when it finishes, so there is one buffer per outer call and the hits of a
+    line count its executions at every depth. Like the time of any call, the time of
+    the nested calls is included in the lines that make them, at every depth.
+    Calls of generator functions are always recorded separately.
+
+    Buffers are plain lists of floats: the probes read and write single slots, and
+    list item access is noticeably cheaper than ``array('d')`` item access, which
+    boxes and unboxes a float on every read and write.
+
+    Parameters
+    ----------
+    n_lines : int
+        Number of probed lines of the instrumented function.
+
+    Attributes
+    ----------
+    n_lines : int
+        Number of probed lines of the instrumented function.
+    calls : list of list
+        Buffers of the calls finished since the last `drain`.
+    clock : callable
+        Clock read by the probes.
+    memory : MemoryProbes or None
+        Runtime of the memory probes, for code instrumented with ``memory=True``
+        (see `codpulse.memory`).
+    histograms : LineHistograms or None
+        Histograms the histogram probes count every execution in, for code
+        instrumented with ``histograms=True`` (see `codpulse.histogram`).
+    cpu : CpuTimes or None
+        CPU times of the lines, for code instrumented with ``cpu=True`` (see
+        `codpulse.cputime`).
+    timeline : SlowCalls or None
+        Keeps the line timelines of the slowest calls, for code instrumented with
+        ``timeline=True`` (see `codpulse.timeline`).
+
+    Examples
+    --------
+    >>> recorder = Recorder(len(instrumented.lines))
+    >>> namespace = {"_cp_recorder": recorder}
+    >>> exec(instrumented.code, namespace)
+    >>> namespace[instrumented.name](3, 5)
+    >>> buffer = recorder.drain()[-1]
+    >>> buffer[TOTAL::STRIDE]  # cumulative time of every line
+    """
+
+    clock = staticmethod(time.perf_counter)
+    memory = None
+    histograms = None
+    cpu = None
+    timeline = None
+
+    def __init__(self, n_lines):
+        self.n_lines = n_lines
+        self.calls = []
+        self._template = [0.0, 0.0, float("inf"), 0.0, 0.0] * n_lines
+        # buffer of the outermost running call, by thread and asyncio task
+        self._outer = contextvars.ContextVar("codpulse_outer_call", default=None)
+
+    def enter(self, generator=False):
+        """
+        Get a fresh, zeroed buffer for a call of the instrumented function.
+
+        Parameters
+        ----------
+        generator : bool, optional
+            Whether the function is a generator, by default False. A suspended
+            generator does not run, so calls made while it is suspended are not
+            nested in it.
+
+        Returns
+        -------
+        list of float
+            Buffer of ``n_lines * STRIDE`` slots.
+        """
+        buffer = self._template[:]
+        if not generator and self._outer.get() is None:
+            self._outer.set(buffer)
+        return buffer
+
+    def exit(self, buffer):
+        """
+        Collect the buffer of a finished call, or merge it into the buffer of the
+        outermost call if it was made while that call runs.
+
+        Parameters
+        ----------
+        buffer : list of float
+            The buffer returned by `enter` for this call.
+        """
+        outer = self._outer.get()
+        if outer is None or outer is buffer:
+            if outer is not None:
+                self._outer.set(None)
+            self._collect(buffer)
+            return
+        for base in range(0, len(buffer), STRIDE):
+            outer[base + HITS] += buffer[base + HITS]
+            outer[base + TOTAL] += buffer[base + TOTAL]
+            outer[base + AWAIT] += buffer[base + AWAIT]
+            if buffer[base + MIN] < outer[base + MIN]:
+                outer[base + MIN] = buffer[base + MIN]
+            if buffer[base + MAX] > outer[base + MAX]:
+                outer[base + MAX] = buffer[base + MAX]
+
+    def _collect(self, buffer):
+        self.calls.append(buffer)
+
+    def running(self):
+        """
+        Whether a call is running in the calling thread or asyncio task, i.e. whether a
+        call made now would be merged into it.
+
+        Returns
+        -------
+        bool
+            True while the outermost call of the calling thread or task runs.
+        """
+        return self._outer.get() is not None
+
+    def awaited(self, awaitable, buffer, index):
+        """
+        Wrap an awaited object so its suspensions are timed (see `codpulse.awaiting`).
+
+        Parameters
+        ----------
+        awaitable : awaitable
+            The awaited object.
+        buffer : list of float
+            Per-call buffer of the awaiting function.
+        index : int
+            Slot of `buffer` the suspended time is added to.
+
+        Returns
+        -------
+        Awaited
+            Awaitable with the result of `awaitable`.
+        """
+        return Awaited(awaitable, buffer, index, self.clock)
+
+    def aiter(self, iterable, buffer, index):
+        """
+        Wrap the iterable of an ``async for`` so its suspensions are timed.
+
+        Returns
+        -------
+        AwaitedIterator
+            Asynchronous iterator over `iterable`.
+        """
+        return AwaitedIterator(iterable, buffer, index, self.clock)
+
+    def acontext(self, manager, buffer, index):
+        """
+        Wrap the context manager of an ``async with`` so its suspensions are timed.
+
+        Returns
+        -------
+        AwaitedContext
+            Asynchronous context manager delegating to `manager`.
+        """
+        return AwaitedContext(manager, buffer, index, self.clock)
+
+    def reset(self):
+        """
+        Forget the buffers collected so far.
+        """
+        self.calls = []
+
+    def drain(self):
+        """
+        Return the buffers collected so far and forget them.
+
+        Returns
+        -------
+        list of list
+            Buffers of the calls finished since the last `drain`.
+        """
+        calls, self.calls = self.calls, []
+        return calls
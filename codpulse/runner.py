@@ -0,0 +1,353 @@
+"""
+Run a script or module with some of its functions profiled line by line.
+
+This is the implementation of ``python -m codpulse script.py --func module:qualname``.
+Nothing is instrumented up front: the source of the script, and of every module that
+holds a requested function, is parsed when it is run or first imported, and a decorator
+is added to the requested definitions only. When such a function is defined, its code
+is swapped for instrumented code (see `codpulse.hotswap.HotSwap`), so it keeps its
+globals and closure, and the name it is bound to gets a ``functools.wraps`` wrapper that
+times its calls: the program sees the wrapper, not the function object it defined.
+Other modules are imported as usual.
+"""
+import ast
+import builtins
+import contextvars
+import functools
+import importlib.machinery
+import importlib.util
+import inspect
+import os
+import sys
+import time
+import types
+
+DEFINE = "_codpulse_define"  # global holding the decorator of the requested functions
+
+
+class Target:
+    """
+    A function to profile while a program runs.
+
+    Calling the target with the function object, as the added decorator does when the
+    function is defined, instruments it in place with a `Tracker` using the "live" engine
+    and returns a wrapper that times every call. Only the first definition of a target is
+    instrumented, later ones (e.g. of a nested function) are returned as they are.
+
+    Parameters
+    ----------
+    module : str
+        Name of the module the function is defined in.
+    qualname : str
+        Qualified name of the function in its module, e.g. ``Parser.parse``.
+    iterations : int, optional
+        Times every call is run, by default 1: the program runs as usual. With more, every
+        call repeats the function, side effects included, and returns the last result.
+
+    Attributes
+    ----------
+    tracker : Tracker or None
+        Tracker of the function, once it was defined.
+    """
+
+    def __init__(self, module, qualname, iterations=1):
+        self.module = module
+        self.qualname = qualname
+        self.iterations = iterations
+        self.tracker = None
+        self._running = None
+        self._record_time = None
+        # set while a call of this thread or task is timed, as Recorder does for its buffers
+        self._timing = contextvars.ContextVar("codpulse_timed_call", default=False)
+
+    def __call__(self, function):
+        if self.tracker is not None:
+            return function
+        from .TrackerClass import Tracker
+
+        self.tracker = Tracker(function, no_iterations=self.iterations, engine="live")
+        self._record_time = self.tracker._start()
+        self._running = self.tracker._running()
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                if self._timing.get():
+                    return await function(*args, **kwargs)
+                token = self._timing.set(True)
+                try:
+                    for _ in range(self.iterations):
+                        t1 = time.perf_counter()
+                        result = await function(*args, **kwargs)
+                        t2 = time.perf_counter()
+                        self._record_time((t2 - t1) * 1000)
+                finally:
+                    self._timing.reset(token)
+                return result
+
+        else:
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                # recursive calls run once, inside the timed outer call
+                if self._timing.get():
+                    return function(*args, **kwargs)
+                token = self._timing.set(True)
+                try:
+                    for _ in range(self.iterations):
+                        t1 = time.perf_counter()
+                        result = function(*args, **kwargs)
+                        t2 = time.perf_counter()
+                        self._record_time((t2 - t1) * 1000)
+                finally:
+                    self._timing.reset(token)
+                return result
+
+        return wrapper
+
+    @property
+    def name(self):
+        return f"{self.module}:{self.qualname}"
+
+    def finish(self, path=None):
+        """
+        Restore the original code and display the results, or append them to a history file.
+
+        Parameters
+        ----------
+        path : str, optional
+            History file to append the results to instead of displaying them (see
+            `Tracker.save`).
+
+        Returns
+        -------
+        bool
+            Whether the function was defined and called.
+        """
+        if self.tracker is None:
+            print(f"codpulse: {self.name} was never defined", file=sys.stderr)
+            return False
+        self._running.close()
+        if not self.tracker.total_time:
+            print(f"codpulse: {self.name} was never called", file=sys.stderr)
+            return False
+        if path is None:
+            self.tracker._finish()
+        else:
+            self.tracker[1] = self.tracker.snapshot()
+            self.tracker.save(path)
+        return True
+
+
+def parse_target(spec, main_module, iterations=1):
+    """
+    Parse a ``module:qualname`` function specification.
+
+    Parameters
+    ----------
+    spec : str
+        ``module:qualname``; ``qualname`` alone, ``:qualname`` or ``__main__:qualname``
+        name a function of the program's main module.
+    main_module : str
+        Name the main module runs under (``__main__`` for a script, the module name for
+        ``-m``).
+    iterations : int, optional
+        Times every call is run (see `Target`).
+
+    Returns
+    -------
+    Target
+        The function to profile.
+    """
+    module, _, qualname = spec.rpartition(":")
+    if not qualname:
+        raise ValueError(f"{spec!r} names no function, expected module:qualname")
+    if module in ("", "__main__"):
+        module = main_module
+    return Target(module, qualname, iterations)
+
+
+class _DefineInserter(ast.NodeVisitor):
+    # adds the `DEFINE` decorator, innermost, to the definitions of the requested functions
+    def __init__(self, qualnames):
+        self.qualnames = qualnames
+        self.scope = []
+
+    def visit_ClassDef(self, node):
+        self.scope.append(node.name)
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_FunctionDef(self, node):
+        qualname = ".".join(self.scope + [node.name])
+        if qualname in self.qualnames:
+            decorator = ast.Call(ast.Name(DEFINE, ast.Load()), [ast.Constant(qualname)], [])
+            node.decorator_list.append(ast.copy_location(decorator, node))
+        self.scope += [node.name, "<locals>"]
+        self.generic_visit(node)
+        del self.scope[-2:]
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def compile_source(source, filename, qualnames):
+    """
+    Compile the source of a module, decorating the definitions of some of its functions.
+
+    Parameters
+    ----------
+    source : str or bytes
+        Source of the module.
+    filename : str
+        File name for the code, tracebacks and `inspect.getsource`.
+    qualnames : collection of str
+        Qualified names of the functions to decorate with the ``_codpulse_define``
+        global of the module.
+
+    Returns
+    -------
+    code
+        The module code; line numbers are those of the source.
+    """
+    tree = ast.parse(source, filename)
+    _DefineInserter(qualnames).visit(tree)
+    ast.fix_missing_locations(tree)
+    return compile(tree, filename, "exec", dont_inherit=True)
+
+
+class _Loader:
+    # wraps the loader of a module with requested functions, delegating everything else
+    def __init__(self, loader, targets):
+        self.loader = loader
+        self.targets = targets
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def get_code(self, fullname):
+        # also used by runpy to run a module with -m
+        return compile_source(
+            self.loader.get_source(fullname), self.loader.get_filename(fullname), self.targets
+        )
+
+    def exec_module(self, module):
+        module.__dict__[DEFINE] = self.targets.__getitem__
+        exec(self.get_code(module.__name__), module.__dict__)
+
+
+class _Finder:
+    # meta path finder that hands the modules with requested functions to a `_Loader`
+    def __init__(self, targets):
+        self.targets = targets  # module name -> {qualname: Target}
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname not in self.targets:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if isinstance(spec.loader, importlib.machinery.SourceFileLoader):
+            spec.loader = _Loader(spec.loader, self.targets.pop(fullname))
+        return spec
+
+
+def main_module_name(module):
+    """
+    Get the name of the module ``python -m module`` runs: ``module.__main__`` for packages.
+
+    Parameters
+    ----------
+    module : str
+        Name given to ``-m``.
+
+    Returns
+    -------
+    str
+        Name of the module whose code runs.
+    """
+    spec = importlib.util.find_spec(module)
+    if spec is None:
+        raise ImportError(f"No module named {module}")
+    if spec.submodule_search_locations is not None:
+        return f"{module}.__main__"
+    return module
+
+
+def run(targets, script=None, module=None, args=(), path=None):
+    """
+    Run a script or module with some of its functions profiled, then report on them.
+
+    The program runs as it would with ``python script.py`` or ``python -m module``, with
+    `args` as its command-line arguments.
+
+    Parameters
+    ----------
+    targets : list of Target
+        Functions to profile.
+    script : str, optional
+        Path of the script to run.
+    module : str, optional
+        Module to run instead of a script.
+    args : sequence of str, optional
+        Arguments of the program, ``sys.argv[1:]`` while it runs.
+    path : str, optional
+        History file to append the results to instead of displaying them.
+
+    Returns
+    -------
+    int
+        Exit status of the program.
+    """
+    import runpy
+
+    by_module = {}
+    for target in targets:
+        by_module.setdefault(target.module, {})[target.qualname] = target
+    if script is not None:
+        main_targets = by_module.pop("__main__", {})
+    else:
+        # before the finder is installed, which would take the targets of the module
+        main_targets = by_module.get(main_module_name(module), {})
+    finder = _Finder(by_module)
+    sys.meta_path.insert(0, finder)
+    status = 0
+    try:
+        if script is not None:
+            sys.argv[:] = [script, *args]
+            sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+            with open(script, "rb") as f:
+                code = compile_source(f.read(), script, main_targets)
+            main = types.ModuleType("__main__")
+            main.__dict__.update(
+                __file__=script,
+                __builtins__=builtins,
+                __spec__=importlib.machinery.ModuleSpec("__main__", None, origin=script),
+                __cached__=None,
+            )
+            main.__dict__[DEFINE] = main_targets.__getitem__
+            sys.modules["__main__"] = main
+            exec(code, main.__dict__)
+        else:
+            sys.argv[:] = [module, *args]
+            sys.path.insert(0, os.getcwd())
+            runpy.run_module(
+                module,
+                init_globals={DEFINE: main_targets.__getitem__},
+                run_name="__main__",
+                alter_sys=True,
+            )
+    except SystemExit as exit:
+        status = exit.code
+    finally:
+        sys.meta_path.remove(finder)
+        for target in targets:
+            target.finish(path)
+    return status
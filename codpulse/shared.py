@@ -0,0 +1,477 @@
+import collections
+import json
+import os
+import struct
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+from .history import source_hash
+from .stats import LineStats, RunningStats
+
+PREFIX = "codpulse_"
+MAGIC = b"CPSH"
+VERSION = 2
+HEADER = struct.Struct("<4sIIII")  # magic, version, n_lines, n_slots, metadata bytes
+METADATA = HEADER.size + 4  # the metadata, then the slots, start 8-byte aligned
+# slot: sequence, pid and start time of its process, calls, then the total time and the
+# per-line statistics, all float64
+SEQUENCE, PID, STARTED, CALLS, TOTAL_COUNT, TOTAL_MEAN, TOTAL_M2 = range(7)
+SLOT_HEADER = 7
+LINE_FIELDS = ("hits", "mean", "m2", "min", "max", "awaits")
+RETIRED = -1.0  # pid of slot 0, which holds the statistics of workers that exited
+
+Collected = collections.namedtuple(
+    "Collected", ["name", "lines", "parents", "is_async", "stats", "total_time", "workers"]
+)
+Collected.__doc__ = """
+Statistics of a function merged from all worker processes (see `collect`).
+
+Attributes
+----------
+name : str
+    Qualified name (``module.qualname``) of the function.
+lines : list of str
+    Source text of every probed line.
+parents : list of int
+    Line id of the statement enclosing every line, or -1.
+is_async : bool
+    Whether the function is a coroutine function.
+stats : LineStats
+    The merged per-line statistics.
+total_time : RunningStats
+    The merged total times of the sampled calls, in ms.
+workers : int
+    Number of slots with statistics, retired workers counted as one.
+"""
+
+
+def segment_name(name, lines):
+    """
+    Name of the shared memory segment of a function.
+
+    Parameters
+    ----------
+    name : str
+        Qualified name (``module.qualname``) of the function.
+    lines : sequence of str
+        Source text of its probed lines.
+
+    Returns
+    -------
+    str
+        ``codpulse_`` and a hash of the name and the source, so a changed function gets a
+        new segment with a layout of its own.
+    """
+    return PREFIX + source_hash([name, *lines])[:20]
+
+
+def _lock_path(name):
+    return os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+
+class _Locked:
+    # fcntl lock of a segment, taken to create it and to claim or retire a slot, never
+    # while recording
+
+    def __init__(self, name):
+        self.path = _lock_path(name)
+
+    def __enter__(self):
+        import fcntl
+
+        self.file = open(self.path, "a")
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.file.close()  # releases the lock
+
+
+def _attach(name, size=None):
+    created = False
+    if size is not None:
+        try:
+            memory = shared_memory.SharedMemory(name, create=True, size=size)
+            created = True
+        except FileExistsError:
+            pass
+    if not created:
+        memory = shared_memory.SharedMemory(name)
+    # the segment outlives every process: keep the resource tracker from unlinking it
+    # when the process that created or attached it exits
+    try:
+        resource_tracker.unregister(memory._name, "shared_memory")
+    except Exception:
+        pass
+    return memory, created
+
+
+class Segment:
+    """
+    Shared memory segment with the per-line statistics of a function in every worker.
+
+    The segment has a fixed layout: a header, the line table as JSON, and `n_slots` slots
+    of float64 values. Slot 0 holds the statistics of workers that exited; every other
+    slot belongs to one worker process, which claims it on its first `publish`. Claiming
+    a slot takes an ``fcntl`` lock on a file next to the segment; after that, a worker
+    writes only to its own slot, without locks or atomic operations, and readers never
+    block it: every write increments the sequence number of the slot before and after,
+    so `read` retries a slot that was being written while it copied it. This only holds
+    with a single writer per slot, so the threads of a process must not `publish` at the
+    same time (`codpulse.production.TrackedFunction` serialises them).
+
+    A slot records the pid of its process and, where ``/proc`` tells it, the start time
+    of that process, so a slot whose process exited is retired even if its pid was
+    reused by another process since.
+
+    Parameters
+    ----------
+    name : str
+        Name of the segment (see `segment_name`).
+    metadata : dict, optional
+        Qualified name, lines, parents and ``is_async`` of the function, to create the
+        segment if it does not exist yet, by default None: attach to an existing segment.
+    n_slots : int, optional
+        Number of worker slots when the segment is created, by default 64.
+
+    Attributes
+    ----------
+    name : str
+        Name of the segment.
+    metadata : dict
+        Qualified name, lines, parents and ``is_async`` of the function.
+    n_lines : int
+        Number of probed lines.
+    slots : numpy.ndarray
+        View of the slots, one row each.
+    """
+
+    def __init__(self, name, metadata=None, n_slots=64):
+        import numpy as np
+
+        self.name = name
+        created = False
+        if metadata is not None:
+            blob = json.dumps(metadata).encode()
+            blob += b" " * (-len(blob) % 8)
+            n_lines = len(metadata["lines"])
+            width = SLOT_HEADER + len(LINE_FIELDS) * n_lines
+            with _Locked(name):
+                self._memory, created = _attach(name, METADATA + len(blob) + n_slots * width * 8)
+                if created:
+                    self._memory.buf[METADATA : METADATA + len(blob)] = blob
+                    HEADER.pack_into(self._memory.buf, 0, MAGIC, VERSION, n_lines, n_slots, len(blob))
+                    self._map()
+                    self.slots[0, PID] = RETIRED
+                    self._lines(0)[:, LINE_FIELDS.index("min")] = np.inf
+        else:
+            self._memory, _ = _attach(name)
+        if not created:
+            self._map()
+        self._slot = None
+        self._pid = None
+
+    def _map(self):
+        import numpy as np
+
+        magic, version, n_lines, n_slots, length = HEADER.unpack_from(self._memory.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self._memory.close()
+            raise ValueError(f"{self.name} is not a codpulse segment of version {VERSION}")
+        self.metadata = json.loads(bytes(self._memory.buf[METADATA : METADATA + length]))
+        self.n_lines = n_lines
+        width = SLOT_HEADER + len(LINE_FIELDS) * n_lines
+        self.slots = np.ndarray(
+            (n_slots, width), dtype=np.float64, buffer=self._memory.buf, offset=METADATA + length
+        )
+
+    def _lines(self, slot):
+        return self.slots[slot, SLOT_HEADER:].reshape(self.n_lines, len(LINE_FIELDS))
+
+    def close(self):
+        """
+        Detach from the segment; it stays available to the other processes.
+        """
+        self.slots = None
+        self._memory.close()
+
+    def unlink(self):
+        """
+        Delete the segment and its lock file.
+        """
+        # unlink unregisters the segment from the resource tracker, which `_attach` did already
+        resource_tracker.register(self._memory._name, "shared_memory")
+        self._memory.unlink()
+        try:
+            os.remove(_lock_path(self.name))
+        except OSError:
+            pass
+
+    def claim(self):
+        """
+        Claim a free slot for the calling process, retiring the slots of exited workers
+        when none is free.
+
+        Returns
+        -------
+        int or None
+            The slot, None if every slot belongs to a running process.
+        """
+        pid = os.getpid()
+        with _Locked(self.name):
+            pids = self.slots[:, PID]
+            free = [slot for slot in range(1, len(pids)) if pids[slot] == 0]
+            if not free:
+                for slot in range(1, len(pids)):
+                    if not _alive(int(pids[slot]), self.slots[slot, STARTED]):
+                        self._retire(slot)
+                        free.append(slot)
+            if not free:
+                return None
+            slot = free[0]
+            self.slots[slot, SLOT_HEADER:] = 0.0
+            self._lines(slot)[:, LINE_FIELDS.index("min")] = float("inf")
+            self.slots[slot, PID] = pid
+            self.slots[slot, STARTED] = _start_time(pid) or 0.0
+        self._slot, self._pid = slot, pid
+        return slot
+
+    def _retire(self, slot):
+        stats, total_time = self.read(slot)
+        retired, retired_time = self.read(0)
+        retired.merge(stats)
+        retired_time.merge(total_time)
+        self._write(0, retired, retired_time)
+        self.slots[slot, :] = 0.0
+
+    def publish(self, stats, total_time):
+        """
+        Write the statistics of the calling process to its slot.
+
+        Parameters
+        ----------
+        stats : LineStats
+            All statistics of the process so far.
+        total_time : RunningStats
+            All total times of the process so far, in ms.
+
+        Returns
+        -------
+        bool
+            False if no slot is free, the statistics are then not shared.
+        """
+        if self._pid != os.getpid() and self.claim() is None:
+            return False
+        self._write(self._slot, stats, total_time)
+        return True
+
+    def _write(self, slot, stats, total_time):
+        row = self.slots[slot]
+        row[SEQUENCE] += 1  # odd: being written
+        row[CALLS] = stats.calls
+        row[TOTAL_COUNT] = total_time.count
+        row[TOTAL_MEAN] = total_time.mean
+        row[TOTAL_M2] = total_time.m2
+        lines = self._lines(slot)
+        lines[:, 0] = stats.hits
+        lines[:, 1] = stats.totals.mean
+        lines[:, 2] = stats.totals.m2
+        lines[:, 3] = stats.min
+        lines[:, 4] = stats.max
+        lines[:, 5] = stats.awaits
+        row[SEQUENCE] += 1
+
+    def read(self, slot, retries=1000):
+        """
+        Read the statistics of a slot, without blocking its writer.
+
+        Parameters
+        ----------
+        slot : int
+            The slot.
+        retries : int, optional
+            Most copies of a slot that is being written, by default 1000.
+
+        Returns
+        -------
+        tuple
+            `LineStats` and `RunningStats` of the total times, in ms.
+
+        Raises
+        ------
+        RuntimeError
+            If every copy caught the slot in the middle of a write by a running process.
+        """
+        for _ in range(retries):
+            before = self.slots[slot, SEQUENCE]
+            row = self.slots[slot].copy()
+            if before % 2 == 0 and row[SEQUENCE] == before and self.slots[slot, SEQUENCE] == before:
+                break
+            time.sleep(0)  # let the writer finish, also when it is a thread of this process
+        else:
+            if _alive(int(row[PID]), row[STARTED]):
+                raise RuntimeError(f"slot {slot} of {self.name} is being written")
+            # the writer was killed in the middle of a write, the slot will not change anymore
+        lines = row[SLOT_HEADER:].reshape(self.n_lines, len(LINE_FIELDS))
+        total_time = RunningStats()
+        total_time.count = int(row[TOTAL_COUNT])
+        total_time.mean = row[TOTAL_MEAN]
+        total_time.m2 = row[TOTAL_M2]
+        stats = LineStats(self.n_lines)
+        stats.totals.count = int(row[CALLS])
+        stats.totals.mean = lines[:, 1].copy()
+        stats.totals.m2 = lines[:, 2].copy()
+        stats.hits = lines[:, 0].copy()
+        stats.min = lines[:, 3].copy()
+        stats.max = lines[:, 4].copy()
+        stats.awaits = lines[:, 5].copy()
+        return stats, total_time
+
+    def merged(self):
+        """
+        Merge the statistics of all slots.
+
+        Returns
+        -------
+        Collected
+            The merged statistics.
+        """
+        stats, total_time = LineStats(self.n_lines), RunningStats()
+        workers = 0
+        for slot in range(len(self.slots)):
+            if self.slots[slot, PID] == 0:
+                continue
+            slot_stats, slot_time = self.read(slot)
+            if slot_stats.calls:
+                stats.merge(slot_stats)
+                total_time.merge(slot_time)
+                workers += 1
+        metadata = self.metadata
+        return Collected(
+            metadata["name"],
+            metadata["lines"],
+            metadata["parents"],
+            metadata["is_async"],
+            stats,
+            total_time,
+            workers,
+        )
+
+
+def _start_time(pid):
+    # start time of a process in clock ticks after boot, None where /proc does not tell
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as file:
+            stat = file.read()
+    except OSError:
+        return None
+    # the fields after the command name, which can hold spaces and parentheses itself
+    return float(stat[stat.rindex(b")") + 2 :].split()[19])
+
+
+def _alive(pid, started=0.0):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # a process started after the one that claimed the slot got its pid again
+    return not started or _start_time(pid) in (None, started)
+
+
+def segments():
+    """
+    Find the codpulse segments of this machine.
+
+    Returns
+    -------
+    list of str
+        Names of the segments, found in ``/dev/shm``; empty on platforms without it.
+    """
+    try:
+        names = os.listdir("/dev/shm")
+    except OSError:
+        return []
+    return sorted(name for name in names if name.startswith(PREFIX))
+
+
+def find(name):
+    """
+    Find the segment of a function.
+
+    Parameters
+    ----------
+    name : str
+        Name of the segment (see `segments`), or qualified name (``module.qualname``) or
+        ``qualname`` of the function.
+
+    Returns
+    -------
+    str
+        Name of the segment.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no segment of that name or function exists.
+    """
+    if name.startswith(PREFIX):
+        return name
+    for candidate in segments():
+        segment = Segment(candidate)
+        function = segment.metadata["name"]
+        segment.close()
+        if name == function or function.endswith("." + name):
+            return candidate
+    raise FileNotFoundError(f"no codpulse segment of {name}")
+
+
+def collect(name):
+    """
+    Merge the statistics of a function from all the worker processes that recorded it.
+
+    It can be called from any process at any time; the workers are not interrupted.
+
+    Parameters
+    ----------
+    name : str
+        Name of the segment (see `segments`), or qualified name (``module.qualname``) or
+        ``qualname`` of the function.
+
+    Returns
+    -------
+    Collected
+        The merged statistics.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no segment of that name or function exists.
+    """
+    segment = Segment(find(name))
+    try:
+        return segment.merged()
+    finally:
+        segment.close()
+
+
+def report(name):
+    """
+    Display the statistics of a function merged from all worker processes (see `collect`).
+
+    Parameters
+    ----------
+    name : str
+        Name of the segment, or qualified name or ``qualname`` of the function.
+    """
+    from .utils import display_results, process_stats
+
+    collected = collect(name)
+    table = process_stats(
+        collected.stats, collected.lines, collected.parents, split_await=collected.is_async
+    )
+    title = f"{collected.name} ({collected.workers} workers)"
+    display_results(table, collected.total_time, collected.total_time.count, title)
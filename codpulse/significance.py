@@ -0,0 +1,263 @@
+import functools
+import math
+
+
+def _mean_var(values):
+    n = len(values)
+    mean = sum(values) / n
+    return mean, sum((x - mean) ** 2 for x in values) / (n - 1) if n > 1 else 0.0
+
+
+def _betacf(a, b, x, iterations=200, eps=3e-14):
+    # continued fraction of the regularized incomplete beta function (modified Lentz)
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, iterations + 1):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < eps:
+            break
+    return h
+
+
+def betainc(a, b, x):
+    """
+    Regularized incomplete beta function I_x(a, b).
+
+    Parameters
+    ----------
+    a, b : float
+        Positive shape parameters.
+    x : float
+        Point in [0, 1].
+
+    Returns
+    -------
+    float
+        The value of the function.
+    """
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = (
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    )
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(log_front) * _betacf(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _betacf(b, a, 1.0 - x) / b
+
+
+def t_two_sided(t, df):
+    """
+    Two-sided p-value of Student's t distribution.
+
+    Parameters
+    ----------
+    t : float
+        The t statistic.
+    df : float
+        Degrees of freedom, need not be an integer.
+
+    Returns
+    -------
+    float
+        ``P(|T| >= |t|)``.
+    """
+    if math.isinf(df):
+        return math.erfc(abs(t) / math.sqrt(2))
+    return betainc(df / 2, 0.5, df / (df + t * t))
+
+
+def welch_from_stats(mean_a, std_a, n_a, mean_b, std_b, n_b):
+    """
+    Welch's unequal-variance t-test from summary statistics.
+
+    Parameters
+    ----------
+    mean_a, std_a, n_a : float, float, int
+        Mean, sample standard deviation and size of the first sample.
+    mean_b, std_b, n_b : float, float, int
+        Same for the second sample.
+
+    Returns
+    -------
+    tuple of float
+        The t statistic (positive when the second mean is larger) and its two-sided
+        p-value. NaN when either sample has fewer than two values or the values are
+        not finite.
+    """
+    if n_a < 2 or n_b < 2 or not all(
+        math.isfinite(value) for value in (mean_a, std_a, mean_b, std_b)
+    ):
+        return float("nan"), float("nan")
+    var_a, var_b = std_a**2 / n_a, std_b**2 / n_b
+    if var_a + var_b == 0:
+        if mean_a == mean_b:
+            return 0.0, 1.0
+        return math.copysign(math.inf, mean_b - mean_a), 0.0
+    t = (mean_b - mean_a) / math.sqrt(var_a + var_b)
+    df = (var_a + var_b) ** 2 / (var_a**2 / (n_a - 1) + var_b**2 / (n_b - 1))
+    return t, t_two_sided(t, df)
+
+
+def welch_test(a, b):
+    """
+    Welch's unequal-variance t-test of two samples.
+
+    Parameters
+    ----------
+    a, b : sequence of float
+        The samples; NaN values are ignored.
+
+    Returns
+    -------
+    tuple of float
+        The t statistic (positive when `b` has the larger mean) and its two-sided p-value.
+
+    Examples
+    --------
+    >>> t, p = welch_test([10.1, 10.3, 9.9, 10.0], [11.0, 11.4, 10.9, 11.2])
+    >>> p < 0.01
+    True
+    """
+    a = [x for x in a if x == x]
+    b = [x for x in b if x == x]
+    if len(a) < 2 or len(b) < 2:
+        return float("nan"), float("nan")
+    mean_a, var_a = _mean_var(a)
+    mean_b, var_b = _mean_var(b)
+    return welch_from_stats(mean_a, math.sqrt(var_a), len(a), mean_b, math.sqrt(var_b), len(b))
+
+
+def _ranks(values):
+    # ranks starting at 1, ties get their average rank; also returns the size of every tie
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    ties = []
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        if j > i:
+            ties.append(j - i + 1)
+        i = j + 1
+    return ranks, ties
+
+
+@functools.lru_cache(maxsize=None)
+def _u_counts(m, n):
+    # number of orderings of m + n distinct values with u pairs (a, b) where b > a, for every u
+    if m == 0 or n == 0:
+        return (1,)
+    counts = [0] * (m * n + 1)
+    # the largest value is a b (larger than all m a's) or an a (larger than no b)
+    for u, count in enumerate(_u_counts(m, n - 1)):
+        counts[u + m] += count
+    for u, count in enumerate(_u_counts(m - 1, n)):
+        counts[u] += count
+    return tuple(counts)
+
+
+def mann_whitney_u(a, b, alternative="two-sided", exact_limit=20):
+    """
+    Mann-Whitney U test of two samples.
+
+    Parameters
+    ----------
+    a, b : sequence of float
+        The samples; NaN values are ignored.
+    alternative : {"two-sided", "greater", "less"}, optional
+        Alternative hypothesis: the values of `b` tend to be different from, greater
+        than or less than those of `a`, by default "two-sided".
+    exact_limit : int, optional
+        Use the exact distribution of U when both samples have at most this many values
+        and there are no ties, by default 20; otherwise the normal approximation with tie
+        and continuity corrections.
+
+    Returns
+    -------
+    tuple of float
+        U, the number of pairs in which the value of `b` is the larger one (ties count
+        half), and the p-value. NaN when a sample is empty.
+
+    Examples
+    --------
+    >>> u, p = mann_whitney_u([10.1, 10.3, 9.9, 10.0], [11.0, 11.4, 10.9, 11.2], "greater")
+    >>> u, round(p, 4)
+    (16.0, 0.0143)
+    """
+    a = [x for x in a if x == x]
+    b = [x for x in b if x == x]
+    n_a, n_b = len(a), len(b)
+    if not n_a or not n_b:
+        return float("nan"), float("nan")
+    ranks, ties = _ranks(a + b)
+    u = sum(ranks[n_a:]) - n_b * (n_b + 1) / 2
+    if not ties and n_a <= exact_limit and n_b <= exact_limit:
+        counts = _u_counts(n_a, n_b)
+        total = sum(counts)
+        upper = sum(counts[int(u) :]) / total
+        lower = sum(counts[: int(u) + 1]) / total
+    else:
+        n = n_a + n_b
+        variance = n_a * n_b / 12 * ((n + 1) - sum(t**3 - t for t in ties) / (n * (n - 1)))
+        if variance <= 0:
+            return u, 1.0
+        mean, sigma = n_a * n_b / 2, math.sqrt(variance)
+        upper = 0.5 * math.erfc((u - mean - 0.5) / sigma / math.sqrt(2))
+        lower = 0.5 * math.erfc(-(u - mean + 0.5) / sigma / math.sqrt(2))
+    if alternative == "greater":
+        return u, upper
+    if alternative == "less":
+        return u, lower
+    if alternative != "two-sided":
+        raise ValueError(f"unknown alternative {alternative!r}")
+    return u, min(1.0, 2 * min(upper, lower))
+
+
+@functools.lru_cache(maxsize=None)
+def t_critical(df, confidence=0.95):
+    """
+    Two-sided critical value of Student's t distribution.
+
+    Parameters
+    ----------
+    df : float
+        Degrees of freedom.
+    confidence : float, optional
+        Confidence level, by default 0.95.
+
+    Returns
+    -------
+    float
+        The ``t`` with ``P(|T| >= t) = 1 - confidence``.
+
+    Examples
+    --------
+    >>> round(t_critical(9), 3)
+    2.262
+    """
+    alpha = 1 - confidence
+    low, high = 0.0, 1.0
+    while t_two_sided(high, df) > alpha:
+        low, high = high, high * 2
+    for _ in range(60):
+        middle = (low + high) / 2
+        if t_two_sided(middle, df) > alpha:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
@@ -0,0 +1,232 @@
+import threading
+import numpy as np
+from .recorder import Recorder, STRIDE, HITS, TOTAL, MIN, MAX, AWAIT
+
+
+class RunningStats:
+    """
+    Running mean and variance of a stream of equally shaped values (Welford's algorithm).
+
+    Parameters
+    ----------
+    shape : int or tuple of int, optional
+        Shape of every value, by default ``()`` (scalars).
+
+    Attributes
+    ----------
+    count : int
+        Number of values added.
+    mean : numpy.ndarray
+        Running mean.
+    m2 : numpy.ndarray
+        Running sum of squared deviations from the mean.
+
+    Examples
+    --------
+    >>> stats = RunningStats()
+    >>> for value in (1.0, 2.0, 4.0):
+    ...     stats.add(value)
+    >>> float(stats.mean), float(stats.std)
+    (2.3333333333333335, 1.5275252316519468)
+    """
+
+    def __init__(self, shape=()):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def add(self, value):
+        """
+        Add one value to the statistics.
+
+        Parameters
+        ----------
+        value : float or array_like
+            Value of the configured shape.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean = self.mean + delta / self.count
+        self.m2 = self.m2 + delta * (value - self.mean)
+
+    def merge(self, other):
+        """
+        Combine the statistics of another stream into these ones (Chan et al.).
+
+        Parameters
+        ----------
+        other : RunningStats
+            Statistics of values of the same shape.
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / count
+        self.m2 = self.m2 + other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+
+    def variance(self, ddof=1):
+        """
+        Variance of the values added so far.
+
+        Parameters
+        ----------
+        ddof : int, optional
+            Delta degrees of freedom, by default 1 (sample variance).
+
+        Returns
+        -------
+        numpy.ndarray
+            The variance, NaN while fewer than ``ddof + 1`` values were added.
+        """
+        if self.count <= ddof:
+            return np.full(np.shape(self.mean), np.nan)
+        return self.m2 / (self.count - ddof)
+
+    @property
+    def std(self):
+        """
+        Sample standard deviation of the values added so far.
+
+        Returns
+        -------
+        numpy.ndarray
+            The standard deviation, NaN while fewer than two values were added.
+        """
+        return np.sqrt(self.variance())
+
+
+class LineStats:
+    """
+    Fixed-size per-line statistics over any number of calls of an instrumented function.
+
+    Every call buffer (see `codpulse.recorder.Recorder`) is folded into running
+    per-line state as soon as the call finishes, so memory does not grow with the
+    number of calls.
+
+    Parameters
+    ----------
+    n_lines : int
+        Number of probed lines of the instrumented function.
+
+    Attributes
+    ----------
+    totals : RunningStats
+        Running mean and variance of every line's total time per call, in seconds.
+    hits : numpy.ndarray
+        Hits of every line summed over all calls.
+    min : numpy.ndarray
+        Fastest single execution of every line, in seconds.
+    max : numpy.ndarray
+        Slowest single execution of every line, in seconds.
+    awaits : numpy.ndarray
+        Time every line spent suspended at its own ``await`` expressions, summed over
+        all calls, in seconds.
+    """
+
+    def __init__(self, n_lines):
+        self.n_lines = n_lines
+        self.totals = RunningStats(n_lines)
+        self.hits = np.zeros(n_lines)
+        self.min = np.full(n_lines, np.inf)
+        self.max = np.zeros(n_lines)
+        self.awaits = np.zeros(n_lines)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self):
+        """
+        Number of calls folded into the statistics.
+
+        Returns
+        -------
+        int
+            The number of calls.
+        """
+        return self.totals.count
+
+    def add(self, buffer):
+        """
+        Fold the buffer of one call into the statistics.
+
+        Parameters
+        ----------
+        buffer : list of float
+            Per-line buffer of the call.
+        """
+        values = np.asarray(buffer).reshape(self.n_lines, STRIDE)
+        with self._lock:
+            self.totals.add(values[:, TOTAL])
+            self.hits += values[:, HITS]
+            np.minimum(self.min, values[:, MIN], out=self.min)
+            np.maximum(self.max, values[:, MAX], out=self.max)
+            self.awaits += values[:, AWAIT]
+
+    def merge(self, other):
+        """
+        Combine the statistics of another set of calls of the same function into these ones.
+
+        Parameters
+        ----------
+        other : LineStats
+            Statistics of the other calls.
+        """
+        with self._lock:
+            self.totals.merge(other.totals)
+            self.hits += other.hits
+            np.minimum(self.min, other.min, out=self.min)
+            np.maximum(self.max, other.max, out=self.max)
+            self.awaits += other.awaits
+
+    def copy(self):
+        """
+        Consistent copy of the statistics, safe to take while calls are being added.
+
+        Returns
+        -------
+        LineStats
+            The copy.
+        """
+        new = LineStats(self.n_lines)
+        with self._lock:
+            new.merge(self)
+        return new
+
+
+class StreamingRecorder(Recorder):
+    """
+    Recorder that folds every call buffer into `LineStats` instead of keeping it.
+
+    Parameters
+    ----------
+    n_lines : int
+        Number of probed lines of the instrumented function.
+
+    Attributes
+    ----------
+    stats : LineStats
+        Statistics of the calls finished since the last `reset`.
+    """
+
+    def __init__(self, n_lines):
+        super().__init__(n_lines)
+        self.stats = LineStats(n_lines)
+
+    def _collect(self, buffer):
+        self.stats.add(buffer)
+
+    def reset(self):
+        """
+        Start new statistics, forgetting the calls recorded so far.
+        """
+        self.stats = LineStats(self.n_lines)
@@ -0,0 +1,106 @@
+class ResultTable:
+    """
+    Lightweight, column-oriented table of per-line results.
+
+    The core of codpulse reports its results in this table so that it does not
+    need pandas; a DataFrame is only built, once, when `to_pandas` is called.
+
+    Parameters
+    ----------
+    columns : dict
+        Column name to sequence of values, all of the same length, in display order.
+
+    Attributes
+    ----------
+    columns : list of str
+        Column names in display order.
+
+    Examples
+    --------
+    >>> table = ResultTable({"LineNo": [0, 1], "line": ["    m = 1", "    return m"]})
+    >>> table["line"][1]
+    '    return m'
+    >>> df = table.to_pandas()
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._data = {name: list(values) for name, values in columns.items()}
+        self._frame = None
+
+    def __getitem__(self, name):
+        """
+        Get the values of a column.
+
+        Parameters
+        ----------
+        name : str
+            Column name.
+
+        Returns
+        -------
+        list
+            The values of the column.
+        """
+        return self._data[name]
+
+    def __len__(self):
+        return len(self._data[self.columns[0]]) if self.columns else 0
+
+    def __repr__(self):
+        return f"ResultTable(columns={self.columns!r}, rows={len(self)})"
+
+    def add_column(self, name, values, after=None):
+        """
+        Add a column to the table.
+
+        Parameters
+        ----------
+        name : str
+            Column name.
+        values : sequence
+            Values of the column, one per row.
+        after : str, optional
+            Insert the column after this one, by default at the end.
+        """
+        position = self.columns.index(after) + 1 if after is not None else len(self.columns)
+        self.columns.insert(position, name)
+        self._data[name] = list(values)
+        self._frame = None
+
+    def rows(self):
+        """
+        Iterate over the rows of the table.
+
+        Returns
+        -------
+        iterator of tuple
+            One tuple of values per row, in column order.
+        """
+        return zip(*(self._data[name] for name in self.columns))
+
+    def to_dict(self):
+        """
+        Get the table as a plain dictionary.
+
+        Returns
+        -------
+        dict
+            Column name to list of values, in display order.
+        """
+        return {name: list(self._data[name]) for name in self.columns}
+
+    def to_pandas(self):
+        """
+        Get the table as a pandas DataFrame, importing pandas on first use.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The table; built once and cached.
+        """
+        if self._frame is None:
+            import pandas as pd
+
+            self._frame = pd.DataFrame(self._data, columns=self.columns)
+        return self._frame
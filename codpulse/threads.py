@@ -0,0 +1,208 @@
+import threading
+from .recorder import Recorder
+
+
+class ThreadRecorder(Recorder):
+    """
+    Recorder that gives every calling thread a recorder of its own.
+
+    Instrumented calls record into the recorder of the thread they run in, found
+    through a ``threading.local``, so threads never write to shared state and no
+    lock is taken on the recording path. The per-thread results are merged only
+    when they are read.
+
+    Parameters
+    ----------
+    n_lines : int
+        Number of probed lines of the instrumented function.
+    streaming : bool, optional
+        Give every thread a `codpulse.stats.StreamingRecorder` instead of a
+        `Recorder`, by default False.
+    histograms : bool, optional
+        Give every thread `codpulse.histogram.LineHistograms` of its own for the
+        histogram probes, by default False.
+
+    Attributes
+    ----------
+    threads : dict
+        Thread name to the recorder of that thread; a name already taken by an earlier
+        thread gets a ``-2``, ``-3``, ... suffix. Every recorder also has a
+        ``total_time`` attribute, the list (or `RunningStats`) of the total times of
+        the iterations run in that thread.
+
+    Examples
+    --------
+    >>> recorder = ThreadRecorder(len(instrumented.lines))
+    >>> with ThreadPoolExecutor(8) as executor:
+    ...     executor.map(instrumented_function, range(100))
+    >>> recorder.calls  # buffers of all threads
+    >>> recorder.threads  # recorder of every thread
+    """
+
+    def __init__(self, n_lines, streaming=False, histograms=False):
+        # calls is merged from the threads, so Recorder.__init__ is not run
+        self.n_lines = n_lines
+        self._template = Recorder(n_lines)._template
+        self.streaming = streaming
+        self.track_histograms = histograms
+        self.threads = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def local(self):
+        """
+        Get the recorder of the calling thread, creating it on its first call.
+
+        Returns
+        -------
+        Recorder
+            The recorder of the calling thread.
+        """
+        recorder = getattr(self._local, "recorder", None)
+        if recorder is None:
+            recorder = self._register()
+        return recorder
+
+    def _register(self):
+        if self.streaming:
+            from .stats import RunningStats, StreamingRecorder
+
+            recorder = StreamingRecorder(self.n_lines)
+            recorder.total_time = RunningStats()
+        else:
+            recorder = Recorder(self.n_lines)
+            recorder.total_time = []
+        if self.track_histograms:
+            from .histogram import LineHistograms
+
+            recorder.histograms = LineHistograms(self.n_lines)
+        thread = threading.current_thread()
+        with self._lock:
+            # thread names repeat, e.g. in successive pools, and so do idents once a thread ends
+            name, count = thread.name, 1
+            while name in self.threads:
+                count += 1
+                name = f"{thread.name}-{count}"
+            self.threads[name] = recorder
+        self._local.recorder = recorder
+        return recorder
+
+    def enter(self, generator=False):
+        return self.local().enter(generator)
+
+    def exit(self, buffer):
+        self.local().exit(buffer)
+
+    def running(self):
+        return self.local().running()
+
+    @property
+    def histograms(self):
+        """
+        Histograms of the calling thread, where the histogram probes of its calls count.
+
+        Returns
+        -------
+        LineHistograms or None
+            The histograms, None without ``histograms=True``.
+        """
+        return self.local().histograms
+
+    def merged_histograms(self):
+        """
+        Histograms of the calls finished in all threads, with ``histograms=True``.
+
+        Returns
+        -------
+        LineHistograms or None
+            The merged histograms, None without ``histograms=True``.
+        """
+        from .histogram import LineHistograms
+
+        if not self.track_histograms:
+            return None
+
+        histograms = LineHistograms(self.n_lines)
+        for recorder in self._recorders():
+            histograms.merge(recorder.histograms)
+        return histograms
+
+    def record_time(self, total_time):
+        """
+        Record the total time of an iteration run in the calling thread.
+
+        Parameters
+        ----------
+        total_time : float
+            Total execution time of the iteration, in ms.
+        """
+        recorder = self.local()
+        if self.streaming:
+            recorder.total_time.add(total_time)
+        else:
+            recorder.total_time.append(total_time)
+
+    def _recorders(self):
+        with self._lock:
+            return list(self.threads.values())
+
+    @property
+    def calls(self):
+        """
+        Buffers of the calls finished in all threads since the last `reset`.
+
+        Returns
+        -------
+        list of list
+            The buffers, grouped by thread.
+        """
+        return [buffer for recorder in self._recorders() for buffer in list(recorder.calls)]
+
+    @property
+    def stats(self):
+        """
+        Statistics of the calls finished in all threads, with ``streaming=True``.
+
+        Returns
+        -------
+        LineStats
+            The merged statistics.
+        """
+        from .stats import LineStats
+
+        stats = LineStats(self.n_lines)
+        for recorder in self._recorders():
+            stats.merge(recorder.stats.copy())
+        return stats
+
+    @property
+    def total_time(self):
+        """
+        Total times of the iterations run in all threads.
+
+        Returns
+        -------
+        list or RunningStats
+            The merged total times, in ms.
+        """
+        if self.streaming:
+            from .stats import RunningStats
+
+            total_time = RunningStats()
+            for recorder in self._recorders():
+                total_time.merge(recorder.total_time)
+            return total_time
+        return [value for recorder in self._recorders() for value in list(recorder.total_time)]
+
+    def reset(self):
+        """
+        Forget the recorders of all threads.
+        """
+        with self._lock:
+            self.threads = {}
+            self._local = threading.local()
+
+    def drain(self):
+        calls = self.calls
+        self.reset()
+        return calls
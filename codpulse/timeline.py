@@ -0,0 +1,254 @@
+import array
+import heapq
+import json
+import time
+
+
+class SlowCall:
+    """
+    Line timeline of a single call of an instrumented function (see `SlowCalls`).
+
+    Parameters
+    ----------
+    index : int
+        Position of the call among the calls recorded since the last reset.
+    duration : float
+        Time of the whole call, in seconds.
+    events : array.array
+        Start of the call, then line id, start and time of every line execution, in the
+        order the executions finished (inner statements before the ones enclosing them).
+    truncated : bool, optional
+        Whether the call ran more line executions than the timeline holds, by default
+        False; `events` then holds the first ones.
+    """
+
+    def __init__(self, index, duration, events, truncated=False):
+        self.index = index
+        self.duration = duration
+        self.events = events
+        self.truncated = truncated
+
+    def __repr__(self):
+        return (
+            f"SlowCall(index={self.index}, duration_ms={self.duration * 1000:.3f}, "
+            f"executions={len(self)}, truncated={self.truncated})"
+        )
+
+    def __len__(self):
+        return (len(self.events) - 1) // 3
+
+    def spans(self):
+        """
+        Executions of the lines of the call, in the order they started.
+
+        Returns
+        -------
+        list of tuple
+            Line id, start relative to the start of the call and time of every
+            execution, in seconds.
+        """
+        events, start = self.events, self.events[0]
+        spans = [
+            (int(events[i]), events[i + 1] - start, events[i + 2])
+            for i in range(1, len(events), 3)
+        ]
+        # an enclosing statement starts first and, for equal starts, lasts longer
+        spans.sort(key=lambda span: (span[1], -span[2]))
+        return spans
+
+    def line_times(self, n_lines):
+        """
+        Hits and time of every line in the call.
+
+        Parameters
+        ----------
+        n_lines : int
+            Number of probed lines of the instrumented function.
+
+        Returns
+        -------
+        tuple of list
+            Number of executions and total time in seconds of every line id.
+        """
+        hits, totals = [0] * n_lines, [0.0] * n_lines
+        events = self.events
+        for i in range(1, len(events), 3):
+            line_id = int(events[i])
+            hits[line_id] += 1
+            totals[line_id] += events[i + 2]
+        return hits, totals
+
+
+class SlowCalls:
+    """
+    Bounded store of the line timelines of outlier calls (see ``slow_calls``).
+
+    The timeline probes append every line execution of a call to an array of its own.
+    When the call finishes, the array is kept if the call is among the `keep` slowest
+    calls so far or, with `threshold_ms`, if the call took at least that long; then only
+    the `keep` most recent of them are kept, in a ring buffer. All other timelines are
+    dropped at once, so memory is bounded by `keep` calls however many calls run; their
+    per-line statistics are kept by the recorder as usual.
+
+    A timeline stops growing after `max_executions` line executions, so a single call
+    running a long loop does not grow its array without bound either: memory is bounded
+    by ``keep * max_executions * 24`` bytes, plus the timelines of the calls running.
+
+    Parameters
+    ----------
+    keep : int, optional
+        Most timelines kept, by default 10.
+    threshold_ms : float, optional
+        Keep the most recent calls taking at least this many milliseconds instead of the
+        slowest ones, by default None.
+    max_executions : int, optional
+        Most line executions recorded per call, by default 100000.
+
+    Attributes
+    ----------
+    seen : int
+        Number of calls finished since the last reset.
+    qualified : int
+        Number of those above `threshold_ms`, with `threshold_ms`.
+    clock : callable
+        Clock the calls are timed with; the clock of the recorder.
+    limit : int
+        Length of a timeline array the timeline probes stop appending at.
+    """
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, keep=10, threshold_ms=None, max_executions=100000):
+        if not isinstance(keep, int) or keep < 1:
+            raise ValueError(f"keep must be a positive integer, got {keep!r}")
+        if not isinstance(max_executions, int) or max_executions < 1:
+            raise ValueError(f"max_executions must be a positive integer, got {max_executions!r}")
+        self.keep = keep
+        self.threshold_ms = threshold_ms
+        self.limit = 1 + 3 * max_executions
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the calls recorded so far.
+        """
+        self.seen = 0
+        self.qualified = 0
+        self._slots = [None] * self.keep
+        self._heap = []
+
+    def begin(self):
+        """
+        Get a fresh timeline for a call of the instrumented function.
+
+        Returns
+        -------
+        array.array
+            Timeline holding the start of the call.
+        """
+        return array.array("d", (self.clock(),))
+
+    def end(self, events):
+        """
+        Keep or drop the timeline of a finished call.
+
+        Parameters
+        ----------
+        events : array.array
+            The timeline returned by `begin` for this call.
+        """
+        duration = self.clock() - events[0]
+        index = self.seen
+        self.seen += 1
+        if self.threshold_ms is not None:
+            if duration * 1000 >= self.threshold_ms:
+                self._slots[self.qualified % self.keep] = SlowCall(
+                    index, duration, events, len(events) >= self.limit
+                )
+                self.qualified += 1
+        elif len(self._heap) < self.keep:
+            heapq.heappush(self._heap, (duration, index, events))
+        elif duration > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (duration, index, events))
+
+    def calls(self):
+        """
+        The kept calls, slowest first.
+
+        Returns
+        -------
+        list of SlowCall
+            At most `keep` calls.
+        """
+        if self.threshold_ms is not None:
+            calls = [call for call in self._slots if call is not None]
+        else:
+            calls = [
+                SlowCall(index, duration, events, len(events) >= self.limit)
+                for duration, index, events in self._heap
+            ]
+        return sorted(calls, key=lambda call: call.duration, reverse=True)
+
+
+def trace_events(calls, lines, spans, name):
+    """
+    Chrome trace events of the timelines of calls.
+
+    Every call becomes a thread of its own, named after its index and time, and every line
+    execution a complete ("X") event nested in the call, so the calls line up from their
+    start in ``chrome://tracing``, Perfetto or speedscope.
+
+    Parameters
+    ----------
+    calls : list of SlowCall
+        The calls.
+    lines : sequence of str
+        Source text of every line id.
+    spans : sequence of (int, int)
+        First and last line number of every line id in its file.
+    name : str
+        Name of the function.
+
+    Returns
+    -------
+    dict
+        The trace, in the JSON object format of the trace event format.
+    """
+    events = [{"name": "process_name", "ph": "M", "pid": 0, "tid": 0, "args": {"name": name}}]
+    for tid, call in enumerate(calls, 1):
+        label = f"call {call.index}: {call.duration * 1000:.3f} ms"
+        if call.truncated:
+            label += f" (first {len(call)} line executions)"
+        events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": tid, "args": {"name": label}})
+        events.append(
+            {"name": name, "ph": "X", "pid": 0, "tid": tid, "ts": 0.0, "dur": call.duration * 1e6}
+        )
+        for line_id, start, duration in call.spans():
+            events.append(
+                {
+                    "name": lines[line_id].strip(),
+                    "cat": "line",
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": tid,
+                    "ts": start * 1e6,
+                    "dur": duration * 1e6,
+                    "args": {"line_id": line_id, "lineno": spans[line_id][0]},
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_trace(path, calls, lines, spans, name):
+    """
+    Write the timelines of calls to a Chrome trace JSON file (see `trace_events`).
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        File to write.
+    calls, lines, spans, name
+        As for `trace_events`.
+    """
+    with open(path, "w") as file:
+        json.dump(trace_events(calls, lines, spans, name), file)
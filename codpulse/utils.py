@@ -1,15 +1,19 @@
-import inspect
-import pandas as pd
+import warnings
+from .instrumentation import compile_function
+from .recorder import STRIDE, HITS, TOTAL, MIN, MAX, AWAIT
+from .table import ResultTable
 
 
-def modify_function(function_object):
+def modify_function(function_object, track_memory=False):
     """
-    Modify a given function by adding time tracking statements after each line.
+    Modify a given function by adding time tracking statements around each statement.
 
     Parameters
     ----------
     function_object : callable
         The function to be modified.
+    track_memory : bool, optional
+        Also add memory tracking statements, by default False.
 
     Returns
     -------
@@ -18,303 +22,240 @@ def modify_function(function_object):
 
     Notes
     -----
-    This function takes the source code of the input function, inserts time tracking statements after each line,
-    and returns the modified string representation of the function.
+    The function is instrumented by `codpulse.instrumentation.compile_function`, which rewrites its
+    syntax tree and caches the compiled result. This returns the source of the rewritten function;
+    use `compile_function` directly to get the compiled code object.
 
     """
-    # add timer for each line
-    source_code = inspect.getsource(function_object)
-    source_code = source_code.split("\n")
-    prefix = source_code[0]  # def func1():
-
-    variables = ["time.perf_counter()"]
-    variables1 = []
-    body = source_code[1:]
-    modified_body = []
-    trackers = []
-    initial_indent = None
-    prev_indent = None
-    skip_indent = None
-    consumed = None # prevents getting one indentation being empty completely
-
-    # clean body
-    temp_body = []
-    for i, b in enumerate(body):
-        l_strip = b.lstrip()
-        indent = len(b) - len(b.lstrip())
-        if prev_indent is None:
-            prev_indent = indent
-
-        if l_strip == "" or any(l_strip.startswith(p) for p in ["#"]):
-            # don't include intentation value or anything from here completely ignore
-            continue
-        if initial_indent is None:
-            # any execution coming here means it is not # or just empty line. It can be print
-            initial_indent = indent
-        if indent > prev_indent:
-            # entering for loop 
-            consumed = False
-        if any(l_strip.startswith(p) for p in ["print("]):
-            # don't include intentation value or anything from here completely ignore
-            if prev_indent > indent and not consumed:
-                # so case where for loop had only print statements
-                temp_body += [f"{' '*prev_indent}#placeholder"]
-            prev_indent = indent
-            continue
-        if prev_indent is not None and prev_indent > indent:
-            # we came out of the loop: this puts placeholder after the last line in inner for/while etc loop
-            temp_body += [f"{' '*prev_indent}#placeholder"]
-        prev_indent = indent
-        temp_body += [b]
-        consumed = True
-    if prev_indent is not None and initial_indent is not None and initial_indent != prev_indent:
-        temp_body += [f"{' '*initial_indent}#placeholder"]
-
-    body = temp_body.copy()
-    prev_indent = None
-    for i, b in enumerate(body):
-        l_strip = b.lstrip()
-        indent = len(b) - len(b.lstrip())
-        if any(l_strip.startswith(p) for p in ["elif", "else"]):
-            # we add these lines but no tracker on it.
-            # Doesn't matter what we put we remove it on placeholder
-            # we do 0 if variables[-1] is None which takes care
-            trackers.append(f"({i}, '''{' '*indent}{l_strip}''', {0})")
-            modified_body += [" " * indent + l_strip]
-            continue
-        if initial_indent is None:
-            initial_indent = indent
-            prev_indent = indent
-
-        # take care of special case
-        if skip_indent is not None and skip_indent == indent:
-            # this is a below return and at same indent so continue
-            continue
-        elif skip_indent is not None and skip_indent != indent:
-            # previously it was in skip not now
-            skip_indent = None
-
-        s = f"{' '*indent}time_watcher_{i} = time.perf_counter()"
-        s1 = f"{' '*indent}max_watcher_{i} = max(max_watcher_{i}, 0.0 if {variables[-1]} is None else time_watcher_{i} - {variables[-1]})"
-
-        variables.append(f"time_watcher_{i}")
-        variables1.append(f"max_watcher_{i}")
-
-        if l_strip.startswith("return "):
-            # it is a return
-            skip_indent = indent
-            trackers.append(
-                f"({i}, '''{' '*indent}{l_strip}''', time_watcher_{i}, max_watcher_{i})"
-            )
-            b1 = " " * indent + l_strip + ", ( " + ", ".join(trackers) + ")"
-            modified_body += [s, s1, b1]
-            continue
-        trackers.append(
-            f"({i}, '''{' '*indent}{l_strip}''', time_watcher_{i}, max_watcher_{i})"
-        )
-        modified_body += [s, s1, " " * indent + l_strip]
-
-    if initial_indent is None:
-        initial_indent = 0
-    # we will not enter here if function has return call, if not then we enter here
-    pre_suffix = f"{' '*initial_indent}time_watcher_{i+1} = time.perf_counter()"
-    s1 = f"{' '*initial_indent}max_watcher_{i+1} = max(max_watcher_{i+1}, 0.0 if {variables[-1]} is None else time_watcher_{i+1} - {variables[-1]})"  # {0 if variables[-1] is 'None' else f'time_watcher_{i+1} - {variables[-1]}'})"
-    variables.append(f"time_watcher_{i+1}")
-    variables1.append(f"max_watcher_{i+1}")
-
-    trackers.append(
-        f"({i+1}, '''{' '*indent}end_tracker''', time_watcher_{i+1}, max_watcher_{i+1})"
-    )
-    modified_body += [pre_suffix, s1, f"""{' '*initial_indent}end_tracker = 6"""]
-
-    # we should have initial indent by now
-    default_values = [" " * initial_indent + k + " = None" for k in variables[1:]]
-    default_values1 = [" " * initial_indent + k + " = 0.0" for k in variables1]
-    modified_function = (
-        [prefix]
-        + default_values
-        + default_values1
-        + modified_body
-        + [" " * initial_indent + "return 1" + ", ( " + ", ".join(trackers) + ")"]
-    )
-
-    return "\n".join(modified_function)
+    return compile_function(function_object, memory=track_memory).source
 
 
-def merge_text(x):
+def ancestor_matrix(parents):
     """
-    Merge non-empty text values from an iterable into a single string.
+    Build the matrix that sums the values of every line into all statements enclosing it.
 
     Parameters
     ----------
-    x : iterable
-        Iterable containing text values.
+    parents : sequence of int
+        Line id of the statement enclosing every line, or -1.
 
     Returns
     -------
-    str
-        A single string formed by merging the non-empty text values from the iterable.
-
-    Raises
-    ------
-    Exception
-        If all text values in the iterable are empty.
-
-    Notes
-    -----
-    This function iterates through the provided iterable and merges the non-empty text values into a single string.
-    If all text values are empty, an Exception is raised.
+    numpy.ndarray
+        A ``(lines x lines)`` matrix with a 1 at ``[i, j]`` when line ``j`` encloses line ``i``, directly or not,
+        so ``values @ matrix`` holds, for every line, the sum of the values of the lines nested in it.
 
     """
-    for i in x:
-        if str(i).rstrip() != "":
-            return str(i).rstrip()
-    raise Exception()
+    import numpy as np
+
+    matrix = np.zeros((len(parents), len(parents)))
+    for line_id, parent in enumerate(parents):
+        while parent >= 0:
+            matrix[line_id, parent] = 1.0
+            parent = parents[parent]
+    return matrix
 
 
-def find_valid_line(df):
+def process_logs(items, lines, parents=None, calibration=None, split_await=False):
     """
-    Combine text from columns in a DataFrame to form valid lines, filling NaN values with empty strings.
+    Process tracked logs and calculate per-line hit counts and execution time statistics.
 
     Parameters
     ----------
-    df : pandas.DataFrame
-        DataFrame containing text data.
+    items : list of list
+        Per-line accumulator buffers, one for each iteration (see `codpulse.recorder.Recorder`).
+    lines : sequence of str
+        Source text of every probed line, indexed by line id.
+    parents : sequence of int, optional
+        Line id of the statement enclosing every line, or -1. Required with `calibration` and `split_await`.
+    calibration : Calibration, optional
+        Probe overhead (see `codpulse.calibration.calibrate`). When given, a `corrected_time(in ms)` column
+        reports the mean time per iteration with the probe overhead subtracted.
+    split_await : bool, optional
+        For coroutine functions, split the mean time per iteration into `active_time(in ms)`, while the line
+        held the event loop, and `await_time(in ms)`, while it was suspended at an ``await``, by default False.
 
     Returns
     -------
-    numpy.ndarray
-        An array of strings, where each row represents a valid line created from the non-NaN values in the columns.
+    ResultTable
+        A table containing, for each line, the mean number of hits per iteration, the mean, standard
+        deviation, median and 90th percentile of the line's total time per iteration, and the fastest and
+        slowest single execution. Use `ResultTable.to_pandas` to get a DataFrame.
 
     Notes
     -----
-    This function takes a DataFrame with text data and combines the non-NaN values from relevant columns to form
-    valid lines. The resulting array can be used to display formatted text output.
-
-    """
-    line_cols = [i for i in df.columns if i.startswith("line_")]
-    x = df[line_cols]
-    out = x.fillna("").apply(lambda x: merge_text(x), axis=1).values
-    return out
-
-
-def mean_excluding_nan_count(x):
-    """
-    Calculate the mean of a pandas Series while excluding NaN values.
+    A line that is executed many times inside a loop reports its cumulative time per iteration, so a line
+    that runs a million times at 1µs correctly shows up as more expensive than one that runs once at 2µs.
+    Times of lines that never ran are reported as NaN, so are all times when no call was recorded, e.g. for a
+    generator function, whose body does not run until the generator it returns is iterated.
 
-    Parameters
-    ----------
-    x : pandas.Series
-        A pandas Series containing numerical values, possibly including NaNs.
+    The buffers are stacked into one ``(iterations x lines)`` matrix per field and every statistic is computed
+    in a single NaN-aware pass over it, so the cost grows linearly with the number of iterations and lines.
 
-    Returns
-    -------
-    float
-        The calculated mean of the provided Series, excluding NaN values.
+    The await time of a compound statement includes the await time of the statements nested in it, like its
+    total time does.
 
-    Notes
-    -----
-    This function calculates the mean of the provided pandas Series, excluding any NaN values present in the Series.
+    The probe overhead of a line is the overhead of its own probe for each of its hits plus the full cost of
+    the probes of every statement nested in it, so loop headers get corrected for the probes of their body.
 
     """
-    x = x.dropna()
-    return x.mean()
-
-
-def std_excluding_nan_count(x):
+    import numpy as np
+
+    if not len(items) or not len(lines):
+        names = ["mean_time(in ms)", "std_time(in ms)"]
+        if split_await:
+            names += ["active_time(in ms)", "await_time(in ms)"]
+        if calibration is not None:
+            names.append("corrected_time(in ms)")
+        names += ["p50_time(in ms)", "p90_time(in ms)", "min_hit(in ms)", "max_hit(in ms)"]
+        table = {"LineNo": range(len(lines)), "line": lines, "hits": [0.0] * len(lines)}
+        table.update((name, [float("nan")] * len(lines)) for name in names)
+        return ResultTable(table)
+    buffers = np.asarray(items, dtype=float).reshape(len(items), len(lines), STRIDE)
+    hits = buffers[:, :, HITS]
+    totals = buffers[:, :, TOTAL] * 1000
+    never_run = np.nansum(hits, axis=0) == 0
+
+    columns = {"hits": np.nanmean(hits, axis=0)}
+    with warnings.catch_warnings():
+        # a single iteration has no standard deviation
+        warnings.simplefilter("ignore", RuntimeWarning)
+        columns["mean_time(in ms)"] = np.nanmean(totals, axis=0)
+        columns["std_time(in ms)"] = np.nanstd(totals, axis=0, ddof=1)
+        if split_await:
+            awaits = buffers[:, :, AWAIT] * 1000
+            awaits = awaits + awaits @ ancestor_matrix(parents)
+            columns["active_time(in ms)"] = np.nanmean(totals - awaits, axis=0)
+            columns["await_time(in ms)"] = np.nanmean(awaits, axis=0)
+        if calibration is not None:
+            nested_hits = hits @ ancestor_matrix(parents)
+            overhead = (hits * calibration.inner + nested_hits * calibration.outer) * 1000
+            # clipping every iteration would bias the mean of cheap lines upwards
+            columns["corrected_time(in ms)"] = np.clip(np.nanmean(totals - overhead, axis=0), 0.0, None)
+        p50, p90 = np.nanpercentile(totals, [50, 90], axis=0)
+    columns["p50_time(in ms)"] = p50
+    columns["p90_time(in ms)"] = p90
+    columns["min_hit(in ms)"] = np.nanmin(buffers[:, :, MIN], axis=0) * 1000
+    columns["max_hit(in ms)"] = np.nanmax(buffers[:, :, MAX], axis=0) * 1000
+    table = {"LineNo": range(len(lines)), "line": lines}
+    for name, values in columns.items():
+        if name != "hits":
+            values[never_run] = np.nan
+        table[name] = values.tolist()
+    return ResultTable(table)
+
+
+def process_stats(stats, lines, parents=None, calibration=None, split_await=False):
     """
-    Calculate the standard deviation of a pandas Series while excluding NaN values.
+    Calculate per-line hit counts and execution time statistics from running statistics.
 
     Parameters
     ----------
-    x : pandas.Series
-        A pandas Series containing numerical values, possibly including NaNs.
+    stats : LineStats
+        Running per-line statistics (see `codpulse.stats.LineStats`).
+    lines : sequence of str
+        Source text of every probed line, indexed by line id.
+    parents : sequence of int, optional
+        Line id of the statement enclosing every line, or -1. Required with `calibration` and `split_await`.
+    calibration : Calibration, optional
+        Probe overhead (see `codpulse.calibration.calibrate`). When given, a `corrected_time(in ms)` column
+        reports the mean time per iteration with the probe overhead subtracted.
+    split_await : bool, optional
+        For coroutine functions, split the mean time per iteration into `active_time(in ms)`, while the line
+        held the event loop, and `await_time(in ms)`, while it was suspended at an ``await``, by default False.
 
     Returns
     -------
-    float
-        The calculated standard deviation of the provided Series, excluding NaN values.
-
-    Notes
-    -----
-    This function calculates the standard deviation of the provided pandas Series, excluding any NaN values present in the Series.
+    ResultTable
+        A table with the columns of `process_logs`, except for the percentiles which need every iteration.
 
     """
-    x = x.dropna()
-    return x.std()
-
-
-def process_logs(items):
+    import numpy as np
+
+    never_run = stats.hits == 0
+    calls = max(stats.calls, 1)
+    columns = {
+        "hits": stats.hits / calls,
+        "mean_time(in ms)": stats.totals.mean * 1000,
+        "std_time(in ms)": stats.totals.std * 1000,
+    }
+    if split_await:
+        awaits = stats.awaits / calls
+        awaits = awaits + awaits @ ancestor_matrix(parents)
+        columns["active_time(in ms)"] = (stats.totals.mean - awaits) * 1000
+        columns["await_time(in ms)"] = awaits * 1000
+    if calibration is not None:
+        hits = stats.hits / calls
+        overhead = hits * calibration.inner + (hits @ ancestor_matrix(parents)) * calibration.outer
+        columns["corrected_time(in ms)"] = np.clip(stats.totals.mean - overhead, 0.0, None) * 1000
+    columns["min_hit(in ms)"] = stats.min * 1000
+    columns["max_hit(in ms)"] = stats.max * 1000
+
+    table = {"LineNo": range(len(lines)), "line": lines}
+    for name, values in columns.items():
+        values = np.array(values, dtype=float)
+        if name != "hits":
+            values[never_run] = np.nan
+        table[name] = values.tolist()
+    return ResultTable(table)
+
+
+def process_samples(counts, samples, lines, total_time, z=1.96):
     """
-    Process tracked logs and calculate mean and standard deviation of execution times for each line.
+    Estimate per-line execution times from stack samples.
 
     Parameters
     ----------
-    items : list of tuples
-        List of tuples containing tracked data for each iteration.
+    counts : list of int
+        Number of samples attributed to every line id (see `codpulse.sampling.Sampler`).
+    samples : int
+        Number of samples taken while the function was running.
+    lines : sequence of str
+        Source text of every probed line, indexed by line id.
+    total_time : list
+        List of total execution times (in ms) for each iteration.
+    z : float, optional
+        Quantile of the standard normal distribution for the confidence interval, by default 1.96 (95%).
 
     Returns
     -------
-    pandas.DataFrame
-        A DataFrame containing the calculated mean and standard deviation of execution times for each line.
+    ResultTable
+        A table containing, for each line, the number of samples and the estimated time per iteration
+        together with the bounds of its confidence interval.
 
     Notes
     -----
-    This function takes a list of tracked data for each iteration and calculates the mean and standard deviation of
-    execution times for each line across the iterations. The returned DataFrame provides insights into the execution
-    performance of different lines within the tracked function.
+    The time of a line is estimated as the share of samples that hit it times the mean execution time of the
+    function. The confidence interval is the Wilson score interval of that share, so it stays meaningful for
+    lines that were hit by few or no samples.
 
     """
-    df1 = pd.DataFrame()
-    for i, item in enumerate(items):
-        if df1.empty == True:
-            df = pd.DataFrame(item)
-            df.columns = [
-                "LineNo",
-                f"line_{i}",
-                f"time_watcher_{i}",
-                f"max_watcher_{i}",
-            ]
-            df1 = df[["LineNo", f"max_watcher_{i}"]]
-            df2 = df[["LineNo", f"line_{i}"]]
-
+    mean_total = mean_custom(total_time)
+    table = {"LineNo": range(len(lines)), "line": lines, "samples": counts}
+    table["mean_time(in ms)"], table["ci_low(in ms)"], table["ci_high(in ms)"] = [], [], []
+    for count in counts:
+        if samples == 0:
+            share = low = high = float("nan")
         else:
-            temp_df = pd.DataFrame(item)
-            temp_df.columns = [
-                "LineNo",
-                f"line_{i}",
-                f"time_watcher_{i}",
-                f"max_watcher_{i}",
-            ]
-            temp_df1 = temp_df[["LineNo", f"max_watcher_{i}"]]
-            temp_df2 = temp_df[["LineNo", f"line_{i}"]]
-            df1 = pd.merge(df1, temp_df1, on="LineNo", how="outer")
-            df2 = pd.merge(df2, temp_df2, on="LineNo", how="outer")
-    # collect all line nos
-    cols = df1.columns.tolist()
-    df1["line"] = find_valid_line(df2)
-    df1 = df1[["LineNo", "line"] + cols[1:]]
-    df1.iloc[:, 2:] = df1.iloc[:, 2:].shift(-1) * 1000
-
-    df1 = df1[~df1.line.apply(lambda x: x.lstrip().startswith("#placeholder"))]
-    df1["LineNo"] = list(range(df1.shape[0]))
-
-    mean_time = df1.iloc[:, 2:].apply(lambda x: mean_excluding_nan_count(x), axis=1)
-    std_time = df1.iloc[:, 2:].apply(lambda x: std_excluding_nan_count(x), axis=1)
-    df1["mean_time(in ms)"] = mean_time
-    df1["std_time(in ms)"] = std_time
-    df1 = df1.loc[:, ["LineNo", "line", "mean_time(in ms)", "std_time(in ms)"]]
-    return df1
+            share = count / samples
+            denominator = 1 + z**2 / samples
+            center = (share + z**2 / (2 * samples)) / denominator
+            half_width = z * (share * (1 - share) / samples + z**2 / (4 * samples**2)) ** 0.5 / denominator
+            low, high = max(center - half_width, 0.0), center + half_width
+        table["mean_time(in ms)"].append(share * mean_total)
+        table["ci_low(in ms)"].append(low * mean_total)
+        table["ci_high(in ms)"].append(high * mean_total)
+    return ResultTable(table)
 
 
 def max_length(df, padding_value):
     """
-    Calculate the maximum lengths of columns in a DataFrame along with an additional padding value.
+    Calculate the maximum lengths of columns in a table along with an additional padding value.
 
     Parameters
     ----------
-    df : pandas.DataFrame
-        DataFrame containing the data.
+    df : ResultTable
+        Table containing the data.
     padding_value : int
         Additional padding value to add to the maximum lengths.
 
@@ -325,59 +266,131 @@ def max_length(df, padding_value):
 
     Notes
     -----
-    This function computes the maximum lengths required for each column in the provided DataFrame
+    This function computes the maximum lengths required for each column in the provided table
     along with an additional padding value. It is typically used to format output for display.
 
     """
     max_list = []
     for col in df.columns:
         max_list.append(
-            max(len(col), max(df.loc[:, col].apply(lambda x: len(str(x)))))
+            max(len(col), max((len(str(x)) for x in df[col]), default=0))
             + padding_value
         )
     return max_list
 
 
-def display_results(df, total_time, no_iter, fn_name):
+def display_results(
+    df, total_time, no_iter, fn_name, calibration=None, convergence=None, histograms=None, parents=None
+):
     """
     Display tracked function execution results in a well-formatted table.
 
     Parameters
     ----------
-    df : pandas.DataFrame
-        DataFrame containing the calculated mean and standard deviation of execution times for each line.
-    total_time : list
-        List of total execution times for each iteration.
+    df : ResultTable
+        Table containing the per-line statistics returned by `process_logs`.
+    total_time : list, RunningStats or None
+        List of total execution times (in ms) for each iteration, or their running statistics. None when the
+        calls were not timed as a whole.
     no_iter : int
         Number of iterations.
     fn_name : str
         Name of the tracked function.
+    calibration : Calibration, optional
+        Probe overhead the per-line times were corrected with. When given, the overhead-corrected mean total
+        time and the calibration constants are printed in the header. The total is corrected by what the
+        ``corrected_time(in ms)`` column subtracts from the lines at the top of the function body, plus the
+        cost of their probes outside of their own measurement, so it never falls below those lines.
+    convergence : Convergence, optional
+        Stopping rule of adaptive iterations (see `codpulse.convergence`). When given, the precision
+        reached, its target and why the iterations stopped are printed in the header.
+    histograms : LineHistograms, optional
+        Per-line histograms of the single-execution times (see `codpulse.histogram`). When given, every
+        line's histogram is drawn as a sparkline in a last ``histogram`` column, on a log time axis shared
+        by all lines.
+    parents : sequence of int, optional
+        Line id of the statement enclosing every line, or -1. Required with `calibration`.
 
     Notes
     -----
-    This function takes the processed DataFrame of tracked data, along with the total execution times and function
-    information, and prints the results in a formatted table. The table includes details about mean and standard
-    deviation of execution times for each line, as well as overall statistics for the tracked function.
+    This function takes the processed table of tracked data, along with the total execution times and function
+    information, and prints the results in a formatted table. The table includes one column per statistic of each
+    line, as well as overall statistics for the tracked function.
 
     """
-    df.iloc[:, 2:] = round(df.iloc[:, 2:], 3)
-    padding_value = 5
-    left_padding = 2
+    if total_time is None:
+        mean_time = None
+        summary = "mean_time(in ms): n/a"
+    else:
+        if hasattr(total_time, "std"):
+            mean_time, std_time = float(total_time.mean), float(total_time.std)
+        else:
+            mean_time = mean_custom(total_time)
+            std_time = stddev_custom(total_time) if len(total_time) > 1 else float("nan")
+        summary = f"mean_time(in ms): {round(mean_time, 3)}, std_time(in_ms): {round(std_time, 3)}"
+    if calibration is not None and mean_time is not None:
+        overhead = 0.0
+        outside = (calibration.outer - calibration.inner) * 1000
+        for parent, hits, mean, corrected in zip(
+            parents, df["hits"], df["mean_time(in ms)"], df["corrected_time(in ms)"]
+        ):
+            if parent == -1 and hits:
+                overhead += mean - corrected + hits * outside
+        corrected = max(mean_time - overhead, 0.0)
+        summary += (
+            f", corrected_time(in ms): {round(corrected, 3)}"
+            f", probe_cost(in ns): {round(calibration.inner * 1e9, 1)}/{round(calibration.outer * 1e9, 1)}"
+        )
+    if convergence is not None:
+        summary += (
+            f", rel_ci(%): {round(convergence.precision * 100, 2)}"
+            f" (target {round(convergence.target_rel_ci * 100, 2)}, {convergence.reason})"
+        )
+    if histograms is not None:
+        df = ResultTable(dict(df.to_dict(), histogram=histograms.sparklines()))
+    print_table(df, f"|> Function Name: {fn_name}, #iter: {no_iter}, {summary}")
+
+
+def print_table(df, title, padding_value=5, left_padding=2):
+    """
+    Print a table of per-line results under a title, in the layout of `display_results`.
+
+    Parameters
+    ----------
+    df : ResultTable
+        The table; its first two columns are printed as they are, numbers in the other
+        columns are rounded to three decimals, and missing values (None) are printed as
+        ``-``.
+    title : str
+        Line printed above the column headings.
+    padding_value : int, optional
+        Spaces added to the width of every column, by default 5.
+    left_padding : int, optional
+        Indentation of the table, by default 2.
+    """
+    df = ResultTable(
+        {
+            col: ["-" if x is None else x if i < 2 or isinstance(x, str) else round(x, 3) for x in df[col]]
+            for i, col in enumerate(df.columns)
+        }
+    )
     max_string_length = max_length(df, padding_value)
     print()
-    heading = f"{' '*left_padding}| LineNo{' '*(max_string_length[0] - len('LineNo'))}| line{' '*(max_string_length[1] - len('line'))}| mean_time(in ms){' '*(max_string_length[2] - len('mean_time(in ms)'))}| std_time(in ms) |"
-    print(f"{' '*left_padding}{'='*(len(heading) - left_padding)}")
-    print(
-        f"{' '*left_padding}|> Function Name: {fn_name}, #iter: {no_iter}, mean_time(in ms): {round(mean_custom(total_time), 3)}, std_time(in_ms): {round(stddev_custom(total_time), 3)}"
+    heading = "".join(
+        f"| {col}{' '*(length - len(col))}"
+        for col, length in zip(df.columns, max_string_length)
     )
+    heading = f"{' '*left_padding}{heading}|"
+    print(f"{' '*left_padding}{'='*(len(heading) - left_padding)}")
+    print(f"{' '*left_padding}{title}")
     print(f"{' '*left_padding}{'='*(len(heading) - left_padding)}")
     print(heading)
     print(f"{' '*left_padding}{'='*(len(heading) - left_padding)}")
-    for row in df.iterrows():
+    for row in df.rows():
         text = ""
-        for i, j in zip(max_string_length, row[1]):
+        for i, j in zip(max_string_length, row):
             text = text + "| " + str(j) + " " * (i - len(str(j)))
-        print(" " * left_padding + text)
+        print(" " * left_padding + text + "|")
     print(" " * left_padding + "-" * (len(heading) - left_padding))
 
 
@@ -0,0 +1,6 @@
+import os
+
+# keep the tests from reading or writing the on-disk code cache of the user
+os.environ["CODPULSE_CACHE_DIR"] = ""
+
+pytest_plugins = ["pytester"]
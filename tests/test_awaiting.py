@@ -0,0 +1,21 @@
+import asyncio
+from codpulse import Tracker
+
+
+async def handler(delay):
+    value = delay * 2
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_await_time_is_split_from_active_time(capsys):
+    t = Tracker(handler, no_iterations=4, concurrency=2, namespace={"asyncio": asyncio})
+    asyncio.run(t.acall(0.01))
+    table = t.analysis_table
+    assert table.columns[3:7] == ["mean_time(in ms)", "std_time(in ms)", "active_time(in ms)", "await_time(in ms)"]
+    assert len(t.recorder.calls) == 4
+    assert table["hits"] == [1.0, 1.0, 1.0]
+    # the sleep is suspended, not running
+    assert table["await_time(in ms)"][1] > 5.0
+    assert table["active_time(in ms)"][1] < table["await_time(in ms)"][1]
+    assert table["await_time(in ms)"][0] == 0.0
@@ -0,0 +1,33 @@
+import pytest
+from codpulse import Tracker
+from codpulse.calibration import calibrate
+
+
+def loop(n):
+    for i in range(n):
+        x = i
+    return x
+
+
+def test_every_kind_of_probes_has_its_own_calibration():
+    assert calibrate(histograms=True) is calibrate(histograms=True)
+    assert calibrate(histograms=True) is not calibrate()
+
+
+@pytest.mark.parametrize(
+    "options, probes",
+    [
+        ({}, {}),
+        ({"histograms": True}, {"histograms": True}),
+        ({"cpu_time": True}, {"cpu": True}),
+        ({"slow_calls": 2}, {"timeline": True}),
+    ],
+)
+def test_corrected_time_removes_the_probes(options, probes):
+    # measured again next to the run, the cached calibration may date from a busier moment
+    calibrate(force=True, **probes)
+    t = Tracker(loop, no_iterations=3, **options)
+    t(20000)
+    table = t.analysis_table
+    # the probes of the 40000 executions in the loop cost far more than the loop itself
+    assert table["corrected_time(in ms)"][0] < table["mean_time(in ms)"][0] / 2
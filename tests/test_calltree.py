@@ -0,0 +1,28 @@
+from codpulse import Tracker
+
+
+def helper(n):
+    return sum(range(n))
+
+
+def caller(n):
+    first = helper(n)
+    second = helper(2 * n)
+    return first + second
+
+
+def test_callees_get_tables_of_their_own(capsys):
+    t = Tracker(caller, no_iterations=2, engine="live", depth=1, include=["tests.*"])
+    t(100)
+    table = t.analysis_table
+    assert table.columns[table.columns.index("mean_time(in ms)") + 1] == "self_time(in ms)"
+    # the time of a line calling helper is spent in helper, not on the line itself
+    assert all(own <= total for own, total in zip(table["self_time(in ms)"], table["mean_time(in ms)"]))
+    callees = t.callees()
+    assert list(callees) == ["tests.test_calltree.helper"]
+    # two calls per iteration
+    assert callees["tests.test_calltree.helper"]["hits"] == [2.0]
+    edges = t.call_edges()
+    assert edges.columns == ["caller", "LineNo", "line", "callee", "calls", "time(in ms)"]
+    assert edges["LineNo"] == [0, 1] and edges["calls"] == [1.0, 1.0]
+    assert set(edges["callee"]) == {"tests.test_calltree.helper"}
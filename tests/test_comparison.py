@@ -0,0 +1,42 @@
+import math
+from codpulse import compare
+
+
+def slow(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def fast(n):
+    total = sum(range(n))
+    return total
+
+
+def test_total_row_and_header_share_the_verdict(capsys):
+    result = compare(slow, fast, (20000,), iterations=10, seed=1)
+    table = result.table
+    assert result.low > 1
+    assert table["line"][0] == "<total>"
+    assert table["status"][0] == "faster" and math.isnan(table["p_value"][0])
+    assert "fast is faster" in capsys.readouterr().out
+
+
+def test_only_the_total_has_line_id_minus_one(capsys):
+    table = compare(slow, fast, (1000,), iterations=5, seed=1).table
+    rows = list(zip(table["b_LineNo"], table["a_LineNo"], table["status"]))
+    assert [row for row in rows if -1 in row[:2]] == [(-1, -1, rows[0][2])]
+    only_a = [row for row in rows if row[2] == "only a"]
+    only_b = [row for row in rows if row[2] == "only b"]
+    assert only_a and all(b_id is None for b_id, _, _ in only_a)
+    assert only_b and all(a_id is None for _, a_id, _ in only_b)
+    # missing line ids are printed as "-"
+    assert "| - " in capsys.readouterr().out
+
+
+def test_identical_functions_have_no_verdict(capsys):
+    result = compare(slow, slow, (100,), iterations=8, seed=2)
+    status = result.table["status"][0]
+    assert status == ("faster" if result.low > 1 else "slower" if result.high < 1 else "")
+    assert set(result.table["status"][1:]) <= {"", "faster", "slower"}
@@ -0,0 +1,47 @@
+import pytest
+from codpulse import Tracker
+from codpulse.complexity import ComplexityFit
+
+SIZES = [16, 32, 64, 128, 256]
+
+
+def quadratic(n):
+    total = 0
+    for i in range(n):
+        total += i
+        for j in range(n):
+            total += j
+    return total
+
+
+def test_noise_at_small_sizes_keeps_the_growth_class():
+    # 10% off at the smallest size, where the unweighted fit hardly looked
+    quadratic_times = [n * n * 1e-4 * (1.1 if n == 16 else 1.0) for n in SIZES]
+    linear_times = [n * 1e-3 for n in SIZES]
+    fit = ComplexityFit(SIZES, list(zip(quadratic_times, linear_times)))
+    assert fit.labels == ["O(n^2)", "O(n)"]
+    assert fit.r2[0] > 0.99 and fit.r2[1] == pytest.approx(1.0)
+
+
+def test_models_that_fit_alike_are_ambiguous():
+    noisy_linear = [n * 1e-3 * f for n, f in zip(SIZES, [1.08, 0.95, 1.05, 0.97, 1.02])]
+    fit = ComplexityFit(SIZES, [[time] for time in noisy_linear])
+    assert fit.labels == ["ambiguous"]
+    assert ComplexityFit(SIZES, [[time] for time in noisy_linear], margin=1.0).labels == ["O(n)"]
+
+
+def test_flat_lines_are_constant():
+    fit = ComplexityFit(SIZES, [[0.0, 0.5]] * len(SIZES))
+    assert fit.labels == ["O(1)", "O(1)"]
+
+
+def test_sweep_tells_linear_from_quadratic(capsys):
+    t = Tracker(quadratic, no_iterations=5, warmup=2)
+    table = t.sweep(lambda n: (n,), sizes=SIZES)
+    assert table.columns == ["LineNo", "line"] + [f"n={n}(in ms)" for n in SIZES] + ["growth", "fit_r2"]
+    assert table["growth"][0] == "O(1)"
+    # n executions of a cheap line, too close to the probe noise to tell O(n) from O(n log n)
+    assert table["growth"][2] in ("O(n)", "O(n log n)", "ambiguous")
+    assert table["growth"][4] == "O(n^2)"
+    heading = [line for line in capsys.readouterr().out.splitlines() if "| LineNo" in line][0]
+    assert heading.endswith("| fit_r2     |")
@@ -0,0 +1,32 @@
+from codpulse import Tracker
+from codpulse.convergence import relative_ci
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def test_relative_ci():
+    assert relative_ci(10.0, 0.0, 5) == 0.0
+    assert relative_ci(10.0, 1.0, 1) != relative_ci(10.0, 1.0, 1)
+    assert relative_ci(10.0, 1.0, 40) < relative_ci(10.0, 1.0, 10)
+
+
+def test_auto_iterations_stop_when_precise_enough(capsys):
+    t = Tracker(work, no_iterations="auto", max_time_s=10.0, target_rel_ci=0.05, warmup=2)
+    t(2000)
+    assert t.convergence.reason == "converged"
+    assert t.convergence.precision <= 0.05
+    assert t._iterations() >= t.convergence.min_iterations
+    assert "rel_ci(%)" in t.analysis_table.columns
+
+
+def test_auto_iterations_stop_at_the_budget(capsys):
+    t = Tracker(work, no_iterations="auto", max_time_s=0.2, target_rel_ci=1e-9)
+    t(2000)
+    assert t.convergence.reason == "time budget"
+    assert t.convergence.elapsed >= 0.2
+    assert "time budget" in capsys.readouterr().out
@@ -0,0 +1,39 @@
+import time
+import pytest
+from codpulse import Tracker
+from codpulse.calibration import calibrate
+
+
+def spin_and_sleep(n):
+    total = 0
+    for i in range(n):
+        total += i
+    time.sleep(0.02)
+    return total
+
+
+@pytest.fixture(scope="module")
+def table():
+    # measured again next to the run, the cached calibration may date from a busier moment
+    calibrate(force=True, cpu=True)
+    t = Tracker(spin_and_sleep, no_iterations=5, cpu_time=True)
+    t(20000)
+    return t.analysis_table
+
+
+def test_a_computing_loop_is_not_blocked(table):
+    # the probes of the 40000 executions nested in the loop are neither its CPU time
+    # nor its blocked time
+    assert table["cpu_time(in ms)"][1] < table["mean_time(in ms)"][1] / 2
+    assert table["blocked_time(in ms)"][1] < table["mean_time(in ms)"][1] / 3
+
+
+def test_a_sleep_is_blocked(table):
+    assert table["cpu_time(in ms)"][3] < 2.0
+    assert table["blocked_time(in ms)"][3] > 15.0
+
+
+def test_cpu_probes_have_their_own_calibration():
+    calibration = calibrate(cpu=True)
+    assert calibration.cpu_inner > 0.0
+    assert calibrate().cpu_inner == calibrate().cpu_outer == 0.0
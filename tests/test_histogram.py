@@ -0,0 +1,41 @@
+from codpulse import Tracker
+from codpulse.histogram import BUCKETS, LineHistograms, bucket_bounds, bucket_index
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def test_every_duration_falls_in_its_bucket():
+    for ns in (0, 1, 31, 32, 33, 1000, 123456789, 2**50):
+        low, high = bucket_bounds(bucket_index(ns))
+        assert bucket_index(ns) < BUCKETS
+        assert low <= ns < high or bucket_index(ns) == BUCKETS - 1
+        # the width of a bucket is at most about 1/16 of its durations
+        assert high - low <= max(1, low // 16)
+
+
+def test_merged_histograms_count_both_sides():
+    first, second = LineHistograms(1), LineHistograms(1)
+    for _ in range(9):
+        first.record(0, 1e-5)
+    second.record(0, 1e-2)
+    first.merge(second)
+    assert sum(first.counts) == 10
+    assert abs(first.percentile(0, 50) - 1e-5) < 1e-6
+    assert abs(first.percentile(0, 99) - 1e-2) < 1e-3
+
+
+def test_histograms_report_percentiles(capsys):
+    t = Tracker(work, no_iterations=3, histograms=True)
+    t(200)
+    table = t.analysis_table
+    assert table.columns[-3:] == ["hit_p50(in ms)", "hit_p90(in ms)", "hit_p99(in ms)"]
+    # a percentile of the executions lies between the fastest and the slowest one, up to
+    # the width of its bucket
+    for low, p90, high in zip(table["min_hit(in ms)"], table["hit_p90(in ms)"], table["max_hit(in ms)"]):
+        assert low * 0.9 <= p90 <= high * 1.1
+    assert "histogram" in capsys.readouterr().out
@@ -0,0 +1,88 @@
+import pytest
+from codpulse import Tracker
+from codpulse.history import capture, diff_runs, load_history, match_lines
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "runs.cpr"
+    t = Tracker(work, no_iterations=4)
+    t(1000)
+    saved = t.save(path)
+    t(1000)
+    t.save(path)
+    runs = load_history(path)
+    assert len(runs) == 2
+    run = runs[0]
+    assert run.name == "tests.test_history.work"
+    assert run.iterations == 4
+    assert run.lines == saved.lines
+    assert list(run.column("hits")) == t.analysis_table["hits"]
+    assert len(run.samples(1)) == 4
+    assert load_history(path, "work") and not load_history(path, "other")
+
+
+def test_diff_of_identical_code_flags_nothing_large(tmp_path):
+    path = tmp_path / "runs.cpr"
+    t = Tracker(work, no_iterations=5)
+    for _ in range(2):
+        t(1000)
+        t.save(path)
+    old, new = load_history(path)
+    diff = diff_runs(old, new, alpha=1e-6)
+    assert diff["LineNo"][0] == -1
+    assert set(diff["status"]) <= {"", "faster", "slower"}
+    assert len(diff) == len(old.lines) + 1
+
+
+def test_iterations_of_a_recursive_function():
+    t = Tracker(fib, no_iterations=2)
+    t(10)
+    run = capture(t)
+    assert run.iterations == 2
+    assert len(run.total_time) == 2
+    samples = run.samples(0)
+    assert samples is None or len(samples) == 2
+
+
+def test_match_lines():
+    pairs = match_lines(["a", "b", "c"], ["a", "x", "c"])
+    assert pairs == [(0, 0), (1, None), (None, 1), (2, 2)]
+
+
+def test_capture_requires_results():
+    with pytest.raises(ValueError):
+        capture(Tracker(work))
+
+
+def test_diff_of_one_file_skips_runs_of_other_functions(tmp_path, capsys):
+    from codpulse.__main__ import main
+
+    path = tmp_path / "runs.cpr"
+    t = Tracker(work, no_iterations=3)
+    other = Tracker(fib, no_iterations=3)
+    for tracker, arg in [(t, 1000), (other, 8), (t, 1000)]:
+        tracker(arg)
+        tracker.save(path)
+    capsys.readouterr()
+    main(["diff", str(path), "--alpha", "1e-6", "--threshold", "10"])
+    out = capsys.readouterr().out
+    assert "fib" not in out and "source changed" not in out
+    # the last run is the only one of its function
+    path = tmp_path / "mixed.cpr"
+    t.save(path)
+    other.save(path)
+    with pytest.raises(SystemExit, match=r"fewer than two runs of tests\.test_history\.fib"):
+        main(["diff", str(path)])
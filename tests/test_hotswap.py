@@ -0,0 +1,50 @@
+import pytest
+from codpulse import HotSwap, Tracker
+
+
+class Base:
+    def greet(self):
+        return "base"
+
+
+class Child(Base):
+    def greet(self):
+        return "child of " + super().greet()
+
+
+def counter():
+    count = 0
+
+    def increment():
+        nonlocal count
+        count += 1
+        return count
+
+    return increment
+
+
+def test_live_engine_keeps_super(capsys):
+    t = Tracker(Child.greet, no_iterations=2, engine="live")
+    t(Child())
+    assert t.analysis_table["hits"] == [1.0]
+    assert Child().greet() == "child of base"
+
+
+def test_swap_keeps_the_closure_and_restores_the_code():
+    increment = counter()
+    original = increment.__code__
+    with HotSwap(increment) as swap:
+        assert increment.__code__ is not original
+        assert [increment() for _ in range(3)] == [1, 2, 3]
+    assert increment.__code__ is original and not swap.active
+    assert increment() == 4
+    # the function has two statements, each run once by each of the three calls
+    assert swap.snapshot()["hits"] == [1.0, 1.0]
+    assert swap.recorder.stats.calls == 3
+
+
+def test_one_swap_at_a_time():
+    increment = counter()
+    with HotSwap(increment):
+        with pytest.raises(RuntimeError, match="already instrumented"):
+            HotSwap(increment).swap()
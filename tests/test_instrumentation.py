@@ -0,0 +1,141 @@
+import pytest
+from codpulse.instrumentation import compile_function, instrument_source, line_ids
+from codpulse.recorder import Recorder, STRIDE, HITS, TOTAL
+
+
+def run(function, *args):
+    instrumented = compile_function(function)
+    recorder = Recorder(len(instrumented.lines))
+    namespace = dict(function.__globals__, _cp_recorder=recorder)
+    exec(instrumented.code, namespace)
+    try:
+        result = namespace[instrumented.name](*args)
+    except Exception as error:
+        result = error
+    buffer = recorder.drain()[-1]
+    return result, instrumented, buffer[HITS::STRIDE], buffer[TOTAL::STRIDE]
+
+
+def caught():
+    try:
+        raise ValueError
+    except ValueError:
+        pass
+
+
+def uncaught():
+    x = 1
+    raise KeyError(x)
+
+
+def loop_jumps(n):
+    total = 0
+    for i in range(n):
+        if i % 2:
+            continue
+        if i == 6:
+            break
+        total += i
+    return total
+
+
+def return_in_loop(n):
+    for i in range(n):
+        if i == 2:
+            return i
+
+
+def only_docstring():
+    """Nothing else."""
+
+
+def nested_definition():
+    def inner():
+        return 1
+
+    return inner()
+
+
+def test_caught_exception_counts_the_raising_line():
+    _, instrumented, hits, totals = run(caught)
+    assert instrumented.lines == ("    try:", "        raise ValueError", "        pass")
+    assert hits == [1.0, 1.0, 1.0]
+    assert totals[0] >= totals[1] > 0
+
+
+def test_uncaught_exception_still_records_the_call():
+    result, _, hits, _ = run(uncaught)
+    assert isinstance(result, KeyError)
+    assert hits == [1.0, 1.0]
+
+
+def test_break_and_continue_close_their_probes():
+    result, instrumented, hits, _ = run(loop_jumps, 10)
+    assert result == 0 + 2 + 4
+    assert dict(zip(instrumented.lines, hits)) == {
+        "    total = 0": 1.0,
+        "    for i in range(n):": 1.0,
+        "        if i % 2:": 7.0,
+        "            continue": 3.0,
+        "        if i == 6:": 4.0,
+        "            break": 1.0,
+        "        total += i": 3.0,
+        "    return total": 1.0,
+    }
+
+
+def test_return_closes_the_enclosing_statements():
+    result, _, hits, totals = run(return_in_loop, 5)
+    assert result == 2
+    assert hits == [1.0, 3.0, 1.0]
+    assert totals[0] >= totals[1] >= totals[2]
+
+
+def test_nested_definitions_are_single_statements():
+    result, instrumented, hits, _ = run(nested_definition)
+    assert result == 1
+    assert instrumented.lines == ("    def inner():", "    return inner()")
+    assert instrumented.parents == (-1, -1)
+
+
+def test_docstring_only_function_has_no_lines():
+    result, instrumented, hits, _ = run(only_docstring)
+    assert result is None
+    assert instrumented.lines == ()
+    assert hits == []
+
+
+def test_parents_and_spans():
+    instrumented = compile_function(loop_jumps)
+    assert instrumented.parents == (-1, -1, 1, 2, 1, 4, 1, -1)
+    first = loop_jumps.__code__.co_firstlineno
+    assert instrumented.spans[1] == (first + 2, first + 7)
+    assert line_ids(instrumented.spans)[first + 3] == 2
+
+
+def test_deep_nesting_falls_back_to_unguarded_probes():
+    source = "def deep():\n"
+    for depth in range(12):
+        source += "    " * (depth + 1) + f"for i{depth} in range(2):\n"
+    source += "    " * 13 + "pass\n"
+    instrumented = instrument_source(source)
+    recorder = Recorder(len(instrumented.lines))
+    namespace = {"_cp_recorder": recorder}
+    exec(instrumented.code, namespace)
+    namespace["deep"]()
+    hits = recorder.drain()[-1][HITS::STRIDE]
+    assert hits[0] == 1.0
+    assert hits[-1] == 2.0 ** 12
+
+
+def test_only_functions_can_be_instrumented():
+    with pytest.raises(TypeError):
+        instrument_source("x = 1\n")
+
+
+def test_cache_reuses_code_and_separates_variants():
+    plain = compile_function(loop_jumps)
+    assert compile_function(loop_jumps) is plain
+    with_histograms = compile_function(loop_jumps, histograms=True)
+    assert with_histograms is not plain
+    assert with_histograms.lines == plain.lines
@@ -0,0 +1,29 @@
+import pytest
+from codpulse import Tracker
+
+
+def allocate(n):
+    data = [0] * n
+    small = 1
+    return len(data) + small
+
+
+def test_memory_columns():
+    t = Tracker(allocate, track_memory=True)
+    t(100_000)
+    table = t.analysis_table
+    assert table["mem_net(in KiB)"][0] == pytest.approx(100_000 * 8 / 1024, rel=0.1)
+    assert table["mem_peak(in KiB)"][0] >= table["mem_net(in KiB)"][0] * 0.9
+    assert abs(table["mem_net(in KiB)"][1]) < 1
+
+
+def test_no_corrected_time_with_memory_probes():
+    t = Tracker(allocate, track_memory=True)
+    assert not t.correct_overhead
+    t(10)
+    assert "corrected_time(in ms)" not in t.analysis_table.columns
+
+
+def test_memory_requires_a_plain_tracker():
+    with pytest.raises(ValueError):
+        Tracker(allocate, track_memory=True, thread_safe=True)
@@ -0,0 +1,68 @@
+import sys
+import pytest
+from codpulse import Tracker
+from codpulse.instrumentation import compile_function
+from codpulse.monitoring import LineMonitor
+from codpulse.recorder import Recorder, STRIDE, HITS, TOTAL, MIN
+
+requires_monitoring = pytest.mark.skipif(
+    not hasattr(sys, "monitoring"), reason="sys.monitoring requires Python 3.12+"
+)
+
+
+def loop(n):
+    total = 0
+    for i in range(n):
+        try:
+            total += i
+        except ValueError:
+            pass
+    return total
+
+
+@pytest.mark.skipif(hasattr(sys, "monitoring"), reason="sys.monitoring is available")
+def test_requires_python_312():
+    with pytest.raises(RuntimeError, match="3.12"):
+        Tracker(loop, engine="monitoring")
+
+
+@requires_monitoring
+def test_hits_match_the_exec_engine():
+    monitored = Tracker(loop, engine="monitoring", no_iterations=2)
+    monitored(10)
+    executed = Tracker(loop, no_iterations=2)
+    executed(10)
+    hits = monitored.analysis_table["hits"]
+    # the header of a loop gets a line event for every iteration and the last test
+    assert hits[0] == 1.0 and hits[1] == 11.0
+    assert hits[2:] == executed.analysis_table["hits"][2:]
+
+
+@requires_monitoring
+def test_header_without_line_events_gets_the_hits_of_its_first_statement():
+    instrumented = compile_function(loop)
+    recorder = Recorder(len(instrumented.lines))
+    monitor = LineMonitor(loop, instrumented, recorder)
+    monitor._on_start(monitor.code, 0)
+    buffer = monitor._frames[-1][0]
+    buffer[3 * STRIDE + HITS] = 10.0
+    buffer[3 * STRIDE + TOTAL] = 0.002
+    monitor._finish(recorder.clock())
+    buffer = recorder.drain()[-1]
+    assert buffer[2 * STRIDE + HITS] == 10.0
+    assert buffer[2 * STRIDE + MIN] == pytest.approx(0.0002)
+
+
+@requires_monitoring
+def test_profiler_id_in_use():
+    import cProfile
+
+    t = Tracker(loop, engine="monitoring")
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        with pytest.raises(RuntimeError, match="in use by 'cProfile'"):
+            t(10)
+    finally:
+        profile.disable()
+    t(10)
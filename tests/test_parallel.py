@@ -0,0 +1,31 @@
+import os
+from codpulse import Tracker
+from codpulse.parallel import ModuleRef, portable_namespace, split_iterations
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def test_split_iterations():
+    assert split_iterations(10, 3) == [4, 3, 3]
+    assert split_iterations(2, 4) == [1, 1]
+
+
+def test_namespace_without_recorder_or_modules():
+    namespace = portable_namespace({"_cp_recorder": object(), "os": os, "x": 1})
+    assert namespace.keys() == {"os", "x"}
+    assert isinstance(namespace["os"], ModuleRef) and namespace["os"].name == "os"
+
+
+def test_worker_processes_give_the_serial_table(capsys):
+    t = Tracker(work, no_iterations=6, workers=2)
+    t(200)
+    assert t._iterations() == len(t.recorder.calls) == len(t.total_time) == 6
+    serial = Tracker(work, no_iterations=6)
+    serial(200)
+    assert t.analysis_table.columns == serial.analysis_table.columns
+    assert t.analysis_table["hits"] == serial.analysis_table["hits"] == [1.0, 1.0, 200.0, 1.0]
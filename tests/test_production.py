@@ -0,0 +1,136 @@
+import asyncio
+import inspect
+import pytest
+import codpulse
+from codpulse import production, track
+
+
+class Base:
+    def value(self):
+        return 1
+
+
+class Child(Base):
+    def __init__(self):
+        self.__secret = 41
+
+    @track(sample_rate=1)
+    def value(self):
+        base = super().value()
+        return base + self.__secret
+
+
+def counter():
+    count = 0
+
+    @track(sample_rate=1)
+    def increment(step=1):
+        nonlocal count
+        count += step
+        return count
+
+    def peek():
+        return count
+
+    return increment, peek
+
+
+def closure_reader():
+    value = 0
+
+    @track(sample_rate=1)
+    def read():
+        return value
+
+    def write(new):
+        nonlocal value
+        value = new
+
+    return read, write
+
+
+@track(sample_rate=0.5)
+async def double(x):
+    await asyncio.sleep(0)
+    return 2 * x
+
+
+@track(sample_rate=0.25)
+def square(x):
+    y = x * x
+    return y
+
+
+def test_super_and_private_names():
+    child = Child()
+    assert child.value() == 42
+    assert child.value() == 42
+    table = Child.value.tracking.snapshot()
+    assert table["hits"] == [1.0, 1.0]
+
+
+def test_nonlocal_writes_the_real_cell():
+    increment, peek = counter()
+    assert increment() == 1
+    assert increment(2) == 3
+    assert peek() == 3
+    assert increment.tracking.recorder.stats.calls == 2
+
+
+def test_closure_values_stay_live():
+    read, write = closure_reader()
+    assert read() == 0
+    write(2)
+    assert read() == 2
+
+
+def test_sampling_period():
+    for x in range(8):
+        assert square(x) == x * x
+    assert square.tracking.recorder.stats.calls == 2
+    square.tracking.disable()
+    square(3)
+    assert square.tracking.recorder.stats.calls == 2
+    square.tracking.enable()
+    assert "tests.test_production.square" in codpulse.tracked_functions()
+
+
+def test_build_failure_falls_back_to_the_original(monkeypatch):
+    def broken(*args, **kwargs):
+        raise SyntaxError("no binding for nonlocal")
+
+    monkeypatch.setattr(production, "compile_function", broken)
+
+    @track(sample_rate=1)
+    def add(a, b):
+        return a + b
+
+    with pytest.warns(RuntimeWarning, match="sampling disabled"):
+        assert add(1, 2) == 3
+    assert add(2, 3) == 5
+    assert not add.tracking.enabled
+
+
+def test_disabled_by_environment(monkeypatch):
+    monkeypatch.setenv("CODPULSE_DISABLE", "1")
+
+    def plain():
+        return 1
+
+    assert track(plain) is plain
+    assert not plain.tracking.enabled
+    assert plain.tracking.snapshot() is None
+    plain.tracking.report()
+    plain.tracking.disable()
+
+
+def test_coroutine_functions_stay_coroutine_functions():
+    assert inspect.iscoroutinefunction(double)
+
+    async def calls():
+        return [await double(x) for x in range(4)]
+
+    assert asyncio.run(calls()) == [0, 2, 4, 6]
+    stats = double.tracking.recorder.stats
+    assert stats.calls == 2
+    assert double.tracking.snapshot()["hits"] == [1.0, 1.0]
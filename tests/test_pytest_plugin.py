@@ -0,0 +1,75 @@
+import numpy  # noqa: F401  the inline runs of pytester cannot import numpy again
+import pytest
+
+TESTS = """
+import os
+import time
+import pytest
+
+
+def helper(n):
+    total = sum(range(n))
+    time.sleep(float(os.environ.get(f"CODPULSE_TEST_SLOW_{n}", "0")))
+    return total
+
+
+@pytest.mark.codepulse("baselines/helper.cpr", iterations=8, min_ms=1)
+def test_small(codepulse):
+    assert codepulse(helper, 10) == 45
+
+
+@pytest.mark.codepulse("baselines/helper.cpr", iterations=8, min_ms=1)
+def test_large(codepulse):
+    assert codepulse(helper, 1000) == 499500
+
+
+@pytest.mark.codepulse(baseline="baselines/marked.cpr", iterations=3)
+def test_marked():
+    assert helper(5) == 10
+"""
+
+
+@pytest.fixture
+def suite(pytester):
+    pytester.makepyfile(test_perf=TESTS)
+    return pytester
+
+
+def run(suite, *args):
+    return suite.runpytest("-p", "codpulse.pytest_plugin", "-q", *args)
+
+
+def test_baselines_are_created_then_compared(suite):
+    run(suite).assert_outcomes(passed=3)
+    assert (suite.path / "baselines" / "helper.cpr").exists()
+    run(suite).assert_outcomes(passed=3)
+
+
+def test_a_slower_test_fails_alone(suite, monkeypatch):
+    run(suite).assert_outcomes(passed=3)
+    monkeypatch.setenv("CODPULSE_TEST_SLOW_10", "0.005")
+    result = run(suite)
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(["*test_small*"])
+    assert "test_large" not in "".join(line for line in result.outlines if "FAILED" in line)
+
+
+def test_update_records_new_baselines(suite, monkeypatch):
+    from codpulse.history import load_history
+
+    run(suite).assert_outcomes(passed=3)
+    monkeypatch.setenv("CODPULSE_TEST_SLOW_10", "0.005")
+    run(suite, "--codepulse-update").assert_outcomes(passed=3)
+    runs = load_history(suite.path / "baselines" / "helper.cpr")
+    assert sorted(run.label for run in runs) == [
+        "test_perf.py::test_large",
+        "test_perf.py::test_large",
+        "test_perf.py::test_small",
+        "test_perf.py::test_small",
+    ]
+    run(suite).assert_outcomes(passed=3)
+
+
+def test_skip_runs_without_profiling(suite):
+    run(suite, "--codepulse-skip").assert_outcomes(passed=3)
+    assert not (suite.path / "baselines").exists()
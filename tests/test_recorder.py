@@ -0,0 +1,124 @@
+import asyncio
+import os
+import subprocess
+import sys
+from codpulse import Tracker
+from codpulse.history import load_history
+from codpulse.production import track
+from codpulse.recorder import HITS, Recorder
+from codpulse.threads import ThreadRecorder
+
+
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+
+def countdown(n):
+    for i in range(n):
+        yield i
+
+
+@track(sample_rate=1)
+def tracked_fib(n):
+    if n < 2:
+        return n
+    return tracked_fib(n - 1) + tracked_fib(n - 2)
+
+
+async def pause(n):
+    await asyncio.sleep(0.001)
+    return n
+
+
+def test_nested_calls_merge_into_the_outer_buffer():
+    recorder = Recorder(1)
+    outer = recorder.enter()
+    inner = recorder.enter()
+    assert recorder.running()
+    inner[HITS] = 2.0
+    recorder.exit(inner)
+    outer[HITS] += 1.0
+    recorder.exit(outer)
+    assert not recorder.running()
+    assert recorder.calls == [outer] and outer[HITS] == 3.0
+
+
+def test_interleaved_generators_are_not_nested():
+    recorder = Recorder(1)
+    first = recorder.enter(generator=True)
+    second = recorder.enter(generator=True)
+    assert not recorder.running()
+    recorder.exit(first)
+    recorder.exit(second)
+    assert recorder.calls == [first, second]
+
+
+def test_recursive_function_has_one_buffer_per_iteration():
+    t = Tracker(fib, no_iterations=3)
+    t(6)
+    assert len(t.recorder.calls) == 3
+    # fib(6) runs 25 frames, every one of them tests n < 2
+    assert [call[HITS] for call in t.recorder.calls] == [25.0] * 3
+    assert t.analysis_table["hits"][0] == 25.0
+
+
+def test_thread_recorder_merges_nested_calls_by_thread():
+    recorder = ThreadRecorder(1)
+    outer = recorder.enter()
+    recorder.exit(recorder.enter())
+    recorder.exit(outer)
+    assert len(recorder.calls) == 1
+
+
+def test_concurrent_coroutines_are_not_nested():
+    t = Tracker(pause, no_iterations=6, concurrency=3, namespace={"asyncio": asyncio})
+    asyncio.run(t.acall(1))
+    assert len(t.recorder.calls) == 6
+    assert all(call[HITS] == 1.0 for call in t.recorder.calls)
+
+
+def test_generator_functions_announce_themselves():
+    t = Tracker(countdown, no_iterations=1)
+    namespace = {"_cp_recorder": t.recorder}
+    exec(t.instrumented.code, namespace)
+    outer = namespace["countdown"](3)
+    next(outer)
+    # the suspended generator does not swallow the calls made meanwhile
+    assert list(namespace["countdown"](2)) == [0, 1]
+    assert list(outer) == [1, 2]
+    assert len(t.recorder.calls) == 2
+
+
+def test_sampled_recursion_is_timed_once():
+    tracking = tracked_fib.tracking
+    tracking.reset()
+    assert tracked_fib(5) == 5
+    # the 15 frames are all sampled, and merged into the outer call
+    assert tracking.recorder.total_time.count == 1
+    stats = tracking.recorder.stats
+    assert stats.totals.count == 1 and stats.hits[0] == 15.0
+
+
+def test_command_line_iterations_match_the_buffers(tmp_path):
+    (tmp_path / "script.py").write_text(
+        "def fib(n):\n"
+        "    if n < 2:\n"
+        "        return n\n"
+        "    return fib(n - 1) + fib(n - 2)\n"
+        "\n"
+        "fib(8)\n"
+    )
+    path = tmp_path / "runs.cpr"
+    subprocess.run(
+        [sys.executable, "-m", "codpulse", "--func", "__main__:fib", "--iterations", "2", "--save", str(path), "script.py"],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))},
+        check=True,
+    )
+    (run,) = load_history(path)
+    assert run.iterations == 2
+    # the samples are only stored when there is one buffer per iteration
+    assert len(run.samples(0)) == 2
+    assert list(run.column("hits"))[0] == 67.0
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+from codpulse.runner import Target
+
+
+def slow(n):
+    time.sleep(0.005)
+    if n:
+        return slow(n - 1)
+    return n
+
+
+async def pause(n):
+    await asyncio.sleep(0.005)
+    return n
+
+
+def test_concurrent_calls_are_all_timed(capsys):
+    target = Target("tests.test_runner", "slow")
+    wrapper = target(slow)
+
+    def calls():
+        for _ in range(5):
+            wrapper(1)
+
+    threads = [threading.Thread(target=calls) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        # the recursive call is part of its outer call, the calls of other threads are not
+        assert len(target.tracker.total_time) == len(target.tracker.recorder.calls) == 20
+    finally:
+        assert target.finish()
+
+
+def test_concurrent_coroutines_are_all_timed(capsys):
+    target = Target("tests.test_runner", "pause")
+    wrapper = target(pause)
+
+    async def calls():
+        return await asyncio.gather(*(wrapper(i) for i in range(6)))
+
+    assert asyncio.run(calls()) == list(range(6))
+    try:
+        assert len(target.tracker.total_time) == len(target.tracker.recorder.calls) == 6
+    finally:
+        assert target.finish()
@@ -0,0 +1,32 @@
+import time
+import pytest
+from codpulse import Tracker
+
+
+def sleeper(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_sampling_mode_finds_the_slow_line(capsys):
+    t = Tracker(sleeper, no_iterations=3, mode="sampling", interval_ms=1)
+    t(0.05)
+    table = t.analysis_table
+    assert table.columns == ["LineNo", "line", "samples", "mean_time(in ms)", "ci_low(in ms)", "ci_high(in ms)"]
+    assert table["samples"][0] > 0 and table["samples"][0] == t.monitor.samples
+    # the sleep holds nearly every sample, so nearly all of the time
+    assert table["mean_time(in ms)"][0] > 0.5 * sum(t.total_time) / 3
+    # when every sample hit the line, the estimate is the upper bound up to rounding
+    assert table["ci_low(in ms)"][0] <= table["mean_time(in ms)"][0] <= table["ci_high(in ms)"][0] + 1e-9
+
+
+def test_unknown_mode_is_refused():
+    with pytest.raises(ValueError, match="unknown mode 'guess'"):
+        Tracker(sleeper, mode="guess")
+
+
+def test_warmup_calls_are_not_sampled(capsys):
+    t = Tracker(sleeper, no_iterations=1, warmup=3, mode="sampling", interval_ms=1)
+    t(0.05)
+    # one sample per interval at most, over the timed iteration alone
+    assert 0 < t.analysis_table["samples"][0] <= sum(t.total_time) + 1
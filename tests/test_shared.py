@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import threading
+import pytest
+from codpulse.production import track
+from codpulse.shared import PID, SEQUENCE, STARTED, Segment, collect, segments
+
+pytest.importorskip("fcntl")
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def handler(n):
+    return sum(range(n))
+
+
+tracked_handler = track(handler, sample_rate=1, shared=True)
+
+
+def _unlink(prefix):
+    for name in segments():
+        segment = Segment(name)
+        if segment.metadata["name"].startswith(prefix):
+            segment.unlink()
+        segment.close()
+
+
+@pytest.fixture
+def tracked():
+    _unlink("tests.test_shared.")
+    function = track(work, sample_rate=1, shared=True)
+    yield function
+    segment, function.tracking.segment = function.tracking.segment, None
+    if segment is not None:
+        segment.unlink()
+        segment.close()
+
+
+def test_sampled_calls_publish_at_most_once_per_interval(tracked):
+    tracked.tracking.publish_interval = 3600
+    for _ in range(3):
+        tracked(10)
+    segment = tracked.tracking.segment
+    # the first sampled call wrote the slot once, the later ones did not
+    assert segment.slots[1, SEQUENCE] == 2
+    assert collect("tests.test_shared.work").stats.calls == 1
+    tracked.tracking.publish()
+    assert collect("tests.test_shared.work").stats.calls == 3
+
+
+def test_threads_of_a_process_publish_one_at_a_time(tracked):
+    tracked.tracking.publish_interval = 0
+    errors = []
+
+    def calls():
+        try:
+            for _ in range(200):
+                tracked(50)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=calls) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tracked.tracking.publish()
+    collected = collect("tests.test_shared.work")
+    assert not errors
+    assert collected.stats.calls == collected.total_time.count == 1600
+    assert collected.stats.hits[2] == 1600 * 50
+    assert tracked.tracking.segment.slots[1, SEQUENCE] % 2 == 0
+
+
+def test_slot_of_an_exited_process_is_retired_when_its_pid_is_reused():
+    tracking = track(work, sample_rate=1).tracking
+    tracking.sample((10,), {})
+    name = f"codpulse_test_{os.getpid()}"
+    metadata = {
+        "name": "tests.work",
+        "lines": list(tracking.instrumented.lines),
+        "parents": list(tracking.instrumented.parents),
+        "is_async": False,
+    }
+    first = Segment(name, metadata, n_slots=2)
+    try:
+        assert first.publish(tracking.recorder.stats, tracking.recorder.total_time)
+        # a process that started at another time held the slot under the same pid
+        first.slots[1, STARTED] += 1
+        second = Segment(name)
+        assert second.claim() == 1
+        assert second.slots[1, PID] == os.getpid()
+        # the statistics of the slot were retired
+        assert second.read(0)[0].calls == 1
+        second.close()
+    finally:
+        first.unlink()
+        first.close()
+
+
+def _run_worker(calls):
+    tracked_handler.tracking.publish_interval = 3600
+    for _ in range(calls):
+        tracked_handler(100)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_statistics_of_worker_processes_are_collected():
+    _unlink("tests.test_shared.handler")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_run_worker, args=(calls,)) for calls in (5, 7)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    try:
+        collected = collect("tests.test_shared.handler")
+        # the workers published once more when they exited
+        assert collected.workers == 2
+        assert collected.stats.calls == collected.total_time.count == 12
+        assert collected.lines == ["    return sum(range(n))"]
+    finally:
+        _unlink("tests.test_shared.handler")
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from codpulse import Tracker
+from codpulse.stats import RunningStats
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def test_merged_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(5.0, 2.0, size=(100, 3))
+    first, second = RunningStats(3), RunningStats(3)
+    for value in values[:30]:
+        first.add(value)
+    for value in values[30:]:
+        second.add(value)
+    first.merge(second)
+    assert first.count == 100
+    assert first.mean == pytest.approx(values.mean(axis=0))
+    assert first.std == pytest.approx(values.std(axis=0, ddof=1))
+
+
+def test_streaming_keeps_no_buffer(capsys):
+    t = Tracker(work, no_iterations=50, streaming=True)
+    t(100)
+    assert t.recorder.stats.calls == 50
+    assert t.recorder.calls == []
+    assert t.total_time.count == 50
+    table = t.snapshot()
+    assert table["hits"] == [1.0, 1.0, 100.0, 1.0]
+    assert table.columns == t.analysis_table.columns
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import pytest
+from codpulse.table import ResultTable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_columns_in_display_order():
+    table = ResultTable({"LineNo": [0, 1], "line": ["a", "b"]})
+    table.add_column("hits", [1.0, 2.0], after="LineNo")
+    assert table.columns == ["LineNo", "hits", "line"]
+    assert list(table.rows()) == [(0, 1.0, "a"), (1, 2.0, "b")]
+    assert len(table) == 2
+
+
+def test_to_pandas():
+    pd = pytest.importorskip("pandas")
+    table = ResultTable({"LineNo": [0, 1], "hits": [1.0, 2.0]})
+    frame = table.to_pandas()
+    assert isinstance(frame, pd.DataFrame)
+    assert list(frame.columns) == table.columns
+    assert table.to_pandas() is frame
+
+
+def test_profiling_does_not_import_pandas(tmp_path):
+    (tmp_path / "script.py").write_text(
+        "import sys\n"
+        "from codpulse import Tracker\n"
+        "\n"
+        "def work(n):\n"
+        "    return sum(range(n))\n"
+        "\n"
+        "t = Tracker(work, no_iterations=2)\n"
+        "t(10)\n"
+        "t.analysis_table\n"
+        "assert 'pandas' not in sys.modules\n"
+    )
+    subprocess.run(
+        [sys.executable, "script.py"],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
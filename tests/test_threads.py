@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from codpulse import Tracker
+from codpulse.threads import ThreadRecorder
+
+
+def work(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def test_threads_are_merged(capsys):
+    t = Tracker(work, no_iterations=1, thread_safe=True)
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(t, [100] * 40))
+    assert sum(len(recorder.calls) for recorder in t.recorder.threads.values()) == 40
+    assert len(t.recorder.calls) == len(t.recorder.total_time) == 40
+    t.report()
+    assert t.analysis_table["hits"] == [1.0, 1.0, 100.0, 1.0]
+    tables = t.snapshot_threads()
+    assert tables.keys() == t.recorder.threads.keys()
+    assert all(table["hits"] == [1.0, 1.0, 100.0, 1.0] for table in tables.values())
+    t.reset()
+    assert t.recorder.calls == [] and t.recorder.threads == {}
+
+
+def test_threads_with_the_same_name_keep_their_own_recorder():
+    recorder = ThreadRecorder(1)
+
+    def call():
+        recorder.exit(recorder.enter())
+
+    # one after the other, so the second thread may also get the ident of the first
+    for _ in range(3):
+        thread = threading.Thread(target=call, name="worker")
+        thread.start()
+        thread.join()
+    assert list(recorder.threads) == ["worker", "worker-2", "worker-3"]
+    assert len(recorder.calls) == 3
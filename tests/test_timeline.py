@@ -0,0 +1,43 @@
+import json
+from codpulse import Tracker
+from codpulse.instrumentation import compile_function
+from codpulse.recorder import HITS, STRIDE, Recorder
+from codpulse.timeline import SlowCalls
+
+
+def loop(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def test_timelines_stop_growing_at_the_limit():
+    instrumented = compile_function(loop, timeline=True)
+    recorder = Recorder(len(instrumented.lines))
+    recorder.timeline = SlowCalls(2, max_executions=50)
+    namespace = {"_cp_recorder": recorder}
+    exec(instrumented.code, namespace)
+    assert namespace["loop"](1000) == 499500
+    assert namespace["loop"](10) == 45
+    long, short = recorder.timeline.calls()
+    assert len(long) == 50 and long.truncated
+    # the 10 executions of the body, the loop, and the first and last statements
+    assert len(short) == 13 and not short.truncated
+    # the statistics of the recorder still count every execution
+    assert recorder.calls[0][2 * STRIDE + HITS] == 1000.0
+
+
+def test_slowest_calls_are_kept(tmp_path):
+    t = Tracker(loop, no_iterations=5, slow_calls=2)
+    t(100)
+    calls = t.slow_calls()
+    assert len(calls) == 2 and calls[0].duration >= calls[1].duration
+    assert t.timeline.seen == 5
+    hits, _ = calls[0].line_times(len(t.instrumented.lines))
+    assert hits == [1, 1, 100, 1]
+    assert list(t.slow_call()["hits"]) == hits
+    path = tmp_path / "trace.json"
+    t.export_trace(path)
+    events = json.loads(path.read_text())["traceEvents"]
+    assert sum(event.get("cat") == "line" for event in events) == 2 * 103
@@ -0,0 +1,138 @@
+import math
+import pytest
+from codpulse import Tracker
+from codpulse.calibration import Calibration
+from codpulse.recorder import Recorder
+from codpulse.utils import process_logs, process_stats
+from codpulse.instrumentation import compile_function
+
+
+def generator(n):
+    for i in range(n):
+        yield i
+
+
+def only_docstring():
+    """Nothing else."""
+
+
+def fails(n):
+    total = sum(range(n))
+    raise RuntimeError(total)
+
+
+def loop(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def test_process_logs_without_lines():
+    table = process_logs([[], []], ())
+    assert len(table) == 0
+    assert "p50_time(in ms)" in table.columns
+
+
+def test_process_logs_without_calls():
+    table = process_logs([], ("a", "b"), [-1, -1], Calibration(1e-7, 2e-7))
+    assert table["hits"] == [0.0, 0.0]
+    assert all(math.isnan(value) for value in table["corrected_time(in ms)"])
+    with_calls = process_logs([[1.0, 1e-3, 1e-3, 1e-3, 0.0] * 2], ("a", "b"), [-1, -1], Calibration(1e-7, 2e-7))
+    assert table.columns == with_calls.columns
+
+
+def test_generator_function_records_no_calls():
+    t = Tracker(generator)
+    t(3)
+    table = t.analysis_table
+    assert table["hits"] == [0.0, 0.0]
+    assert all(math.isnan(value) for value in table["mean_time(in ms)"])
+
+
+def test_docstring_only_function():
+    t = Tracker(only_docstring)
+    t()
+    assert len(t.analysis_table) == 0
+
+
+def test_raising_call_is_recorded():
+    t = Tracker(fails)
+    with pytest.raises(RuntimeError):
+        t(10)
+    table = process_logs(t.recorder.calls, t.instrumented.lines, t.instrumented.parents)
+    assert table["hits"] == [1.0, 1.0]
+
+
+def test_process_logs_statistics():
+    items = [
+        [1.0, 0.002, 0.002, 0.002, 0.0, 4.0, 0.001, 0.0002, 0.0003, 0.0],
+        [1.0, 0.004, 0.004, 0.004, 0.0, 2.0, 0.003, 0.001, 0.002, 0.0],
+    ]
+    table = process_logs(items, ("a", "b"))
+    assert table["hits"] == [1.0, 3.0]
+    assert table["mean_time(in ms)"] == pytest.approx([3.0, 2.0])
+    assert table["std_time(in ms)"] == pytest.approx([2 ** 0.5, 2 ** 0.5])
+    assert table["p50_time(in ms)"] == pytest.approx([3.0, 2.0])
+    assert table["min_hit(in ms)"] == pytest.approx([2.0, 0.2])
+    assert table["max_hit(in ms)"] == pytest.approx([4.0, 2.0])
+
+
+def test_process_logs_of_many_calls_match_numpy():
+    import numpy as np
+
+    from codpulse.recorder import HITS, MAX, MIN, STRIDE, TOTAL
+
+    rng = np.random.default_rng(1)
+    calls = np.zeros((2000, 50 * STRIDE))
+    calls[:, HITS::STRIDE] = rng.integers(1, 10, size=(2000, 50))
+    calls[:, TOTAL::STRIDE] = rng.exponential(1e-3, size=(2000, 50))
+    calls[:, MIN::STRIDE] = calls[:, TOTAL::STRIDE] / 20
+    calls[:, MAX::STRIDE] = calls[:, TOTAL::STRIDE] / 2
+    table = process_logs([list(call) for call in calls], [f"line {i}" for i in range(50)])
+    totals = calls[:, TOTAL::STRIDE] * 1000
+    assert table["hits"] == pytest.approx(calls[:, HITS::STRIDE].mean(axis=0))
+    assert table["mean_time(in ms)"] == pytest.approx(totals.mean(axis=0))
+    assert table["std_time(in ms)"] == pytest.approx(totals.std(axis=0, ddof=1))
+    assert table["p90_time(in ms)"] == pytest.approx(np.percentile(totals, 90, axis=0))
+    assert table["min_hit(in ms)"] == pytest.approx(totals.min(axis=0) / 20)
+    assert table["max_hit(in ms)"] == pytest.approx(totals.max(axis=0) / 2)
+
+
+def test_process_stats_matches_process_logs():
+    from codpulse.stats import StreamingRecorder
+
+    instrumented = compile_function(loop)
+    logs, streaming = Recorder(len(instrumented.lines)), StreamingRecorder(len(instrumented.lines))
+    for recorder in (logs, streaming):
+        namespace = {"_cp_recorder": recorder}
+        exec(instrumented.code, namespace)
+        for n in (10, 20, 30):
+            namespace["loop"](n)
+    expected = process_logs(logs.calls, instrumented.lines)
+    table = process_stats(streaming.stats, instrumented.lines)
+    assert table["hits"] == pytest.approx(expected["hits"])
+    assert [column for column in expected.columns if not column.startswith("p")] == table.columns
+
+
+def test_corrected_time_clips_the_mean_once():
+    # 1 hit of 0.1 ms and of 0.5 ms against a probe cost of 0.3 ms
+    items = [[1.0, 1e-4, 1e-4, 1e-4, 0.0], [1.0, 5e-4, 5e-4, 5e-4, 0.0]]
+    table = process_logs(items, ("a",), [-1], Calibration(3e-4, 3e-4))
+    assert table["corrected_time(in ms)"] == pytest.approx([0.0])
+    items[0][1] = 2e-4
+    table = process_logs(items, ("a",), [-1], Calibration(3e-4, 3e-4))
+    assert table["corrected_time(in ms)"] == pytest.approx([0.05])
+
+
+def test_corrected_total_agrees_with_the_lines(capsys):
+    t = Tracker(loop)
+    t(2000)
+    table = t.analysis_table
+    header = capsys.readouterr().out.split("corrected_time(in ms): ")[1]
+    total = float(header.split(",")[0])
+    for line_id, parent in enumerate(t.instrumented.parents):
+        corrected = table["corrected_time(in ms)"][line_id]
+        assert 0.0 <= corrected <= table["mean_time(in ms)"][line_id]
+        if parent == -1:
+            assert total >= round(corrected, 3) - 0.001